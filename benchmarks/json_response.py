@@ -0,0 +1,79 @@
+"""
+Compares the default FastAPI serialization path with `FastJSONResponse` on a synthetic
+stock log listing, and the bytes each content coding puts on the wire. No database needed.
+
+    python -m benchmarks.json_response --rows 10000
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import brotli
+from fastapi.encoders import jsonable_encoder
+
+from models.Warehouse import LogType, StockType
+from utils.response_util import BROTLI_QUALITY, GZIP_LEVEL, FastJSONResponse
+
+
+def build_rows(count: int):
+    started = datetime(2025, 1, 1, 8, 0)
+    return [
+        {
+            "id": index,
+            "warehouse": f"Warehouse {index % 12}",
+            "product": f"Product {index % 800}",
+            "quantity": (index * 7) % 500,
+            "stock_type": StockType.promotional if index % 9 == 0 else StockType.regular,
+            "log_type": LogType.stock_in if index % 2 else LogType.stock_out,
+            "stock_in_date": started + timedelta(minutes=index),
+            "stock_out_date": None,
+        }
+        for index in range(count)
+    ]
+
+
+def default_render(rows) -> bytes:
+    # What FastAPI does for a plain return value: jsonable_encoder, then JSONResponse.render.
+    return json.dumps(
+        jsonable_encoder(rows), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_render(rows) -> bytes:
+    return FastJSONResponse(rows).body
+
+
+def time_call(function, argument, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(argument)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+
+    default_ms, default_body = time_call(default_render, rows, args.repeat)
+    fast_ms, fast_body = time_call(fast_render, rows, args.repeat)
+    gzip_ms, gzip_body = time_call(lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL), fast_body, args.repeat)
+    brotli_ms, brotli_body = time_call(lambda body: brotli.compress(body, quality=BROTLI_QUALITY), fast_body, args.repeat)
+
+    print(f"{args.rows} rows")
+    print(f"jsonable_encoder + json : {default_ms:8.2f} ms median, {len(default_body):>10} bytes")
+    print(f"orjson                  : {fast_ms:8.2f} ms median, {len(fast_body):>10} bytes")
+    if fast_ms:
+        print(f"encode speedup          : {default_ms / fast_ms:8.1f}x")
+    print(f"gzip level {GZIP_LEVEL}            : {gzip_ms:8.2f} ms median, {len(gzip_body):>10} bytes")
+    print(f"brotli quality {BROTLI_QUALITY}        : {brotli_ms:8.2f} ms median, {len(brotli_body):>10} bytes")
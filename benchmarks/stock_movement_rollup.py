@@ -0,0 +1,74 @@
+"""
+Compares a movement report computed from raw `stock_log` with the same report read
+from `daily_stock_movement`, against the database configured in `.env`.
+
+    python -m benchmarks.stock_movement_rollup --warehouse 1 --start 2025-01-01 --end 2025-12-31
+
+Run `python -m utils.stock_movement_util backfill` first so both sides hold the same data.
+"""
+
+import argparse
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from db import engine
+from models.Warehouse import DailyStockMovement, StockLog
+
+
+def raw_scan_query(warehouse_id: int, start: date, end: date):
+    day = func.date(func.coalesce(StockLog.stock_in_date, StockLog.stock_out_date))
+    return (
+        select(day, StockLog.product_id, StockLog.stock_type, StockLog.log_type, func.sum(StockLog.quantity))
+        .where(StockLog.warehouse_id == warehouse_id, day >= start, day <= end)
+        .group_by(day, StockLog.product_id, StockLog.stock_type, StockLog.log_type)
+    )
+
+
+def rollup_query(warehouse_id: int, start: date, end: date):
+    return (
+        select(
+            DailyStockMovement.day,
+            DailyStockMovement.product_id,
+            DailyStockMovement.stock_type,
+            DailyStockMovement.log_type,
+            func.sum(DailyStockMovement.quantity),
+        )
+        .where(
+            DailyStockMovement.warehouse_id == warehouse_id,
+            DailyStockMovement.day >= start,
+            DailyStockMovement.day <= end,
+        )
+        .group_by(DailyStockMovement.day, DailyStockMovement.product_id, DailyStockMovement.stock_type, DailyStockMovement.log_type)
+    )
+
+
+def time_query(session: Session, statement, repeat: int):
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = session.exec(statement).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--warehouse", type=int, required=True)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2000, 1, 1))
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        raw_ms, raw_rows = time_query(session, raw_scan_query(args.warehouse, args.start, args.end), args.repeat)
+        rollup_ms, rollup_rows = time_query(session, rollup_query(args.warehouse, args.start, args.end), args.repeat)
+
+    print(f"raw stock_log scan : {raw_ms:8.2f} ms median, {raw_rows} rows")
+    print(f"daily rollup       : {rollup_ms:8.2f} ms median, {rollup_rows} rows")
+    if rollup_ms:
+        print(f"speedup            : {raw_ms / rollup_ms:8.1f}x")
@@ -0,0 +1 @@
+# Puts the repository root on sys.path so tests import `utils`, `models` and `routes` as the app does.
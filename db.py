@@ -10,6 +10,8 @@ from sqlmodel import create_engine, Session
 from dotenv import load_dotenv
 from sqlmodel import SQLModel
 
+from utils.batch_util import batch_session
+
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 POSTGRES = os.getenv("POSTGRES")
@@ -25,6 +27,11 @@ engine = create_engine(POSTGRES)
 
 
 def get_session():
+    shared = batch_session.get()
+    if shared is not None:
+        # a sub-request of /batch, the batch owns and closes the session
+        yield shared
+        return
     with Session(engine) as session:
         yield session
         
@@ -9,6 +9,7 @@ from starlette.status import HTTP_400_BAD_REQUEST
 from fastapi.middleware.cors import CORSMiddleware
 
 from db import create_db_and_tables
+from utils.lookup_cache import current_tenant
 from routes.serviceProvider import ServiceProvider
 from routes.accounts import AccountRouter
 from routes.address import AddressRouter
@@ -26,6 +27,22 @@ from routes.warehouseStoreAdmin import WarehouseStoreAdminRouter
 from routes.stock import StockRouter
 from routes.stockLog import StockLogRouter
 from routes.itemRequest import WarehouseItemRequestRouter
+from routes.warehouseTransfer import WarehouseTransferRouter
+from routes.stockMovement import StockMovementRouter
+from routes.replenishment import ReplenishmentRouter
+from routes.valuation import ValuationRouter
+from routes.dashboard import DashboardRouter
+from routes.kpi import KPIRouter
+from routes.callCoverage import CallCoverageRouter
+from routes.proximity import ProximityRouter
+from routes.routeSequence import RouteSequenceRouter
+from routes.track import TrackRouter
+from routes.blob import BlobRouter
+from routes.export import ExportRouter
+from routes.search import SearchRouter
+from routes.dedupe import DedupeRouter
+from routes.batch import BatchRouter
+from utils.pagination_util import PAGINATION_HEADERS
 
 
 
@@ -50,6 +67,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PAGINATION_HEADERS,
 )
 @app.middleware("http")
 async def extract_tenant(request: Request, call_next):
@@ -60,6 +78,7 @@ async def extract_tenant(request: Request, call_next):
         request.state.tenant = path_parts[0]
     else:
         request.state.tenant = None
+    current_tenant.set(request.state.tenant)
     response = await call_next(request)
     return response
 
@@ -99,3 +118,18 @@ app.include_router(WarehouseStoreAdminRouter, prefix="/{tenant}/warehouse", tags
 app.include_router(StockRouter, prefix="/{tenant}/warehouse", tags=["warehouse-stock"])
 app.include_router(StockLogRouter, prefix="/{tenant}/warehouse", tags=["warehouse-stock-log"])
 app.include_router(WarehouseItemRequestRouter, prefix="/{tenant}/warehouse", tags=["warehouse-item-request"])
+app.include_router(WarehouseTransferRouter, prefix="/{tenant}/warehouse", tags=["warehouse-transfer"])
+app.include_router(StockMovementRouter, prefix="/{tenant}/warehouse", tags=["warehouse-stock-movement"])
+app.include_router(ReplenishmentRouter, prefix="/{tenant}/warehouse", tags=["warehouse-replenishment"])
+app.include_router(ValuationRouter, prefix="/{tenant}/warehouse", tags=["warehouse-valuation"])
+app.include_router(DashboardRouter, prefix="/{tenant}/dashboard", tags=["dashboard"])
+app.include_router(KPIRouter, prefix="/{tenant}/kpi", tags=["kpi"])
+app.include_router(CallCoverageRouter, prefix="/{tenant}/kpi", tags=["call-coverage"])
+app.include_router(ProximityRouter, prefix="/{tenant}/address", tags=["proximity"])
+app.include_router(RouteSequenceRouter, prefix="/{tenant}/route", tags=["route-sequence"])
+app.include_router(TrackRouter, prefix="/{tenant}/visit", tags=["travel-track"])
+app.include_router(BlobRouter, prefix="/blob", tags=["blob"])
+app.include_router(ExportRouter, prefix="/{tenant}/export", tags=["export"])
+app.include_router(SearchRouter, prefix="/{tenant}", tags=["search"])
+app.include_router(DedupeRouter, prefix="/{tenant}/dedupe", tags=["dedupe"])
+app.include_router(BatchRouter, tags=["batch"])
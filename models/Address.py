@@ -1,7 +1,10 @@
 from pydantic import model_validator
+from sqlalchemy import Index, event
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, Self
 
+from utils.geohash_util import encode_geohash
+
 
 class Address(SQLModel, table=True): 
     __tablename__ = "address"
@@ -12,16 +15,29 @@ class Address(SQLModel, table=True):
     sub_city: str = Field(index=True)
     woreda: str = Field(index=True)
     organization: Optional[int] = Field(default=None, foreign_key="organization.id", ondelete="CASCADE", index=True)
+    # organization and normalized parts, see utils.address_util.get_address_key
+    address_key: Optional[str] = Field(default=None, unique=True)
 
 
 class Geolocation(SQLModel, table=True):
     __tablename__ = "geolocation"
+    __table_args__ = (
+        # pattern ops so `geohash LIKE 'prefix%'` can use the index under any collation
+        Index("ix_geolocation_geohash", "geohash", postgresql_ops={"geohash": "varchar_pattern_ops"}),
+    )
 
 
     id: Optional[int] = Field(default=None, primary_key=True)
     name: Optional[str] = Field(default=None)
     latitude: float
     longitude: float
+    geohash: Optional[str] = Field(default=None, max_length=12)
     address_id: Optional[int] = Field(default=None, foreign_key="address.id", index=True)
     organization: Optional[int] = Field(default=None, foreign_key="organization.id", ondelete="CASCADE", index=True)
 
+
+@event.listens_for(Geolocation, "before_insert")
+@event.listens_for(Geolocation, "before_update")
+def set_geohash(mapper, connection, target: Geolocation):
+    if target.latitude is not None and target.longitude is not None:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from sqlmodel import SQLModel
+from typing import Optional
+from sqlmodel import Field, SQLModel
 
 
 class TimelineType(str, Enum):
@@ -56,4 +57,51 @@ class Filter(str, Enum):
 
 class UnitOfPerformance(str, Enum):
     quantity = "Quantity"
-    volume = "Volume"
\ No newline at end of file
+    volume = "Volume"
+
+
+class DailySalesSummary(SQLModel, table=True):
+    __tablename__ = "daily_sales_summary"
+
+    """
+    Represents the daily sales and order rollup the dashboard reads from.
+
+    One row per day, organization, territory, route and employee. Rows are rebuilt
+    from `Sale` and `Order` for a window of days by `refresh_sales_summary`, so
+    dashboard tiles aggregate this table instead of scanning the sales tables.
+
+    Attributes:
+        id (Optional[integer]): The unique identifier of the summary row (primary key).
+        day (date): The day the sales and orders were made.
+        organization (Optional[integer]): The organization of the point of sale.
+        territory (Optional[integer]): The territory of the sale's route, None for orders without a sale.
+        route (Optional[integer]): The route of the sale, None for orders without a sale.
+        employee (integer): The employee who made the sale or took the order.
+        sales (float): Total sales after discounts, void sales excluded.
+        gross_sales (float): Total sales before discounts.
+        quantity (float): Total quantity sold.
+        sales_count (integer): Number of sales.
+        cash (float): Sales made with the Cash sales type.
+        credit (float): Sales made with the Credit sales type.
+        presales (float): Sales that fulfilled a previously taken order.
+        orders (float): Total value of the orders taken.
+        order_quantity (float): Total quantity of the orders taken.
+        order_count (integer): Number of orders.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    day: date = Field(index=True)
+    organization: Optional[int] = Field(default=None, foreign_key="organization.id", ondelete="CASCADE", index=True)
+    territory: Optional[int] = Field(default=None, foreign_key="territory.id", index=True)
+    route: Optional[int] = Field(default=None, foreign_key="route.id", index=True)
+    employee: int = Field(foreign_key="users.id", index=True)
+    sales: float = Field(default=0)
+    gross_sales: float = Field(default=0)
+    quantity: float = Field(default=0)
+    sales_count: int = Field(default=0)
+    cash: float = Field(default=0)
+    credit: float = Field(default=0)
+    presales: float = Field(default=0)
+    orders: float = Field(default=0)
+    order_quantity: float = Field(default=0)
+    order_count: int = Field(default=0)
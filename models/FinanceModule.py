@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from pydantic import Base64Bytes, model_validator
+from pydantic import model_validator
 from sqlmodel import Relationship, SQLModel, Field
 from typing import List, Optional, Self
 
@@ -123,7 +123,7 @@ class Deposit(SQLModel, table=True):
     amount: float
     remark: Optional[str] = Field(default=None)
     approval_status: DepositStatus = Field(default=DepositStatus.Pending)
-    deposit_slip: Optional[Base64Bytes] = Field(default=None)
+    deposit_slip: Optional[str] = Field(default=None, max_length=64)
     transaction_number: Optional[str] = Field(default=None)
     organization: Optional[int] = Field(foreign_key="organization.id", ondelete="CASCADE", index=True)
     comment: Optional[str] =  Field(default=None)
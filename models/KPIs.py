@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from pydantic import model_validator
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, UniqueConstraint
 from typing import Optional, Self
 
 from models.Dashboard import TimelineType
@@ -56,6 +56,9 @@ class IndicatorType(str, Enum):
 
 class Measurement(SQLModel, table=True):
     __tablename__ = "measurement"
+    __table_args__ = (
+        UniqueConstraint("performance", "period", "indicator_type", name="uq_measurement_performance_period_indicator"),
+    )
 
     """
     Represents a measurement record for performance indicators.
@@ -71,6 +74,7 @@ class Measurement(SQLModel, table=True):
         target (float): The target value for the measurement.
         actual (float): The actual value achieved for the measurement.
         performance (integer): The ID of the associated performance record.
+        period (integer): The ID of the period the measurement was scored for.
         active (boolean): A flag indicating if the measurement record is currently active.
     """
 
@@ -80,6 +84,7 @@ class Measurement(SQLModel, table=True):
     target: float
     actual: float
     performance: int = Field(foreign_key="performance.id", index=True)
+    period: int = Field(foreign_key="period.id", index=True)
 
     @model_validator(mode="after")
     def check(self) -> Self:
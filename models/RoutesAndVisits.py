@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from pydantic import model_validator
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, UniqueConstraint
 from typing import Optional, Self
 
 class Territory(SQLModel, table=True):
@@ -68,6 +68,7 @@ class RoutePoint(SQLModel, table=True):
         route (integer): The ID of the route to which this point belongs.
         territory (Optional[integer]): The ID of the territory associated with this route point.
         organization (Optional[integer]): The ID of the organization associated with this route point.
+        sequence (Optional[integer]): The position of this point in the route's visiting order.
         active (boolean): A flag indicating whether the route point is currently active.
     """
 
@@ -77,6 +78,7 @@ class RoutePoint(SQLModel, table=True):
     territory: Optional[int] = Field(
         default=None, foreign_key="territory.id", index=True
     )
+    sequence: Optional[int] = Field(default=None)
 
 
 class RouteSchedule(SQLModel, table=True):
@@ -245,6 +247,66 @@ class Visit(SQLModel, table=True):
     visit_type: VisitType = Field(default=None)
 
 
+class TrackPoint(SQLModel, table=True):
+    __tablename__ = "track_point"
+    __table_args__ = {"postgresql_partition_by": "RANGE (recorded_at)"}
+
+    """
+    Represents one GPS breadcrumb recorded during a travel.
+
+    The table is append only and range partitioned by month on `recorded_at`, points
+    are bulk loaded with COPY by `ingest_track_points`, which also creates the monthly
+    partitions a batch needs.
+
+    Attributes:
+        travel (integer): The travel the point was recorded on (primary key).
+        recorded_at (datetime): When the point was recorded (primary key, partition key).
+        latitude (float): Latitude of the point.
+        longitude (float): Longitude of the point.
+        accuracy (Optional[float]): Reported horizontal accuracy in metres.
+    """
+
+    travel: int = Field(foreign_key="travel.id", primary_key=True)
+    recorded_at: datetime = Field(primary_key=True)
+    latitude: float
+    longitude: float
+    accuracy: Optional[float] = Field(default=None)
+
+
+class DailyCallCoverage(SQLModel, table=True):
+    __tablename__ = "daily_call_coverage"
+    __table_args__ = (
+        UniqueConstraint("day", "employee", "route", name="uq_daily_call_coverage_key"),
+    )
+
+    """
+    Represents the planned and completed calls of an employee on a route for a day.
+
+    Rows are rebuilt from `RouteSchedule`, `RoutePoint`, `Travel` and `Visit` for a window
+    of days by `refresh_call_coverage`, so coverage reports and call completion KPIs
+    never scan the raw visits.
+
+    Attributes:
+        id (Optional[integer]): The unique identifier of the coverage row (primary key).
+        day (date): The day of the schedule or travel.
+        employee (integer): The employee the route was scheduled for or who travelled it.
+        route (integer): The route.
+        planned (integer): Route points on the route for every schedule of the day.
+        completed (integer): Distinct route points of the route that were visited.
+        productive (integer): Distinct points of sale visited where a sale was made.
+        visits (integer): All visits made on the route, including points not on it.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    day: date = Field(index=True)
+    employee: int = Field(foreign_key="users.id", index=True)
+    route: int = Field(foreign_key="route.id", index=True)
+    planned: int = Field(default=0)
+    completed: int = Field(default=0)
+    productive: int = Field(default=0)
+    visits: int = Field(default=0)
+
+
 class RequestType(str, Enum):
     """
     Enum representing the type of request for inventory.
@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from pydantic import Base64Bytes, model_validator
+from sqlalchemy import Index, UniqueConstraint
 from sqlmodel import Relationship, SQLModel, Field
 from typing import List, Optional, Self
 
@@ -356,6 +357,7 @@ class Penetration(SQLModel, table=True):
         outlet (integer): Foreign key linking to the Outlet table.
         employee (integer): Foreign key linking to the Employee table.
         status (PenetrationStatus): Status of the penetration (default: new).
+        date (datetime): The date the penetration was registered. Indexed for period queries.
         outlet (Optional[Outlet]): Relationship to the Outlet details.
 
     """
@@ -371,6 +373,81 @@ class Penetration(SQLModel, table=True):
 
     employee: int = Field(foreign_key="users.id", index=True)
     status: PenetrationStatus = Field(default=PenetrationStatus.new)
+    date: datetime = Field(default_factory=datetime.now, index=True)
+
+
+class DedupeKey(SQLModel, table=True):
+    """
+    Blocking key of a penetration or outlet, see `utils.dedupe_util`. Only records sharing
+    a key are compared when looking for duplicates.
+
+    Attributes:
+        entity (str): "penetration" or "outlet".
+        record_id (integer): Id of the penetration or outlet.
+        organization (Optional[integer]): Organization owning the record, candidates are
+            limited to the same tenant.
+        kind (str): "phone", "tin" or "cell" (geohash of the location).
+        key (str): Normalized value.
+    """
+    __tablename__ = "dedupe_key"
+    __table_args__ = (
+        Index("ix_dedupe_key_lookup", "kind", "key", "organization"),
+        Index("ix_dedupe_key_record", "entity", "record_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: str
+    record_id: int
+    organization: Optional[int] = Field(default=None, foreign_key="organization.id", ondelete="CASCADE")
+    kind: str
+    key: str
+
+
+class DuplicateStatus(str, Enum):
+    """
+    Review state of a duplicate flag.
+
+    Members:
+        open: Flagged and awaiting review.
+        confirmed: The records are the same outlet.
+        dismissed: The records are different outlets, the pair is not flagged again.
+    """
+
+    open = "Open"
+    confirmed = "Confirmed"
+    dismissed = "Dismissed"
+
+
+class DuplicateFlag(SQLModel, table=True):
+    """
+    A penetration or outlet that is likely a duplicate of another one.
+
+    Attributes:
+        entity (str), record_id (integer): The later registered record.
+        duplicate_entity (str), duplicate_of (integer): The record it duplicates, an
+            outlet whenever one of the pair is.
+        score (float): Match score between 0 and 1.
+        reason (str): Blocking keys the pair shares, comma separated.
+        cluster (Optional[str]): "entity:id" of the original record of every flag in the
+            same group of duplicates, set by the nightly job.
+        status (DuplicateStatus): Review state (default: open).
+        date (datetime): When the pair was flagged.
+    """
+    __tablename__ = "duplicate_flag"
+    __table_args__ = (
+        UniqueConstraint("entity", "record_id", "duplicate_entity", "duplicate_of", name="uq_duplicate_flag_pair"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: str = Field(index=True)
+    record_id: int = Field(index=True)
+    duplicate_entity: str
+    duplicate_of: int = Field(index=True)
+    score: float
+    reason: str
+    cluster: Optional[str] = Field(default=None, index=True)
+    status: DuplicateStatus = Field(default=DuplicateStatus.open, index=True)
+    date: datetime = Field(default_factory=datetime.now, index=True)
 
 class InvoiceStates(str, Enum):
     """
@@ -11,4 +11,36 @@ class ErrorLog(SQLModel, table=True):
     endpoint: str
     request_data: Optional[str] = None
     error_message: str
-    stack_trace: Optional[str] = None
\ No newline at end of file
+    stack_trace: Optional[str] = None
+
+
+class EntityVersion(SQLModel, table=True):
+    """Change counter per table, bumped after every commit that writes to it."""
+    __tablename__ = "entity_version"
+
+    entity: str = Field(primary_key=True)
+    version: int = Field(default=0)
+
+
+class Blob(SQLModel, table=True):
+    """
+    Metadata of a content addressed file (image, deposit slip) kept by the blob store.
+
+    Rows that reference a blob (Product.image, Organization.logo_image, User.image,
+    Deposit.deposit_slip) hold its SHA-256 hex digest, the bytes live in the blob backend.
+    """
+    __tablename__ = "blob"
+
+    hash: str = Field(primary_key=True, max_length=64)
+    content_type: str = Field(default="application/octet-stream")
+    size: int
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class BlobUpload(SQLModel, table=True):
+    """A user who uploaded a blob, they may use it before any of their rows references it."""
+    __tablename__ = "blob_upload"
+
+    hash: str = Field(foreign_key="blob.hash", primary_key=True, max_length=64, ondelete="CASCADE")
+    user: int = Field(foreign_key="users.id", primary_key=True, ondelete="CASCADE")
+    created_at: datetime = Field(default_factory=datetime.now)
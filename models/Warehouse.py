@@ -1,7 +1,7 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, UniqueConstraint
 from enum import Enum   
 from typing import Optional, List
-from datetime import  datetime
+from datetime import  datetime, date
 
 class AccessPolicy(str, Enum):
     deny = "deny"
@@ -21,6 +21,7 @@ class LogType(str, Enum):
    stock_in = "Stock In"
    stock_out = "Stock Out"
    transfer = "Transfer"
+   transfer_in = "Transfer In"
    return_defect = "Return Defect"
    return_normal = "Return Normal"
 
@@ -32,6 +33,8 @@ class RequestStatus(str, Enum):
    pending = "Pending"
    approved = "Approved"
    rejected = "Rejected"
+   in_transit = "In Transit"
+   received = "Received"
 
 class WarehouseGroupLink(SQLModel, table=True):
     __tablename__ = "warehouse_group_link"
@@ -68,7 +71,11 @@ class Warehouse(SQLModel, table=True):
     warehouse_groups: List["WarehouseGroup"] = Relationship(back_populates="warehouses", link_model=WarehouseGroupLink)
     stocks: Optional[List["Stock"]] = Relationship(back_populates="warehouse")
     stock_logs: Optional[List["StockLog"]] = Relationship(back_populates="warehouse")
-    warehouse_stops: Optional[List["WarehouseStop"]] = Relationship(back_populates="warehouse")
+    warehouse_stops: Optional[List["WarehouseStop"]] = Relationship(
+        back_populates="warehouse",
+        sa_relationship_kwargs={"foreign_keys": "[WarehouseStop.warehouse_id]"}
+    )
+    stock_reservations: Optional[List["StockReservation"]] = Relationship(back_populates="warehouse")
     # organization: Optional["Organization"] = Relationship(back_populates="warehouses")
 
 
@@ -101,6 +108,35 @@ class StockLog(SQLModel, table=True):
     warehouse: Optional[Warehouse] = Relationship(back_populates="stock_logs")
     product: Optional["Product"] = Relationship(back_populates="stock_log")
 
+class StockReservation(SQLModel, table=True):
+    __tablename__ = "stock_reservation"
+    __table_args__ = (
+        UniqueConstraint("warehouse_id", "product_id", "stock_type", name="uq_stock_reservation_warehouse_product_type"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    warehouse_id: int = Field(foreign_key="warehouse.id", index=True, ondelete="CASCADE")
+    product_id: int = Field(foreign_key="product.id", index=True, ondelete="CASCADE")
+    stock_type: StockType = Field(default=StockType.regular)
+    requested: int = Field(default=0)
+    reserved: int = Field(default=0)
+    warehouse: Optional[Warehouse] = Relationship(back_populates="stock_reservations")
+
+class DailyStockMovement(SQLModel, table=True):
+    __tablename__ = "daily_stock_movement"
+    __table_args__ = (
+        UniqueConstraint("day", "warehouse_id", "product_id", "stock_type", "log_type", name="uq_daily_stock_movement_key"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    day: date = Field(index=True)
+    warehouse_id: int = Field(foreign_key="warehouse.id", index=True, ondelete="CASCADE")
+    product_id: int = Field(foreign_key="product.id", index=True, ondelete="CASCADE")
+    stock_type: StockType = Field(default=StockType.regular)
+    log_type: LogType = Field(default=LogType.stock_in)
+    quantity: int = Field(default=0)
+    movements: int = Field(default=0)
+
 class Vehicle(SQLModel, table=True):
     __tablename__ = "vehicle"
     id: int = Field(primary_key=True)
@@ -125,16 +161,25 @@ class WarehouseStop(SQLModel, table=True):
     request_status: RequestStatus = Field(default=RequestStatus.pending)
     request_date: Optional[datetime] = Field(default=None)
     warehouse_id: int = Field(foreign_key="warehouse.id")
+    destination_warehouse_id: Optional[int] = Field(foreign_key="warehouse.id", default=None, index=True)
     approver_id: Optional[int] = Field(foreign_key="users.id", default=None)
     approve_date: Optional[datetime] = Field(default=None)
     confirmed: Optional[bool] = Field(default=False)
     confirm_date: Optional[datetime] = Field(default=None)
+    receiver_id: Optional[int] = Field(foreign_key="users.id", default=None)
+    receive_date: Optional[datetime] = Field(default=None)
     vehicle_id: Optional[int]= Field(foreign_key="vehicle.id")
     product_id: Optional[int]= Field(foreign_key="product.id")
     stock_type: StockType = Field(default=StockType.regular)
     quantity: int = Field(default=1)
     vehicle: Optional["Vehicle"] = Relationship(back_populates="warehouse_stops")
-    warehouse: Optional[Warehouse] = Relationship(back_populates="warehouse_stops")
+    warehouse: Optional[Warehouse] = Relationship(
+        back_populates="warehouse_stops",
+        sa_relationship_kwargs={"foreign_keys": "[WarehouseStop.warehouse_id]"}
+    )
+    destination_warehouse: Optional[Warehouse] = Relationship(
+        sa_relationship_kwargs={"foreign_keys": "[WarehouseStop.destination_warehouse_id]"}
+    )
     # requester: Optional["User"] = Relationship(
     #     sa_relationship_kwargs={"foreign_keys": "[WarehouseStop.requester_id]"},
     #     back_populates="requester_warehouse_stops"
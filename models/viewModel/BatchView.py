@@ -0,0 +1,24 @@
+from typing import Any, Dict, List, Optional, Union
+from pydantic import BaseModel, Field, field_validator
+
+from utils.batch_util import BATCH_SIZE_MAX
+
+
+class BatchSubRequest(BaseModel):
+    id: Optional[Union[str, int]] = None
+    path: str
+    query: Optional[Dict[str, Any]] = None
+
+    @field_validator("path")
+    @classmethod
+    def check_path(cls, path: str) -> str:
+        if not path.startswith("/") or "?" in path:
+            raise ValueError("path must be absolute and without a query string, use query")
+        if path.rstrip("/") == "/batch":
+            raise ValueError("batches can not be nested")
+        return path
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(min_length=1, max_length=BATCH_SIZE_MAX)
+    parallel: bool = True
@@ -37,7 +37,7 @@ class DepositView(BaseModel):
     date: datetime
     organization: Optional[int]   
     transaction_number: Optional[str] 
-    deposit_slip: Optional[bytes]
+    deposit_slip: Optional[str]
 
     
 class UpdateDepositView(BaseModel):
@@ -51,7 +51,7 @@ class UpdateDepositView(BaseModel):
     date: datetime
     organization: Optional[int] 
     transaction_number: Optional[str]   
-    deposit_slip: Optional[bytes]
+    deposit_slip: Optional[str]
 
 class InvoiceView(BaseModel):
     number: int
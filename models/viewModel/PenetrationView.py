@@ -1,6 +1,6 @@
-from typing import Optional, Annotated, Self
+from typing import Literal, Optional, Annotated, Self
 from datetime import datetime
-from pydantic import BaseModel, AfterValidator, model_validator
+from pydantic import BaseModel, AfterValidator, Field, model_validator
 from enum import Enum
 from models.SalesAndTransactions import PenetrationStatus
 from utils.util_functions import validate_email, validate_name, validate_phone_number
@@ -30,3 +30,14 @@ class PenetrationCreation(BaseModel):
                 raise ValueError("TIN must start with 00")
 
         return self
+
+
+class DuplicateCheck(BaseModel):
+    """A penetration or outlet about to be registered, checked for duplicates before saving."""
+    entity: Literal["penetration", "outlet"] = "penetration"
+    name: str
+    company_name: Optional[str] = None
+    tin: Optional[str] = None
+    phone: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
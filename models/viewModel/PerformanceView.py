@@ -13,6 +13,7 @@ class  MeasurementCreation(BaseModel):
     target: float | int
     actual: float | int
     performance: int
+    period: int
 
 class PerformanceCreation(BaseModel):
     employee: int
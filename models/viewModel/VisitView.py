@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from typing import Annotated
 from pydantic import Field
 from sqlmodel import SQLModel
@@ -33,4 +33,20 @@ class VisitCreate(BaseModel):
     sales: Optional[int] = None
     point_of_sale: int
     visit_data: Optional[int] = None
-    visit_type: VisitType
\ No newline at end of file
+    visit_type: VisitType
+
+class TrackUpload(BaseModel):
+    """
+    A batch of GPS points in columnar, delta encoded form.
+
+    `t` holds millisecond offsets from `start_time`, `lat` and `lon` hold coordinates
+    multiplied by `scale` and rounded. Each list stores its first value followed by the
+    differences between consecutive values.
+    """
+    travel: int
+    start_time: datetime
+    scale: int = 1_000_000
+    t: List[int]
+    lat: List[int]
+    lon: List[int]
+    accuracy: Optional[List[float]] = None
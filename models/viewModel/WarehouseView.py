@@ -52,3 +52,16 @@ class WarehouseStop(BaseModel):
     quantity: int 
     warehouse: int
 
+class WarehouseStopBulkAction(BaseModel):
+    ids: List[int]
+
+class WarehouseTransferItem(BaseModel):
+    product: int
+    stock_type: str
+    quantity: int
+
+class WarehouseTransfer(BaseModel):
+    warehouse: int
+    destination_warehouse: int
+    vehicle: Optional[int] = None
+    items: List[WarehouseTransferItem]
@@ -2,7 +2,7 @@ from typing import Annotated, List, Dict, Any, Optional, Union
 from datetime import timedelta
 from db import SECRET_KEY, get_session
 from sqlmodel import Session, select
-from fastapi import APIRouter, HTTPException, Body, status, Depends
+from fastapi import APIRouter, HTTPException, Body, UploadFile, status, Depends
 from db import get_session
 from utils.model_converter_util import get_html_types
 from models.Account import User, ScopeGroup,ScopeGroupLink 
@@ -11,7 +11,9 @@ from models.viewModel.AccountsView import UserAccountView as TemplateView, Updat
 from models.Account import User, ScopeGroup, ScopeGroupLink, Organization, Gender, Scope, Role, AccessPolicy, IdType
 from utils.util_functions import validate_name, validate_email, validate_phone_number, parse_datetime_field, format_date_for_input, parse_enum
 from utils.auth_util import get_current_user, check_permission, check_permission_and_scope, add_organization_path, verify_password, get_password_hash, create_access_token, generate_random_password, extract_username
+from utils.pagination_util import Page, paginate
 import copy
+from utils.import_util import USER_COLUMNS, USER_OPTIONAL_COLUMNS, import_users, read_import_file
 from utils.get_hierarchy import get_organization_ids_by_scope_group
 from utils.form_db_fetch import fetch_user_id_and_name, fetch_organization_id_and_name, fetch_role_id_and_name, fetch_scope_group_id_and_name, fetch_address_id_and_name
 import traceback
@@ -31,6 +33,7 @@ endpoint = {
     "get_by_id": f"/get-{endpoint_name}",
     "get_form": f"/{endpoint_name}-form/",
     "create": f"/create-{endpoint_name}",
+    "import": f"/import-{endpoint_name}s",
     "update": f"/update-{endpoint_name}",
     "delete": f"/delete-{endpoint_name}",
 }
@@ -38,10 +41,13 @@ role_modules = {
     "read": ["Administrative"],
     "get_form": ["Administrative"],
     "create": ["Service Provider", "Administrative"],
+    "import": ["Service Provider", "Administrative"],
     "update": ["Administrative", "Service Provider"],
     "delete": ["Administrative"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"username": User.username}, filters={"organization": User.organization, "role": User.role, "scope": User.scope, "scope_group": User.scope_group}))]
+
 #Authentication Related
 @ar.post("/login/")
 def login(
@@ -133,6 +139,7 @@ async def get_my_user(
 def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str
 
 ):
@@ -150,9 +157,10 @@ def get_template(
             current_tenant = session.exec(select(Organization).where(Organization.tenant_hashed == tenant)).first()
         
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
-        entries_list = session.exec(
+        entries_list = page.fetch(
+            session,
             select(db_model).where(db_model.organization.in_(organization_ids), db_model.organization == current_tenant.id)
-        ).all()
+        )
         
         if not entries_list:
             raise HTTPException(status_code=404, detail="No User found")
@@ -373,6 +381,56 @@ def create_template(
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@ar.post(endpoint['import'])
+def import_accounts(
+    session: SessionDep,
+    tenant: str,
+    current_user: UserDep,
+    file: UploadFile,
+    dry_run: bool = False,
+):
+    """
+    Registers users from a CSV / XLSX / JSON file in one transaction.
+
+    Roles, scope groups and organizations are given by name, passwords are generated and
+    returned once per created user like create-account, invalid rows are reported by row
+    number, see `utils.import_util`. dry_run only validates.
+    """
+    try:
+        if not check_permission(
+            session, "Create", role_modules['import'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+        if tenant == "provider":
+            current_tenant = session.exec(select(Organization).where(Organization.id == current_user.organization)).first()
+        else :
+            current_tenant = session.exec(select(Organization).where(Organization.tenant_hashed == tenant)).first()
+        if not current_tenant:
+            raise HTTPException(status_code=404, detail="Tenant organization not found")
+
+        try:
+            frame = read_import_file(file, USER_COLUMNS, USER_OPTIONAL_COLUMNS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        report = import_users(session, frame, current_user, current_tenant, tenant == "provider", dry_run)
+        if dry_run:
+            session.rollback()
+        else:
+            session.commit()
+
+        report["domain"] = f"{Domain}/signin" if tenant == "provider" else f"{Domain}/{tenant}/signin"
+        return report
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
  
     
 @ar.put(endpoint['update'])
@@ -1,16 +1,18 @@
 import traceback
-from fastapi import Depends, HTTPException, Body, APIRouter
+from fastapi import Depends, HTTPException, Body, APIRouter, Request, Response
 from typing import Annotated, Optional
 from fastapi.routing import APIRouter
 from sqlmodel import and_, select, Session
 from db import get_session
 from models.Address import Address, Geolocation
 from models.Utils import ErrorLog
-from utils.address_util import check_address
+from utils.address_util import check_address, repoint_address
 from utils.auth_util import get_current_user
+from utils.pagination_util import Page, paginate
 from models.viewModel.AddressView import AddressView as TemplateView
 from utils.model_converter_util import get_html_types
 from utils.auth_util import check_permission, check_permission_and_scope
+from utils.lookup_cache import get_lookup_etag, etag_matches
 from utils.form_db_fetch import get_organization_ids_by_scope_group, fetch_organization_id_and_name
 from models.Account import Organization
 
@@ -39,11 +41,14 @@ role_modules = {
     "delete": ["Administrative", "Address"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"country": Address.country, "city": Address.city, "sub_city": Address.sub_city, "woreda": Address.woreda}, filters={"country": Address.country, "city": Address.city, "sub_city": Address.sub_city, "woreda": Address.woreda, "organization": Address.organization}))]
+
 
 @ar.get(endpoint['get'])
 async def get_addresses(
     session: SessionDep, 
     current_user: UserDep, 
+    page: PageDep,
     tenant: str
 ):
     """
@@ -66,9 +71,10 @@ async def get_addresses(
 
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
-        entries_list = session.exec(
+        entries_list = page.fetch(
+            session,
             select(db_model).where(db_model.organization.in_(organization_ids))
-        ).all()
+        )
 
         if not entries_list:
             raise HTTPException(status_code=404, detail="Address not found")
@@ -135,7 +141,9 @@ async def get_address_by_id(
 async def get_form_fields_address(
     session: SessionDep,
     current_user: UserDep,
-    tenant: str
+    tenant: str,
+    request: Request,
+    response: Response,
 ):
     try:
         if not check_permission(
@@ -144,6 +152,11 @@ async def get_form_fields_address(
             raise HTTPException(
                 status_code=403, detail="You Do not have the required privilege"
             ) 
+        etag = get_lookup_etag(session, current_user, fetch_organization_id_and_name)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
         address = {
             "id": None,
             "country":"Ethiopia",
@@ -190,11 +203,8 @@ async def create_template(
 
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
-        # Create a new category entry from validated input
-        new_entry = db_model.model_validate(valid)
-        session.add(new_entry)
-        session.commit()
-        session.refresh(new_entry)
+        # Returns the existing entry when the same address was already added
+        new_entry = check_address(session, db_model.model_validate(valid))
 
         return new_entry
 
@@ -222,24 +232,28 @@ async def update_address(
             raise HTTPException(
                 status_code=403, detail="You Do not have the required privilege"
             )
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
         selected_entry = session.exec(
-            select(db_model).where( db_model.id == valid.id)
+            select(db_model).where(db_model.id == valid.id, db_model.organization.in_(organization_ids))
         ).first()
 
         if not selected_entry:
             raise HTTPException(status_code=404, detail=f"{endpoint_name} not found")
-       
-        # Update only if values are provided (this is safe since you use Body(...))
-        selected_entry.country = valid.country
-        selected_entry.city = valid.city
-        selected_entry.sub_city = valid.sub_city
-        selected_entry.woreda = valid.woreda
-
-        session.add(selected_entry)
-        session.commit()
-        session.refresh(selected_entry)
 
-        return {"message": f"{endpoint_name} Updated successfully"}
+        # The row is shared by every entity with the same address, resolve the edited
+        # address to its own row and move this scope's references to it instead.
+        updated_entry = check_address(session, db_model(
+            country=valid.country,
+            city=valid.city,
+            sub_city=valid.sub_city,
+            woreda=valid.woreda,
+            organization=selected_entry.organization,
+        ))
+        if updated_entry.id != selected_entry.id:
+            repoint_address(session, selected_entry.id, updated_entry.id, organization_ids)
+            session.commit()
+
+        return {"message": f"{endpoint_name} Updated successfully", "id": updated_entry.id}
 
     except HTTPException as http_exc:
         raise http_exc
@@ -0,0 +1,55 @@
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlmodel import Session
+import traceback
+from db import engine, get_session
+from models.viewModel.BatchView import BatchRequest
+from utils.auth_util import get_current_user
+from utils.batch_util import BATCH_WORKERS, BatchContext, run_batch
+
+BatchRouter = br = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint = {
+    "batch": "/batch",
+}
+
+
+@br.post(endpoint['batch'])
+async def batch(
+    request: Request,
+    session: SessionDep,
+    current_user: UserDep,
+    valid: BatchRequest,
+):
+    """
+    Answers several GET requests at once, authenticated once with the batch's token.
+
+    Each result is {"id", "status", "headers", "body"} in request order, a failing
+    sub-request only fails its own entry. Sub-requests are independent and run
+    concurrently unless parallel is false, then in order on one session.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    workers = min(BATCH_WORKERS, len(valid.requests)) if valid.parallel else 1
+    sessions = [session] + [Session(engine) for _ in range(workers - 1)]
+    try:
+        body = await run_batch(
+            request.app,
+            request.scope,
+            [sub_request.model_dump() for sub_request in valid.requests],
+            BatchContext(current_user),
+            sessions,
+        )
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+    finally:
+        for worker_session in sessions[1:]:
+            worker_session.close()
@@ -0,0 +1,146 @@
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from PIL import UnidentifiedImageError
+from sqlmodel import Session
+import traceback
+from db import get_session
+from models.Utils import Blob
+from utils.auth_util import get_current_user
+from utils.blob_util import BlobWriter, get_blob_backend, get_blob_url, is_blob_digest, is_blob_in_scope, parse_range
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.lookup_cache import etag_matches
+from utils.thumbnail_util import THUMBNAIL_SIZES, ensure_thumbnail
+
+BlobRouter = br = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint_name = "blob"
+
+endpoint = {
+    "get": f"/get-{endpoint_name}",
+    "get_thumbnail": "/get-thumbnail",
+    "upload": f"/upload-{endpoint_name}",
+}
+
+# Content addressed, the bytes behind a URL never change.
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Raster types `BlobWriter.save` takes from the bytes, anything else is downloaded, never rendered.
+INLINE_CONTENT_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+
+
+@br.post(endpoint['upload'])
+async def upload_blob(
+    session: SessionDep,
+    current_user: UserDep,
+    request: Request,
+):
+    """
+    Stores the raw request body as a blob, the Content-Type header is kept with it unless
+    it claims an image the bytes are not (see `BlobWriter.save`).
+
+    Returns the digest to save in image / deposit slip fields and its download URL.
+    """
+    writer = BlobWriter()
+    try:
+        async for chunk in request.stream():
+            writer.write(chunk)
+
+        content_type = request.headers.get("content-type")
+        digest = writer.save(session, content_type.split(";")[0] if content_type else None, current_user.id)
+        session.commit()
+
+        return {"hash": digest, "url": get_blob_url(digest), "size": writer.size}
+
+    except ValueError as e:
+        writer.abort()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        writer.abort()
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@br.get(endpoint['get'] + "/{digest}")
+def get_blob(
+    session: SessionDep,
+    current_user: UserDep,
+    request: Request,
+    digest: str,
+):
+    """
+    Streams a blob referenced by a row in the user's scope, honouring a single
+    `Range: bytes=` request with 206.
+    """
+    try:
+        blob = session.get(Blob, digest) if is_blob_digest(digest) else None
+        backend = get_blob_backend()
+        if not blob or not backend.exists(digest) or not is_blob_in_scope(
+            session, digest, get_organization_ids_by_scope_group(session, current_user), current_user
+        ):
+            raise HTTPException(status_code=404, detail="Blob not found")
+
+        etag = f'"{digest}"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes", "X-Content-Type-Options": "nosniff"}
+        if blob.content_type not in INLINE_CONTENT_TYPES:
+            headers["Content-Disposition"] = "attachment"
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        try:
+            byte_range = parse_range(request.headers.get("range"), blob.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{blob.size}"})
+
+        if byte_range is None:
+            headers["Content-Length"] = str(blob.size)
+            return StreamingResponse(backend.read(digest), media_type=blob.content_type, headers=headers)
+
+        start, end = byte_range
+        headers["Content-Length"] = str(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+        return StreamingResponse(
+            backend.read(digest, start, end), status_code=206, media_type=blob.content_type, headers=headers
+        )
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@br.get(endpoint['get_thumbnail'] + "/{digest}/{size}")
+def get_thumbnail(
+    session: SessionDep,
+    current_user: UserDep,
+    request: Request,
+    digest: str,
+    size: str,
+):
+    """WebP thumbnail of an image blob, `size` is one of THUMBNAIL_SIZES."""
+    try:
+        blob = session.get(Blob, digest) if is_blob_digest(digest) and size in THUMBNAIL_SIZES else None
+        backend = get_blob_backend()
+        if not blob or not blob.content_type.startswith("image/") or not backend.exists(digest) or not is_blob_in_scope(
+            session, digest, get_organization_ids_by_scope_group(session, current_user), current_user
+        ):
+            raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+        etag = f'"{digest}-{size}"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Content-Type-Options": "nosniff"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        try:
+            path = ensure_thumbnail(backend.root, backend.path(digest), digest, size)
+        except UnidentifiedImageError:
+            raise HTTPException(status_code=415, detail="Blob is not a supported image")
+        return FileResponse(path, media_type="image/webp", headers=headers)
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
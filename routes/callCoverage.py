@@ -0,0 +1,99 @@
+from typing import Annotated, Optional
+from datetime import date
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import func
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.RoutesAndVisits import DailyCallCoverage, Route
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.util_functions import parse_datetime_field
+
+CallCoverageRouter = cr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint_name = "call-coverage"
+db_model = DailyCallCoverage
+
+endpoint = {
+    "get": f"/get-{endpoint_name}s",
+}
+
+role_modules = {   
+    "get": ["Route", "Route Schedule"],
+}
+
+
+def percentage(part: float, whole: float) -> float:
+    return round(part / whole * 100, 2) if whole else 0
+
+
+@cr.get(endpoint['get'])
+def get_template(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    employee: Optional[int] = None,
+    route: Optional[int] = None,
+):
+    """
+    Planned, completed and productive calls per employee and route, month to date by default.
+    """
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+        start = parse_datetime_field(start_date)
+        end = parse_datetime_field(end_date)
+        start = start.date() if start else date.today().replace(day=1)
+        end = end.date() if end else date.today()
+
+        statement = (
+            select(
+                db_model.employee,
+                db_model.route,
+                Route.name,
+                func.sum(db_model.planned),
+                func.sum(db_model.completed),
+                func.sum(db_model.productive),
+                func.sum(db_model.visits),
+            )
+            .join(Route, Route.id == db_model.route)
+            .where(Route.organization.in_(organization_ids))
+            .where(db_model.day >= start, db_model.day <= end)
+            .group_by(db_model.employee, db_model.route, Route.name)
+            .order_by(db_model.employee, Route.name)
+        )
+        if employee:
+            statement = statement.where(db_model.employee == employee)
+        if route:
+            statement = statement.where(db_model.route == route)
+
+        return [
+            {
+                "employee": row[0],
+                "route_id": row[1],
+                "route": row[2],
+                "planned": row[3],
+                "completed": row[4],
+                "productive": row[5],
+                "visits": row[6],
+                "completion": percentage(row[4], row[3]),
+                "productivity": percentage(row[5], row[4]),
+            }
+            for row in session.exec(statement).all()
+        ]
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
@@ -1,15 +1,19 @@
 from typing import Annotated, List, Dict, Any, Optional, Union
 from db import SECRET_KEY, get_session
-from sqlmodel import Session, select
-from fastapi import APIRouter, HTTPException, Body, status, Depends
+from sqlmodel import Session, or_, select
+from fastapi import APIRouter, HTTPException, Body, Request, Response, UploadFile, status, Depends
 from db import get_session
 from utils.model_converter_util import get_html_types
-from models.Product_Category import Category, InheritanceGroup
+from models.Product_Category import Category, CategoryLink
 from models.Account import Organization, ScopeGroup
 from models.viewModel.ProductCategoryView import CategoryView as TemplateView, UpdateCategoryView as UpdateTemplateView
 from utils.auth_util import get_current_user, check_permission, check_permission_and_scope
+from utils.pagination_util import Page, paginate
 from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.lookup_cache import get_lookup_etag, etag_matches
+from utils.conditional_util import conditional_get
 from utils.form_db_fetch import fetch_category_id_and_name, fetch_organization_id_and_name, fetch_id_and_name
+from utils.import_util import CATEGORY_COLUMNS, CATEGORY_OPTIONAL_COLUMNS, import_categories, read_import_file
 import traceback
 
 CategoryRouter = c = APIRouter()
@@ -23,6 +27,7 @@ endpoint = {
     "get_by_id": f"/get-{endpoint_name}",
     "get_form": f"/{endpoint_name}-form/",
     "create": f"/create-{endpoint_name}",
+    "import": "/import-categories",
     "update": f"/update-{endpoint_name}",
     "delete": f"/delete-{endpoint_name}",
 }
@@ -31,14 +36,18 @@ role_modules = {
     "get": ["Administrative", "Category"],
     "get_form": ["Administrative", "Category"],
     "create": ["Administrative", "Category"],
+    "import": ["Administrative", "Category"],
     "update": ["Administrative", "Category"],
     "delete": ["Administrative", "Category"],
 }
 
-@c.get(endpoint['get'])
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"name": Category.name, "code": Category.code}, filters={"parent_category": Category.parent_category, "organization": Category.organization}))]
+
+@c.get(endpoint['get'], dependencies=[Depends(conditional_get("category", "organization", "inheritance_group", "category_link", modules=role_modules['get']))])
 def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str
 
 ):
@@ -53,16 +62,6 @@ def get_template(
             select(Organization.inheritance_group).where(Organization.id == current_user.organization)
         ).first()
         
-        inherited_group = session.exec(
-            select(InheritanceGroup).where(InheritanceGroup.id == inherited_group_id)
-        ).first()
-
-        if inherited_group:
-            inherited_categories = inherited_group.categories
-
-        else:
-            inherited_categories = []
-        
         # organization_ids = get_organization_ids_by_scope_group(session, current_user)
         scope_group = session.exec(select(ScopeGroup).where(ScopeGroup.id == current_user.scope_group)).first()
    
@@ -71,12 +70,12 @@ def get_template(
         if scope_group == None:
             existing_orgs= []
 
-        organization_categories = session.exec(
-            select(Category).where(Category.organization.in_(existing_orgs))
-        ).all()
-        # categories = organization_group.categories
-
-        organization_categories.extend(inherited_categories)
+        # The organizations' own categories and those shared through its inheritance group.
+        inherited_categories = select(CategoryLink.category_id).where(CategoryLink.inheritance_group_id == inherited_group_id)
+        organization_categories = page.fetch(
+            session,
+            select(Category).where(or_(Category.organization.in_(existing_orgs), Category.id.in_(inherited_categories)))
+        )
 
         category_list = []
         for category in organization_categories:
@@ -147,6 +146,8 @@ def get_template_form(
     tenant: str,
     session: SessionDep,
     current_user: UserDep,
+    request: Request,
+    response: Response,
 ) :
     try:
         if not check_permission(
@@ -155,6 +156,11 @@ def get_template_form(
             raise HTTPException(
                 status_code=403, detail="You Do not have the required privilege"
             )   
+        etag = get_lookup_etag(session, current_user, fetch_category_id_and_name, fetch_organization_id_and_name)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
         form_structure = {
             "id": "",
             "name": "",
@@ -211,6 +217,53 @@ def create_template(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Something went wrong")
  
+@c.post(endpoint['import'])
+def import_category_sheet(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    file: UploadFile,
+    organization: Optional[int] = None,
+    dry_run: bool = False,
+):
+    """
+    Creates categories from a CSV / XLSX sheet in one transaction.
+
+    Valid rows are created, the rest are reported by row number, see `utils.import_util`.
+    `organization` defaults to the user's own, dry_run only validates.
+    """
+    try:
+        if not check_permission(
+            session, "Create", role_modules['import'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+        organization = organization or current_user.organization
+        if organization not in organization_ids:
+            raise HTTPException(status_code=400, detail="Organization is not in your scope")
+
+        try:
+            frame = read_import_file(file, CATEGORY_COLUMNS, CATEGORY_OPTIONAL_COLUMNS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        report = import_categories(session, frame, organization, organization_ids, dry_run)
+        if dry_run:
+            session.rollback()
+        else:
+            session.commit()
+
+        return report
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
 @c.put(endpoint['update'])
 def update_template(
     session: SessionDep, 
@@ -0,0 +1,349 @@
+from typing import Annotated, List, Optional
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import func
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.Dashboard import (
+    CashVSCredit, DailySalesSummary, Filter, OrderSales, PresalesContribution,
+    SalesVSTarget, TimelineType, UnitOfPerformance, Volume, YearToDate,
+)
+from models.KPIs import Period, SalesVolumeTarget
+from models.Product_Category import Product
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group, get_organization_subtree_ids
+from utils.util_functions import parse_enum, parse_datetime_field
+from utils.dashboard_util import filter_sales_summary, timeline_to_date_trunc
+
+DashboardRouter = dr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+db_model = DailySalesSummary
+
+endpoint = {
+    "volume": "/get-volume",
+    "cash_vs_credit": "/get-cash-vs-credit",
+    "sales_vs_target": "/get-sales-vs-target",
+    "year_to_date": "/get-year-to-date",
+    "order_sales": "/get-order-sales",
+    "presales_contribution": "/get-presales-contribution",
+}
+
+role_modules = {   
+    "get": ["Dashboard"],
+}
+
+period_format = {
+    TimelineType.daily: "%Y-%m-%d",
+    TimelineType.weekly: "%Y-%m-%d",
+    TimelineType.monthly: "%Y-%m",
+    TimelineType.yearly: "%Y",
+}
+
+
+def get_dashboard_organizations(session: Session, current_user, organization: Optional[int]) -> List[int]:
+    organization_ids = get_organization_ids_by_scope_group(session, current_user)
+    if not organization:
+        return organization_ids
+
+    subtree = set(get_organization_subtree_ids(session, organization))
+    return [organization_id for organization_id in organization_ids if organization_id in subtree]
+
+
+def get_unit(unit: Optional[str]) -> UnitOfPerformance:
+    return parse_enum(UnitOfPerformance, unit, "Unit") or UnitOfPerformance.volume
+
+
+def get_measure(unit: Optional[str]):
+    return db_model.quantity if get_unit(unit) == UnitOfPerformance.quantity else db_model.sales
+
+
+def get_target_measure(unit: Optional[str]):
+    """Sales volume targets are quantities, by volume they are valued at the product's price."""
+    if get_unit(unit) == UnitOfPerformance.quantity:
+        return SalesVolumeTarget.target
+    return SalesVolumeTarget.target * func.coalesce(Product.price, 0)
+
+
+def check_dashboard_permission(session: Session, current_user):
+    if not check_permission(
+        session, "Read", role_modules['get'], current_user
+        ):
+        raise HTTPException(
+            status_code=403, detail="You Do not have the required privilege"
+        )
+
+
+def percentage(part: float, whole: float) -> float:
+    return round(part / whole * 100, 2) if whole else 0
+
+
+@dr.get(endpoint['volume'], response_model=List[Volume])
+def get_volume(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    timeline: Optional[str] = None,
+    unit: Optional[str] = None,
+    organization: Optional[int] = None,
+    filter: Optional[str] = None,
+    filter_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    try:
+        check_dashboard_permission(session, current_user)
+
+        timeline_type = parse_enum(TimelineType, timeline, "Timeline") or TimelineType.monthly
+        period = func.date_trunc(timeline_to_date_trunc[timeline_type], db_model.day).label("period")
+
+        statement = select(period, func.sum(get_measure(unit))).group_by(period).order_by(period)
+        statement = filter_sales_summary(
+            statement,
+            get_dashboard_organizations(session, current_user, organization),
+            parse_enum(Filter, filter, "Filter"),
+            filter_id,
+            parse_datetime_field(start_date),
+            parse_datetime_field(end_date),
+        )
+
+        return [
+            Volume(period=row[0].strftime(period_format[timeline_type]), volume=row[1] or 0)
+            for row in session.exec(statement).all()
+        ]
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@dr.get(endpoint['cash_vs_credit'], response_model=CashVSCredit)
+def get_cash_vs_credit(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    organization: Optional[int] = None,
+    filter: Optional[str] = None,
+    filter_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    try:
+        check_dashboard_permission(session, current_user)
+
+        statement = filter_sales_summary(
+            select(func.sum(db_model.cash), func.sum(db_model.credit)),
+            get_dashboard_organizations(session, current_user, organization),
+            parse_enum(Filter, filter, "Filter"),
+            filter_id,
+            parse_datetime_field(start_date),
+            parse_datetime_field(end_date),
+        )
+        cash, credit = session.exec(statement).one()
+        cash, credit = cash or 0, credit or 0
+        total = cash + credit
+
+        return CashVSCredit(
+            cashRatio=round(cash / total, 4) if total else 0,
+            creditRatio=round(credit / total, 4) if total else 0,
+            cashPercentage=percentage(cash, total),
+            creditPercentage=percentage(credit, total),
+            cash=cash,
+            credit=credit,
+        )
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@dr.get(endpoint['sales_vs_target'], response_model=List[SalesVSTarget])
+def get_sales_vs_target(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    timeline: Optional[str] = None,
+    unit: Optional[str] = None,
+    organization: Optional[int] = None,
+    filter: Optional[str] = None,
+    filter_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    """
+    Sales per period against the sales volume targets of the periods starting in it.
+
+    Targets are set per product and employee, so the territory/route filter only
+    narrows the sales side. They are quantities, by volume they are valued at the
+    product's list price.
+    """
+    try:
+        check_dashboard_permission(session, current_user)
+
+        organization_ids = get_dashboard_organizations(session, current_user, organization)
+        timeline_type = parse_enum(TimelineType, timeline, "Timeline") or TimelineType.monthly
+        trunc = timeline_to_date_trunc[timeline_type]
+        start = parse_datetime_field(start_date)
+        end = parse_datetime_field(end_date)
+
+        period = func.date_trunc(trunc, db_model.day).label("period")
+        sales_statement = filter_sales_summary(
+            select(period, func.sum(get_measure(unit))).group_by(period),
+            organization_ids,
+            parse_enum(Filter, filter, "Filter"),
+            filter_id,
+            start,
+            end,
+        )
+        sales = {row[0].date(): row[1] or 0 for row in session.exec(sales_statement).all()}
+
+        target_period = func.date_trunc(trunc, Period.start).label("period")
+        target_statement = (
+            select(target_period, func.sum(get_target_measure(unit)))
+            .join(Period, Period.id == SalesVolumeTarget.period)
+            .join(Product, Product.id == SalesVolumeTarget.product)
+            .where(Period.organization.in_(organization_ids))
+            .group_by(target_period)
+        )
+        if start:
+            target_statement = target_statement.where(Period.start >= start)
+        if end:
+            target_statement = target_statement.where(Period.start <= end)
+        targets = {row[0].date(): row[1] or 0 for row in session.exec(target_statement).all()}
+
+        return [
+            SalesVSTarget(
+                sales=sales.get(day, 0),
+                target=targets.get(day, 0),
+                period=datetime.combine(day, datetime.min.time()),
+            )
+            for day in sorted(sales.keys() | targets.keys())
+        ]
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@dr.get(endpoint['year_to_date'], response_model=List[YearToDate])
+def get_year_to_date(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    year: Optional[int] = None,
+    unit: Optional[str] = None,
+    organization: Optional[int] = None,
+    filter: Optional[str] = None,
+    filter_id: Optional[int] = None,
+):
+    """
+    Monthly volume from the start of the year, each with its share of the year's total.
+    """
+    try:
+        check_dashboard_permission(session, current_user)
+
+        today = datetime.now()
+        year = year or today.year
+        end = today if year == today.year else datetime(year, 12, 31)
+
+        period = func.date_trunc("month", db_model.day).label("period")
+        statement = filter_sales_summary(
+            select(period, func.sum(get_measure(unit))).group_by(period).order_by(period),
+            get_dashboard_organizations(session, current_user, organization),
+            parse_enum(Filter, filter, "Filter"),
+            filter_id,
+            datetime(year, 1, 1),
+            end,
+        )
+        rows = [(row[0], row[1] or 0) for row in session.exec(statement).all()]
+        total = sum(volume for _, volume in rows)
+
+        return [
+            YearToDate(period=month.strftime("%Y-%m"), volume=volume, percentage=percentage(volume, total))
+            for month, volume in rows
+        ]
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@dr.get(endpoint['order_sales'], response_model=OrderSales)
+def get_order_sales(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    organization: Optional[int] = None,
+    filter: Optional[str] = None,
+    filter_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    try:
+        check_dashboard_permission(session, current_user)
+
+        statement = filter_sales_summary(
+            select(func.sum(db_model.orders), func.sum(db_model.sales)),
+            get_dashboard_organizations(session, current_user, organization),
+            parse_enum(Filter, filter, "Filter"),
+            filter_id,
+            parse_datetime_field(start_date),
+            parse_datetime_field(end_date),
+        )
+        orders, sales = session.exec(statement).one()
+
+        return OrderSales(order=orders or 0, sales=sales or 0)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@dr.get(endpoint['presales_contribution'], response_model=List[PresalesContribution])
+def get_presales_contribution(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    timeline: Optional[str] = None,
+    organization: Optional[int] = None,
+    filter: Optional[str] = None,
+    filter_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    try:
+        check_dashboard_permission(session, current_user)
+
+        timeline_type = parse_enum(TimelineType, timeline, "Timeline") or TimelineType.monthly
+        period = func.date_trunc(timeline_to_date_trunc[timeline_type], db_model.day).label("period")
+
+        statement = filter_sales_summary(
+            select(period, func.sum(db_model.presales), func.sum(db_model.sales)).group_by(period).order_by(period),
+            get_dashboard_organizations(session, current_user, organization),
+            parse_enum(Filter, filter, "Filter"),
+            filter_id,
+            parse_datetime_field(start_date),
+            parse_datetime_field(end_date),
+        )
+
+        return [
+            PresalesContribution(
+                period=row[0].strftime(period_format[timeline_type]),
+                presales=row[1] or 0,
+                presalesPercentage=percentage(row[1] or 0, row[2] or 0),
+                sales=row[2] or 0,
+            )
+            for row in session.exec(statement).all()
+        ]
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
@@ -0,0 +1,158 @@
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.Account import User
+from models.PointOfSale import PointOfSale
+from models.SalesAndTransactions import DuplicateFlag, DuplicateStatus, Penetration
+from models.viewModel.PenetrationView import DuplicateCheck
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.pagination_util import Page, paginate
+from utils.dedupe_util import find_duplicates
+
+DedupeRouter = ddr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint = {
+    "check": "/check-duplicates",
+    "get": "/get-duplicates",
+    "update": "/update-duplicate",
+}
+
+role_modules = {
+    "check": ["Penetration", "Point Of Sale"],
+    "get": ["Penetration", "Point Of Sale"],
+    "update": ["Penetration", "Point Of Sale"],
+}
+
+PageDep = Annotated[Page, Depends(paginate(DuplicateFlag, sort_keys={"score": DuplicateFlag.score, "date": DuplicateFlag.date}, filters={"entity": DuplicateFlag.entity, "status": DuplicateFlag.status, "cluster": DuplicateFlag.cluster, "date": DuplicateFlag.date}))]
+
+
+def in_scope(organization_ids):
+    """Flags whose record was registered by, or sells for, an organization of the scope."""
+    return or_(
+        and_(
+            DuplicateFlag.entity == "penetration",
+            DuplicateFlag.record_id.in_(
+                select(Penetration.id)
+                .join(User, User.id == Penetration.employee)
+                .where(User.organization.in_(organization_ids))
+            ),
+        ),
+        and_(
+            DuplicateFlag.entity == "outlet",
+            DuplicateFlag.record_id.in_(
+                select(PointOfSale.outlet_id).where(PointOfSale.organization.in_(organization_ids))
+            ),
+        ),
+    )
+
+
+@ddr.post(endpoint['check'])
+def check_duplicates(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    valid: DuplicateCheck,
+):
+    """
+    Likely duplicates, within the user's scope, of a penetration or outlet before it is
+    registered, best match first.
+    """
+    try:
+        if not check_permission(
+            session, "Create", role_modules['check'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+
+        return find_duplicates(
+            session,
+            valid.entity,
+            [valid.name, valid.company_name],
+            organization_ids,
+            valid.phone,
+            valid.tin,
+            valid.latitude,
+            valid.longitude,
+        )
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@ddr.get(endpoint['get'])
+def get_duplicates(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    page: PageDep,
+):
+    """
+    Flagged duplicates of the penetrations and outlets in the user's scope.
+    """
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+        return page.fetch(session, select(DuplicateFlag).where(in_scope(organization_ids)))
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@ddr.put(endpoint['update'] + "/{id}")
+def update_duplicate(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    id: int,
+    status: DuplicateStatus,
+):
+    """
+    Confirms or dismisses a flagged duplicate. Dismissed pairs are not flagged again.
+    """
+    try:
+        if not check_permission(
+            session, "Update", role_modules['update'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+        flag = session.exec(
+            select(DuplicateFlag).where(DuplicateFlag.id == id, in_scope(organization_ids))
+        ).first()
+        if not flag:
+            raise HTTPException(status_code=404, detail="Duplicate flag not found")
+
+        flag.status = status
+        session.add(flag)
+        session.commit()
+        session.refresh(flag)
+        return flag
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
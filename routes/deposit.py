@@ -10,11 +10,14 @@ from models.Account import User, Organization
 from models.FinanceModule import BankAccount, Deposit, DepositStatus, BankName
 from models.viewModel.FinanceView import DepositView as TemplateView, UpdateDepositView as UpdateTemplateView, BankAccountView, UpdateBankAccountView
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.blob_util import get_blob_url, store_request_image
 from utils.form_db_fetch import fetch_bank_account_id_and_account, group_bank_accounts_by_bank_name, fetch_organization_id_and_name
 from utils.model_converter_util import get_html_types
+from utils.response_util import CompressedRoute, FastJSONResponse, fast_json
 
-DepositRouter = dr = APIRouter()
+DepositRouter = dr = APIRouter(route_class=CompressedRoute)
 
 SessionDep = Annotated[Session, Depends(get_session)]
 UserDep = Annotated[dict, Depends(get_current_user)]
@@ -40,11 +43,15 @@ role_modules = {
     "delete": ["Finance"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"date": Deposit.date, "amount": Deposit.amount}, filters={"approval_status": Deposit.approval_status, "sales_representative": Deposit.sales_representative, "bank": Deposit.bank, "organization": Deposit.organization, "date": Deposit.date}))]
+
 #CRUD
 @dr.get(endpoint['get'])
+@fast_json
 def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str
 ):
     try:  
@@ -55,9 +62,10 @@ def get_template(
                 status_code=403, detail="You Do not have the required privilege"
             )
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
-        entries_list = session.exec(
+        entries_list = page.fetch(
+            session,
             select(db_model).where(db_model.organization.in_(organization_ids))
-        ).all()
+        )
         if not entries_list:
             raise HTTPException(status_code=404, detail= f" No {endpoint_name} Created")  
           
@@ -75,11 +83,11 @@ def get_template(
                 "remark": entry.remark,
                 "approval_status": entry.approval_status,
                 "organization": org_name,
-                "deposit_slip": entry.deposit_slip
+                "deposit_slip": get_blob_url(entry.deposit_slip)
             }
             if temp not in deposit_list:
                 deposit_list.append(temp)
-        return deposit_list
+        return FastJSONResponse(deposit_list, headers=page.headers)
 
     except HTTPException as http_exc:
         raise http_exc
@@ -135,7 +143,7 @@ def get_template(
                 # "finance_manager": entry.finance_manager,
                 "organization": entry.organization,
                 "transaction_number": entry.transaction_number,
-                "deposit_slip": entry.deposit_slip
+                "deposit_slip": get_blob_url(entry.deposit_slip)
                 }
     
     except HTTPException as http_exc:
@@ -226,7 +234,7 @@ def create_template(
             approval_status = DepositStatus.Pending,
             organization = valid.organization,
             transaction_number = valid.transaction_number,
-            deposit_slip = valid.deposit_slip
+            deposit_slip = store_request_image(session, valid.deposit_slip, current_user, "deposit slip")
 
             )
         session.add(new_entry)
@@ -0,0 +1,261 @@
+from typing import Annotated, Optional
+from datetime import date
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import func
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.Account import Organization, Role, ScopeGroup, User
+from models.FinanceModule import BankAccount, Deposit
+from models.Product_Category import Product
+from models.Warehouse import StockLog, Vehicle, Warehouse, WarehouseStop
+from utils.auth_util import get_current_user, check_permission, extract_username
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.warehouse_util import check_warehouse_permission
+from utils.export_util import apply_date_range, export_response
+
+ExportRouter = er = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint = {
+    "stock_log": "/export-stock-logs",
+    "warehouse_stop": "/export-warehouse-item-requests",
+    "deposit": "/export-deposits",
+    "user": "/export-users",
+}
+
+# Same modules and actions as the list views being exported.
+role_modules = {
+    "stock_log": ["Inventory Management"],
+    "warehouse_stop": ["Inventory Management", "Warehouse-stop"],
+    "deposit": ["Finance", "Deposit"],
+    "user": ["Administrative", "Service Provider"],
+}
+
+
+def check_warehouse_export(session, current_user, module: str, warehouse_id: int):
+    if not check_permission(
+        session, "Read", role_modules[module], current_user
+        ):
+        raise HTTPException(
+            status_code=403, detail="You Do not have the required privilege"
+        )
+    if not check_warehouse_permission(
+        session, "Read", warehouse_id, current_user
+    ):
+        raise HTTPException(
+            status_code=403, detail="You Do not have the required privilege"
+        )
+
+
+@er.get(endpoint['stock_log'] + "/{id}")
+def export_stock_logs(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    id: int,
+    format: str = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """Stock logs of a warehouse, optionally limited to stock in/out dates start..end."""
+    try:
+        check_warehouse_export(session, current_user, "stock_log", id)
+
+        statement = (
+            select(
+                StockLog.id,
+                StockLog.stock_id,
+                Warehouse.warehouse_name.label("warehouse"),
+                Product.name.label("product"),
+                StockLog.quantity,
+                StockLog.stock_type,
+                StockLog.log_type,
+                StockLog.request_type,
+                StockLog.stock_in_date,
+                StockLog.stock_out_date,
+            )
+            .join(Warehouse, Warehouse.id == StockLog.warehouse_id)
+            .join(Product, Product.id == StockLog.product_id)
+            .where(StockLog.warehouse_id == id)
+            .order_by(StockLog.id)
+        )
+        statement = apply_date_range(
+            statement, func.coalesce(StockLog.stock_in_date, StockLog.stock_out_date), start, end
+        )
+
+        return export_response(statement, format, f"stock-logs-{id}")
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@er.get(endpoint['warehouse_stop'] + "/{id}")
+def export_warehouse_stops(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    id: int,
+    format: str = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """Item requests (warehouse stops) of a warehouse, optionally limited to request dates start..end."""
+    try:
+        check_warehouse_export(session, current_user, "warehouse_stop", id)
+
+        statement = (
+            select(
+                WarehouseStop.id,
+                WarehouseStop.stock_id,
+                Warehouse.warehouse_name.label("warehouse"),
+                Product.name.label("product"),
+                WarehouseStop.stock_type,
+                WarehouseStop.quantity,
+                Vehicle.name.label("vehicle"),
+                WarehouseStop.requester_id.label("requester"),
+                WarehouseStop.request_type,
+                WarehouseStop.request_status,
+                WarehouseStop.request_date,
+                WarehouseStop.approver_id.label("approver"),
+                WarehouseStop.approve_date,
+                WarehouseStop.confirmed,
+                WarehouseStop.confirm_date,
+                WarehouseStop.destination_warehouse_id.label("destination_warehouse"),
+            )
+            .join(Warehouse, Warehouse.id == WarehouseStop.warehouse_id)
+            .outerjoin(Product, Product.id == WarehouseStop.product_id)
+            .outerjoin(Vehicle, Vehicle.id == WarehouseStop.vehicle_id)
+            .where(WarehouseStop.warehouse_id == id)
+            .order_by(WarehouseStop.id)
+        )
+        statement = apply_date_range(statement, WarehouseStop.request_date, start, end)
+
+        return export_response(statement, format, f"warehouse-item-requests-{id}")
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@er.get(endpoint['deposit'])
+def export_deposits(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    format: str = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """Deposits of the user's scope, optionally limited to deposit dates start..end."""
+    try:
+        if not check_permission(
+            session, "Read", role_modules['deposit'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+
+        statement = (
+            select(
+                Deposit.id,
+                User.full_name.label("sales_representative"),
+                BankAccount.bank_name.label("bank"),
+                BankAccount.account.label("account"),
+                Deposit.branch,
+                Deposit.amount,
+                Deposit.date,
+                Deposit.remark,
+                Deposit.approval_status,
+                Deposit.transaction_number,
+                Organization.name.label("organization"),
+            )
+            .outerjoin(User, User.id == Deposit.sales_representative)
+            .outerjoin(BankAccount, BankAccount.id == Deposit.bank)
+            .outerjoin(Organization, Organization.id == Deposit.organization)
+            .where(Deposit.organization.in_(organization_ids))
+            .order_by(Deposit.id)
+        )
+        statement = apply_date_range(statement, Deposit.date, start, end)
+
+        return export_response(statement, format, "deposits")
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@er.get(endpoint['user'])
+def export_users(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    format: str = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """Users of the tenant within the user's scope, optionally limited to joining dates start..end."""
+    try:
+        if not check_permission(
+            session, "Update", role_modules['user'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        if tenant == "provider":
+            current_tenant = session.exec(select(Organization).where(Organization.id == current_user.organization)).first()
+        else :
+            current_tenant = session.exec(select(Organization).where(Organization.tenant_hashed == tenant)).first()
+        if not current_tenant:
+            raise HTTPException(status_code=404, detail="Tenant organization not found")
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+
+        statement = (
+            select(
+                User.id,
+                User.full_name,
+                User.username,
+                User.email,
+                User.phone_number,
+                Organization.name.label("organization"),
+                Role.name.label("role"),
+                ScopeGroup.name.label("scope_group"),
+                User.gender,
+                User.position,
+                User.date_of_joining,
+            )
+            .join(Organization, Organization.id == User.organization)
+            .outerjoin(Role, Role.id == User.role)
+            .outerjoin(ScopeGroup, ScopeGroup.id == User.scope_group)
+            .where(User.organization.in_(organization_ids), User.organization == current_tenant.id)
+            .order_by(User.id)
+        )
+        statement = apply_date_range(statement, User.date_of_joining, start, end)
+
+        tenant_name = current_tenant.name
+
+        def strip_tenant_prefix(row):
+            try:
+                row["username"] = extract_username(row["username"], tenant_name)
+            except ValueError:
+                pass
+            return row
+
+        return export_response(statement, format, "users", strip_tenant_prefix)
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
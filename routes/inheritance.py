@@ -2,6 +2,7 @@ from sqlmodel import select, Session, delete
 from fastapi import APIRouter, Depends, HTTPException, Body, Path
 from typing import Annotated, List, Dict, Any, Optional
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.form_db_fetch import add_category_link, add_product_link
 from db import SECRET_KEY, get_session
 from models.Account import Organization
@@ -37,10 +38,13 @@ role_modules = {
     "delete": ["Administrative", "Inheritance"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"name": InheritanceGroup.name}, filters={"organization": InheritanceGroup.organization}))]
+
 @In.get(endpoint['get'])
 async def get_inheritance_groups(
     session: SessionDep,
     current_user: UserDep,    
+    page: PageDep,
     tenant: str,
 ):
     try: 
@@ -51,9 +55,10 @@ async def get_inheritance_groups(
                 status_code=403, detail="You Do not have the required privilege"
             )
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
-        db_entries = session.exec(
+        db_entries = page.fetch(
+            session,
             select(db_model).where(db_model.organization.in_(organization_ids))
-        ).all()
+        )
 
         if not db_entries:
             raise HTTPException(status_code=404, 
@@ -3,19 +3,22 @@ from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, Body, Path, status
 from sqlmodel import Session, select
 import traceback
+from collections import defaultdict
 from db import SECRET_KEY, get_session
-from models.Warehouse import RequestStatus, RequestType, LogType, StockLog, StockType, Warehouse, WarehouseGroup, WarehouseGroupLink, WarehouseStop, WarehouseStoreAdminLink, Stock, Vehicle
+from models.Warehouse import RequestStatus, RequestType, StockType, Warehouse, WarehouseGroup, WarehouseGroupLink, WarehouseStop, WarehouseStoreAdminLink, Vehicle
 from models.Account import AccessPolicy, Organization
 from models.Address import Address, Geolocation
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.model_converter_util import get_html_types
 from utils.util_functions import validate_name, parse_enum, parse_datetime_field, format_date_for_input
 from utils.form_db_fetch import fetch_organization_id_and_name, fetch_user_id_and_name, fetch_product_id_and_name,fetch_category_id_and_name, fetch_warehouse_id_and_name, fetch_vehicle_id_and_name, fetch_stocks_id_and_name, fetch_warehouse_group_id_and_name, fetch_admin_warehouse_id_and_name, fetch_address_id_and_name
-from utils.warehouse_util import check_warehouse_permission
+from utils.warehouse_util import check_warehouse_permission, hold_request_quantity, reserve_request_quantity, approve_warehouse_stop, reject_warehouse_stop, confirm_warehouse_stop
 from utils.get_hierarchy import get_organization_ids_by_scope_group
-from models.viewModel.WarehouseView import WarehouseStop as TemplateView
+from utils.response_util import CompressedRoute, FastJSONResponse, fast_json
+from models.viewModel.WarehouseView import WarehouseStop as TemplateView, WarehouseStopBulkAction
 
-WarehouseItemRequestRouter = wr = APIRouter()
+WarehouseItemRequestRouter = wr = APIRouter(route_class=CompressedRoute)
 SessionDep = Annotated[Session, Depends(get_session)]
 UserDep = Annotated[dict, Depends(get_current_user)]
 
@@ -34,6 +37,9 @@ endpoint = {
     "reject_request": f"/reject-{endpoint_name}",
     "confirm_request": f"/confirm-{endpoint_name}",
     "delete": f"/delete-{endpoint_name}",
+    "bulk_approve": f"/bulk-approve-{endpoint_name}s",
+    "bulk_reject": f"/bulk-reject-{endpoint_name}s",
+    "bulk_confirm": f"/bulk-confirm-{endpoint_name}s",
 }
 
 role_modules = {   
@@ -46,12 +52,50 @@ role_modules = {
     "delete": ["Inventory Management","Warehouse-stop"],
 }
 
-request_to_log_type_map = {
-    RequestType.stock_out: LogType.stock_out,
-    RequestType.transfer: LogType.transfer,
-    RequestType.return_defect: LogType.return_defect,
-    RequestType.return_normal: LogType.return_normal,
-}
+PageDep = Annotated[Page, Depends(paginate(WarehouseStop, filters={"product": WarehouseStop.product_id, "stock_type": WarehouseStop.stock_type, "request_type": WarehouseStop.request_type, "request_status": WarehouseStop.request_status, "requester": WarehouseStop.requester_id, "vehicle": WarehouseStop.vehicle_id, "request_date": WarehouseStop.request_date}))]
+
+def apply_bulk_action(session: Session, current_user, ids: List[int], action) -> List[Dict[str, Any]]:
+    """
+    Applies a status action to many warehouse stops in a single transaction.
+
+    The stops are loaded in one query and grouped by warehouse so the warehouse
+    permission is checked once per warehouse. Each stop runs inside its own
+    savepoint, a failing stop is rolled back and reported without affecting
+    the others, and everything that succeeded is committed together.
+
+    Returns:
+        List[Dict[str, Any]]: One {"id", "success", "detail"} entry per requested id, in request order.
+    """
+    ids = list(dict.fromkeys(ids))
+    results = {
+        stop_id: {"id": stop_id, "success": False, "detail": "Warehouse stop not found"}
+        for stop_id in ids
+    }
+
+    warehouse_stops = session.exec(select(WarehouseStop).where(WarehouseStop.id.in_(ids))).all()
+
+    stops_by_warehouse = defaultdict(list)
+    for stop in warehouse_stops:
+        stops_by_warehouse[stop.warehouse_id].append(stop)
+
+    for warehouse_id, stops in stops_by_warehouse.items():
+        if not check_warehouse_permission(session, "Update", warehouse_id, current_user):
+            for stop in stops:
+                results[stop.id]["detail"] = "You Do not have the required privilege"
+            continue
+
+        for stop in sorted(stops, key=lambda stop: stop.id):
+            stop_id = stop.id
+            try:
+                with session.begin_nested():
+                    action(session, stop, current_user)
+                results[stop_id] = {"id": stop_id, "success": True, "detail": ""}
+            except HTTPException as e:
+                results[stop_id]["detail"] = e.detail
+
+    session.commit()
+
+    return [results[stop_id] for stop_id in ids]
 
 @wr.get(endpoint['get_form'])
 async def form_warehouse_stop(
@@ -118,6 +162,7 @@ async def create_warehouse_stop(
         
         
         session.add(warehouse_stop)
+        hold_request_quantity(session, warehouse_stop)
         session.commit()
         session.refresh(warehouse_stop)
         
@@ -127,9 +172,11 @@ async def create_warehouse_stop(
         raise HTTPException(status_code=400, detail=str(e))
     
 @wr.get(endpoint['get']+ "/{id}")
+@fast_json
 async def get_warehouse_stops(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str,
     id: int
 
@@ -150,7 +197,7 @@ async def get_warehouse_stops(
             )
       
 
-        warehouse_stops = session.exec(select(WarehouseStop).where((WarehouseStop.warehouse_id==id))).all()
+        warehouse_stops = page.fetch(session, select(WarehouseStop).where((WarehouseStop.warehouse_id==id)))
         warehouse_stop_list = []
         for stop in warehouse_stops:
 
@@ -172,7 +219,7 @@ async def get_warehouse_stops(
                 "isRequest": False,
             })
     
-        return warehouse_stop_list
+        return FastJSONResponse(warehouse_stop_list, headers=page.headers)
 
     except Exception as e:
         traceback.print_exc()
@@ -225,9 +272,11 @@ async def get_warehouse_stop(
     
 
 @wr.get(endpoint['get_by_status'] + "/{id}/{status}")
+@fast_json
 async def get_warehouse_stops_by_status(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str,
     id: int,
     status: str
@@ -249,7 +298,10 @@ async def get_warehouse_stops_by_status(
             )
         
      
-        warehouse_stops = session.exec(select(WarehouseStop).where((WarehouseStop.warehouse_id == id)&(WarehouseStop.request_status == parse_enum(RequestStatus,status, "Request Status")))).all()
+        warehouse_stops = page.fetch(
+            session,
+            select(WarehouseStop).where((WarehouseStop.warehouse_id == id)&(WarehouseStop.request_status == parse_enum(RequestStatus,status, "Request Status")))
+        )
 
         warehouse_stop_list = []
 
@@ -273,7 +325,7 @@ async def get_warehouse_stops_by_status(
             })
         
 
-        return warehouse_stop_list
+        return FastJSONResponse(warehouse_stop_list, headers=page.headers)
 
     except Exception as e:
         traceback.print_exc()
@@ -357,11 +409,7 @@ async def approve_warehouse_stops(
                 status_code=403, detail="You Do not have the required privilege"
             )
         
-        warehouse_stop.request_status = parse_enum(RequestStatus, "Approved", "Request Status")
-        warehouse_stop.approver_id = current_user.id
-        warehouse_stop.approve_date = datetime.now()
-
-        session.add(warehouse_stop)
+        approve_warehouse_stop(session, warehouse_stop, current_user)
         session.commit()
         session.refresh(warehouse_stop)
 
@@ -401,10 +449,7 @@ async def approve_warehouse_stops(
                 status_code=403, detail="You Do not have the required privilege"
             )
         
-        warehouse_stop.request_status = parse_enum(RequestStatus, "Rejected", "Request Status")
-       
-
-        session.add(warehouse_stop)
+        reject_warehouse_stop(session, warehouse_stop, current_user)
         session.commit()
         session.refresh(warehouse_stop)
 
@@ -442,45 +487,78 @@ async def confirm_warehouse_stops(
 
         if not warehouse_stop:
             raise HTTPException(status_code=404, detail="Warehouse stop not found or not approved")
-        
-        warehouse_stop.confirmed = True
-        warehouse_stop.confirm_date = datetime.now()
 
-        session.add(warehouse_stop)
+        confirm_warehouse_stop(session, warehouse_stop, current_user)
         session.commit()
-        session.refresh(warehouse_stop)
 
-        stock = session.exec(select(Stock).where(Stock.product_id == warehouse_stop.product_id)).first()
-        if warehouse_stop.request_type == parse_enum(RequestType, "Transfer", "Request Type") or warehouse_stop.request_type == parse_enum(RequestType, "Stock Out", "Request Type"):
 
-            stock.quantity = stock.quantity - warehouse_stop.quantity
-        else:
-            stock.quantity = stock.quantity + warehouse_stop.quantity
+        return "Warehouse stop confirmed successfully"
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e)) 
+    
+@wr.put(endpoint['bulk_approve'])
+async def bulk_approve_warehouse_stops(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    valid: WarehouseStopBulkAction
+):
 
-        session.add(stock)
-        session.commit()
-        session.refresh(stock)
-
-        stock_log = StockLog(
-            stock_id = warehouse_stop.stock_id,
-            stock_out_date = datetime.now(),
-            warehouse_id = warehouse_stop.warehouse_id,
-            product_id = warehouse_stop.product_id,
-            quantity = warehouse_stop.quantity,
-            stock_type = warehouse_stop.stock_type,
-            request_type = warehouse_stop.request_type,
-            log_type = request_to_log_type_map.get(warehouse_stop.request_type, LogType.stock_in)  # Default to stock_in
-        )
+    try:
+        if not check_permission(
+            session, "Read", role_modules['update_status'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
 
-        session.add(stock_log)
-        session.commit()
-        session.refresh(stock_log)
+        return apply_bulk_action(session, current_user, valid.ids, approve_warehouse_stop)
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
 
+@wr.put(endpoint['bulk_reject'])
+async def bulk_reject_warehouse_stops(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    valid: WarehouseStopBulkAction
+):
 
-        return "Warehouse stop confirmed successfully"
+    try:
+        if not check_permission(
+            session, "Read", role_modules['update_status'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        return apply_bulk_action(session, current_user, valid.ids, reject_warehouse_stop)
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=400, detail=str(e)) 
+        raise HTTPException(status_code=400, detail=str(e))
+
+@wr.put(endpoint['bulk_confirm'])
+async def bulk_confirm_warehouse_stops(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    valid: WarehouseStopBulkAction
+):
+
+    try:
+        if not check_permission(
+            session, "Read", role_modules['confirm'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        return apply_bulk_action(session, current_user, valid.ids, confirm_warehouse_stop)
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
     
 @wr.put(endpoint['update'])
 async def update_warehouse_stop(
@@ -505,12 +583,25 @@ async def update_warehouse_stop(
         
         
     
+        if warehouse_stop.confirmed or warehouse_stop.request_status in (RequestStatus.in_transit, RequestStatus.received):
+            raise HTTPException(status_code=400, detail="Confirmed warehouse stops can not be updated")
+        
+        hold_request_quantity(session, warehouse_stop, -1)
+    
         warehouse_stop.request_type = parse_enum(RequestType,valid.request_type, "Request Type")
         warehouse_stop.vehicle_id = valid.vehicle
         warehouse_stop.product_id = valid.product
         warehouse_stop.quantity = valid.quantity
         warehouse_stop.warehouse_id = valid.warehouse
         warehouse_stop.stock_type=parse_enum(StockType, valid.stock_type,"Stock Type")             
+
+        # an approved stop has to fit in the available stock again after the change
+        if warehouse_stop.request_status == RequestStatus.approved:
+            warehouse_stop.request_status = RequestStatus.pending
+            hold_request_quantity(session, warehouse_stop)
+            reserve_request_quantity(session, warehouse_stop)
+        else:
+            hold_request_quantity(session, warehouse_stop)
       
         session.add(warehouse_stop)
         session.commit()
@@ -544,7 +635,12 @@ async def delete_warehouse_stop(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Warehouse stop not found",
             )
+
+        # its stock has left the source warehouse, the logs would no longer match the stock
+        if warehouse_stop.request_status in (RequestStatus.in_transit, RequestStatus.received):
+            raise HTTPException(status_code=400, detail="In transit or received warehouse stops can not be deleted")
  
+        hold_request_quantity(session, warehouse_stop, -1)
         session.delete(warehouse_stop)
         session.commit()
 
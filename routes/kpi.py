@@ -0,0 +1,121 @@
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Body
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.KPIs import Measurement, Performance, Period
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.kpi_util import period_progress, score_period
+
+KPIRouter = kr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint_name = "period-score"
+db_model = Period
+
+endpoint = {
+    "get": f"/get-{endpoint_name}s",
+    "score": "/score-period",
+}
+
+role_modules = {   
+    "get": ["Administrative"],
+    "score": ["Administrative"],
+}
+
+
+def get_scoped_period(session: Session, current_user, id: int) -> Period:
+    period = session.get(Period, id)
+    if not period:
+        raise HTTPException(status_code=404, detail="Period not found")
+
+    organization_ids = get_organization_ids_by_scope_group(session, current_user)
+    if period.organization not in organization_ids:
+        raise HTTPException(status_code=403, detail="You Do not have the required privilege")
+
+    return period
+
+
+@kr.post(endpoint['score'] + "/{id}")
+def score_template(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    id: int,
+    employees: Optional[List[int]] = Body(default=None, embed=True),
+):
+    """
+    Recomputes actuals, measurements and progress for a period, optionally for some employees only.
+    """
+    try:
+        if not check_permission(
+            session, "Update", role_modules['score'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        period = get_scoped_period(session, current_user, id)
+
+        return score_period(session, period.id, employees)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@kr.get(endpoint['get'] + "/{id}")
+def get_template(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    id: int,
+):
+    """
+    Progress and per indicator measurements of every performance with targets in a period.
+    """
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        period = get_scoped_period(session, current_user, id)
+
+        progress = period_progress(session, period)
+        if not progress:
+            return []
+
+        performances = session.exec(select(Performance).where(Performance.id.in_(progress))).all()
+        measurements = session.exec(
+            select(Measurement).where(Measurement.performance.in_(progress), Measurement.period == period.id)
+        ).all()
+
+        performance_measurements = {}
+        for measurement in measurements:
+            performance_measurements.setdefault(measurement.performance, []).append({
+                "indicator_type": measurement.indicator_type,
+                "weight": measurement.weight,
+                "target": measurement.target,
+                "actual": measurement.actual,
+            })
+
+        return [
+            {
+                "id": performance.id,
+                "employee": performance.employee,
+                "progress": progress[performance.id],
+                "measurements": performance_measurements.get(performance.id, []),
+            }
+            for performance in performances
+        ]
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
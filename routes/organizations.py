@@ -1,6 +1,6 @@
 from operator import or_
 from typing import Annotated, List, Dict, Any, Optional, Union
-from fastapi import APIRouter, HTTPException, Body, status, Depends, Path
+from fastapi import APIRouter, HTTPException, Body, Request, Response, status, Depends, Path
 from sqlmodel import select, Session
 from db import get_session
 from models.Account import User, Organization, OrganizationType, ScopeGroup, Scope, Role, ScopeGroupLink
@@ -10,6 +10,9 @@ from utils.model_converter_util import get_html_types
 from utils.util_functions import validate_name, validate_image
 from models.viewModel.AccountsView import OrganizationView as TemplateView, UpdateOrganizationView as UpdateTemplateView 
 from utils.get_hierarchy import get_organization_ids_by_scope_group, get_child_organization, get_heirarchy
+from utils.lookup_cache import get_lookup_etag, etag_matches
+from utils.conditional_util import conditional_get
+from utils.blob_util import get_blob_url, store_request_image
 from utils.form_db_fetch import fetch_organization_id_and_name, fetch_inheritance_group_id_and_name, fetch_address_id_and_name, fetch_geolocation_id_and_name
 import traceback
 
@@ -70,7 +73,7 @@ async def get_my_tenant(
             "id": organization.id,
             "organization": organization.name,
             "owner": organization.owner_name,
-            "logo": organization.logo_image,
+            "logo": get_blob_url(organization.logo_image),
         }
         
     except HTTPException as http_exc:
@@ -111,7 +114,7 @@ async def get_children_organizations(
                 "organization": org.name,
                 "owner": org.owner_name,
                 "description": org.description,         
-                "logo": org.logo_image,
+                "logo": get_blob_url(org.logo_image),
                 "parent_organization": org.parent_organization,
                 "organization_type": org.organization_type,
                 "inheritance_group": org.inheritance_group,
@@ -168,7 +171,7 @@ async def get_my_organization(
             "id": organization.id,
             "organization": organization.name,
             "owner": organization.owner_name,
-            "logo": organization.logo_image,
+            "logo": get_blob_url(organization.logo_image),
         }
         
     except HTTPException as http_exc:
@@ -177,7 +180,7 @@ async def get_my_organization(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Something went wrong")
     
-@tr.get(endpoint['get'])
+@tr.get(endpoint['get'], dependencies=[Depends(conditional_get("organization", modules=role_modules['get']))])
 def get_template(
     session: SessionDep,
     current_user: UserDep,
@@ -236,7 +239,7 @@ def get_template(
             "name": organization.name,
             "owner_name": organization.owner_name,
             "description": organization.description,
-            "logo_image": organization.logo_image,
+            "logo_image": get_blob_url(organization.logo_image),
             "parent_organization": organization.parent_organization,
             "organization_type": organization.organization_type,
             "inheritance_group": organization.inheritance_group,
@@ -257,6 +260,8 @@ def get_template_form(
     tenant: str,
     session: SessionDep,
     current_user: UserDep,
+    request: Request,
+    response: Response,
 ) :
     """   Retrieves the form structure for creating a new user account.
     """
@@ -268,6 +273,10 @@ def get_template_form(
             raise HTTPException(
                 status_code=403, detail="You Do not have the required privilege"
             )
+        etag = get_lookup_etag(session, current_user, fetch_organization_id_and_name, fetch_inheritance_group_id_and_name, fetch_address_id_and_name, fetch_geolocation_id_and_name)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
 
         organization_data = {
             "id": "",
@@ -344,7 +353,7 @@ def create_template(
             name = valid.name,
             owner_name = valid.owner_name,
             description = valid.description,
-            logo_image = valid.logo_image,
+            logo_image = store_request_image(session, valid.logo_image, current_user, "logo image"),
             parent_organization = valid.parent_organization,
             organization_type = valid.organization_type,
             inheritance_group = valid.inheritance_group,
@@ -440,7 +449,7 @@ def update_template(
         existing_organization.description = valid.description
         if valid.inheritance_group:
             existing_organization.inheritance_group= valid.inheritance_group
-        existing_organization.logo_image = valid.logo_image
+        existing_organization.logo_image = store_request_image(session, valid.logo_image, current_user, "logo image")
         existing_organization.organization_type = valid.organization_type
         if valid.parent_organization:
             existing_organization.parent_organization = valid.parent_organization
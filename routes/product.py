@@ -1,15 +1,20 @@
-from typing import Annotated
+from typing import Annotated, Optional
 from db import SECRET_KEY, get_session
-from sqlmodel import Session, select
-from fastapi import APIRouter, HTTPException, status, Depends
+from sqlmodel import Session, or_, select
+from fastapi import APIRouter, HTTPException, Request, Response, UploadFile, status, Depends
 from db import get_session
 from utils.model_converter_util import get_html_types
-from models.Product_Category import Product, Product_units, InheritanceGroup, Category
+from models.Product_Category import Product, ProductLink, Product_units, Category
 from models.Account import Organization, ScopeGroup
 from models.viewModel.ProductCategoryView import ProductView as TemplateView, UpdateProductView as UpdateTemplateView
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.lookup_cache import get_lookup_etag, etag_matches
+from utils.conditional_util import conditional_get
+from utils.blob_util import get_blob_url, get_thumbnail_url, store_request_image
 from utils.form_db_fetch import fetch_category_id_and_name, fetch_organization_id_and_name
+from utils.import_util import PRODUCT_COLUMNS, PRODUCT_OPTIONAL_COLUMNS, import_products, read_import_file
 import traceback 
 
 ProductRouter = pr = APIRouter()
@@ -24,6 +29,7 @@ endpoint = {
     "get_by_id": f"/get-{endpoint_name}",
     "get_form": f"/{endpoint_name}-form/",
     "create": f"/create-{endpoint_name}",
+    "import": f"/import-{endpoint_name}s",
     "update": f"/update-{endpoint_name}",
     "delete": f"/delete-{endpoint_name}",
 }
@@ -31,15 +37,19 @@ role_modules = {
     "get": ["Administrative", "Product"],
     "get_form": ["Administrative", "Product"],
     "create": ["Administrative", "Product"],
+    "import": ["Administrative", "Product"],
     "update": ["Administrative", "Product"],
     "delete": ["Administrative", "Product"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"name": Product.name, "sku": Product.sku, "price": Product.price}, filters={"category": Product.category_id, "brand": Product.brand, "unit": Product.unit, "organization": Product.organization}))]
 
-@pr.get(endpoint['get'])
+
+@pr.get(endpoint['get'], dependencies=[Depends(conditional_get("product", "organization", "inheritance_group", "product_link", modules=role_modules['get']))])
 def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str
 ):
     try:
@@ -54,15 +64,6 @@ def get_template(
             select(Organization.inheritance_group).where(Organization.id == current_user.organization)
         ).first()
 
-        inherited_group = session.exec(
-            select(InheritanceGroup).where(InheritanceGroup.id == inherited_group_id)
-        ).first()
-
-        if inherited_group:
-            inherited_product = inherited_group.product
-        else:
-            inherited_product = []
-        
         scope_group = session.exec(select(ScopeGroup).where(ScopeGroup.id == current_user.scope_group)).first()
    
         if scope_group != None:
@@ -70,10 +71,12 @@ def get_template(
         if scope_group == None:
             existing_orgs= []
 
-        organization_product = session.exec(
-            select(db_model).where(db_model.organization.in_(existing_orgs))
-        ).all()
-        organization_product.extend(inherited_product)
+        # The organizations' own products and those shared through its inheritance group.
+        inherited_products = select(ProductLink.product_id).where(ProductLink.inheritance_group_id == inherited_group_id)
+        organization_product = page.fetch(
+            session,
+            select(db_model).where(or_(db_model.organization.in_(existing_orgs), db_model.id.in_(inherited_products)))
+        )
 
         product_list = []
         for product in organization_product:
@@ -84,7 +87,7 @@ def get_template(
                 "price": f"{product.price} ETB",
                 "sku": product.sku,
                 "brand": product.brand,
-                "image": product.image
+                "image": get_thumbnail_url(product.image)
                 # "unit": product.unit,
                 # "category": product_category.name if product_category else "N/A",
             }
@@ -129,7 +132,7 @@ def get_product(
             "organization": db_product.organization,
             "category": db_product. category_id,   
             "description": db_product.description,
-            "image": db_product.image,
+            "image": get_blob_url(db_product.image),
             "brand": db_product.brand,
             "price": db_product.price,
             "unit": db_product.unit,
@@ -147,6 +150,8 @@ def get_template_form(
     tenant: str,
     session: SessionDep,
     current_user: UserDep,
+    request: Request,
+    response: Response,
 ) :
     try:
         if not check_permission(
@@ -155,6 +160,11 @@ def get_template_form(
             raise HTTPException(
                 status_code=403, detail="You Do not have the required privilege"
             )
+        etag = get_lookup_etag(session, current_user, fetch_organization_id_and_name, fetch_category_id_and_name)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
         form_structure = {
             "id": "",
             "name": "",
@@ -215,7 +225,7 @@ def create_product(
             sku = valid.sku,
             name = valid.name,
             description = valid.description,
-            image = valid.image,
+            image = store_request_image(session, valid.image, current_user),
             brand = valid.brand,
             price = valid.price,
             unit = valid.unit,
@@ -235,6 +245,53 @@ def create_product(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Something went wrong")
    
+@pr.post(endpoint['import'])
+def import_product_sheet(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    file: UploadFile,
+    organization: Optional[int] = None,
+    dry_run: bool = False,
+):
+    """
+    Creates products from a CSV / XLSX sheet in one transaction.
+
+    Valid rows are created, the rest are reported by row number, see `utils.import_util`.
+    `organization` defaults to the user's own, dry_run only validates.
+    """
+    try:
+        if not check_permission(
+            session, "Create", role_modules['import'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+        organization = organization or current_user.organization
+        if organization not in organization_ids:
+            raise HTTPException(status_code=400, detail="Organization is not in your scope")
+
+        try:
+            frame = read_import_file(file, PRODUCT_COLUMNS, PRODUCT_OPTIONAL_COLUMNS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        report = import_products(session, frame, organization, organization_ids, dry_run)
+        if dry_run:
+            session.rollback()
+        else:
+            session.commit()
+
+        return report
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
 @pr.put(endpoint['update'])
 def update_template(
     session: SessionDep, 
@@ -262,7 +319,7 @@ def update_template(
         if valid.description:
             selected_product.description = valid.description
         if valid.image:
-            selected_product.image = valid.image
+            selected_product.image = store_request_image(session, valid.image, current_user)
         selected_product.brand = valid.brand
         selected_product.price = valid.price
         selected_product.unit = valid.unit
@@ -0,0 +1,115 @@
+import traceback
+from fastapi import Depends, HTTPException, APIRouter, Query
+from typing import Annotated
+from sqlmodel import select, Session
+from db import get_session
+from models.Address import Geolocation
+from models.PointOfSale import Outlet, PointOfSale
+from models.Warehouse import Warehouse
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.proximity_util import find_nearby, find_nearest
+
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+ProximityRouter = pr = APIRouter()
+
+endpoint = {
+    "nearby_outlets": "/get-nearby-outlets",
+    "nearest_warehouses": "/get-nearest-warehouses",
+}
+
+role_modules = {   
+    "nearby_outlets": ["Point Of Sale"],
+    "nearest_warehouses": ["Warehouse", "Inventory Management"],
+}
+
+Latitude = Annotated[float, Query(ge=-90, le=90)]
+Longitude = Annotated[float, Query(ge=-180, le=180)]
+
+
+@pr.get(endpoint['nearby_outlets'])
+async def get_nearby_outlets(
+    session: SessionDep, 
+    current_user: UserDep, 
+    tenant: str,
+    latitude: Latitude,
+    longitude: Longitude,
+    radius_km: Annotated[float, Query(gt=0, le=500)] = 2,
+    limit: Annotated[int, Query(gt=0, le=1000)] = 100,
+):
+    """
+    Outlets within radius_km of a point, nearest first.
+    """
+    try:  
+        if not check_permission(
+            session, "Read", role_modules['nearby_outlets'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+
+        statement = (
+            select(
+                Outlet.id,
+                Outlet.name,
+                PointOfSale.id.label("point_of_sale"),
+                Geolocation.latitude,
+                Geolocation.longitude,
+            )
+            .join(Geolocation, Geolocation.id == Outlet.location_id)
+            .join(PointOfSale, PointOfSale.outlet_id == Outlet.id)
+            .where(PointOfSale.organization.in_(organization_ids))
+        )
+
+        return find_nearby(session, statement, latitude, longitude, radius_km, limit)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@pr.get(endpoint['nearest_warehouses'])
+async def get_nearest_warehouses(
+    session: SessionDep, 
+    current_user: UserDep, 
+    tenant: str,
+    latitude: Latitude,
+    longitude: Longitude,
+    limit: Annotated[int, Query(gt=0, le=100)] = 5,
+    radius_km: Annotated[float, Query(gt=0, le=500)] = 10,
+):
+    """
+    The limit nearest warehouses, widening the search from radius_km until enough are found.
+    """
+    try:  
+        if not check_permission(
+            session, "Read", role_modules['nearest_warehouses'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+
+        statement = (
+            select(
+                Warehouse.id,
+                Warehouse.warehouse_name,
+                Geolocation.latitude,
+                Geolocation.longitude,
+            )
+            .join(Geolocation, Geolocation.id == Warehouse.location_id)
+            .where(Warehouse.organization_id.in_(organization_ids))
+        )
+
+        return find_nearest(session, statement, latitude, longitude, radius_km, limit)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
@@ -0,0 +1,113 @@
+from typing import Annotated, Optional
+from fastapi import APIRouter, HTTPException, Depends
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.Warehouse import Warehouse
+from models.Product_Category import Product
+from utils.auth_util import get_current_user, check_permission
+from utils.form_db_fetch import fetch_warehouse_id_and_name
+from utils.warehouse_util import check_warehouse_permission
+from utils.forecast_util import FORECAST_METHODS, get_reorder_suggestions
+
+ReplenishmentRouter = rr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint_name = "replenishment-suggestion"
+
+endpoint = {
+    "get": f"/get-{endpoint_name}s",
+}
+
+role_modules = {   
+    "get": ["Inventory Management"],
+}
+
+
+@rr.get(endpoint['get'])
+async def get_replenishment_suggestions(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    warehouse: Optional[int] = None,
+    lookback_days: int = 90,
+    lead_time_days: float = 7,
+    review_days: float = 7,
+    service_level: float = 0.95,
+    method: str = "ewma",
+    include_all: bool = False,
+):
+    """
+    Suggested replenishment quantities from historical stock out velocity.
+
+    Covers one warehouse, or every warehouse the user administers when none is given.
+    Only products at or below their reorder point are returned unless include_all is set.
+    """
+  
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        if warehouse:
+            if not check_warehouse_permission(
+                session, "Read", warehouse, current_user
+            ):
+                raise HTTPException(
+                    status_code=403, detail="You Do not have the required privilege"
+                )
+            warehouse_ids = [warehouse]
+        else:
+            warehouse_ids = list(fetch_warehouse_id_and_name(session, current_user).keys())
+
+        if method not in FORECAST_METHODS:
+            raise HTTPException(status_code=400, detail=f"Method must be one of {', '.join(FORECAST_METHODS)}")
+        if lookback_days < 2:
+            raise HTTPException(status_code=400, detail="Lookback days must be at least 2")
+        if not 0 < service_level < 1:
+            raise HTTPException(status_code=400, detail="Service level must be between 0 and 1")
+
+        if not warehouse_ids:
+            return []
+
+        suggestions = get_reorder_suggestions(
+            session, warehouse_ids, lookback_days, lead_time_days, review_days, service_level, method
+        )
+        if not include_all:
+            suggestions = suggestions[suggestions["suggested_quantity"] > 0]
+        if suggestions.empty:
+            return []
+
+        suggestions = suggestions.sort_values(["warehouse_id", "suggested_quantity"], ascending=[True, False])
+
+        product_names = dict(session.exec(
+            select(Product.id, Product.name).where(Product.id.in_(suggestions["product_id"].unique().tolist()))
+        ).all())
+        warehouse_names = dict(session.exec(
+            select(Warehouse.id, Warehouse.warehouse_name).where(Warehouse.id.in_(warehouse_ids))
+        ).all())
+
+        return [
+            {
+                "warehouse_id": int(row.warehouse_id),
+                "warehouse": warehouse_names.get(row.warehouse_id),
+                "product_id": int(row.product_id),
+                "product": product_names.get(row.product_id),
+                "daily_demand": round(float(row.daily_demand), 2),
+                "safety_stock": round(float(row.safety_stock), 2),
+                "reorder_point": round(float(row.reorder_point), 2),
+                "on_hand": int(row.on_hand),
+                "reserved": int(row.reserved),
+                "available": int(row.available),
+                "suggested_quantity": int(row.suggested_quantity),
+            }
+            for row in suggestions.itertuples(index=False)
+        ]
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e)) 
@@ -13,9 +13,11 @@ from models.viewModel.AccountsView import RoleView as TemplateView
 from models.Account import ModuleName as modules
 from models.Account import SuperAdminModuleName as superAdminModules
 from utils.auth_util import get_tenant, get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.model_converter_util import get_html_types
 from utils.util_functions import validate_name, parse_enum
 from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.conditional_util import conditional_get
 
 
 RoleRouter = rr = APIRouter()
@@ -42,6 +44,8 @@ role_modules = {
     "delete": ["Administrative"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"name": Role.name}, filters={"organization": Role.organization}))]
+
 #create role module permission
 modules_to_grant = [
     modules.administrative.value,
@@ -110,10 +114,11 @@ async def get_my_role(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Something went wrong")
     
-@rr.get(endpoint['get'])
+@rr.get(endpoint['get'], dependencies=[Depends(conditional_get("role", "role_module_permission", modules=role_modules['get']))])
 def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str
 ):
     try:  
@@ -125,9 +130,10 @@ def get_template(
             )
             
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
-        roles = session.exec(
+        roles = page.fetch(
+            session,
             select(db_model).where(db_model.organization.in_(organization_ids))
-        ).all()
+        )
         
         filtered_data = []                
         if not roles:
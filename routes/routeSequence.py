@@ -0,0 +1,135 @@
+import traceback
+from fastapi import Depends, HTTPException, APIRouter
+from typing import Annotated
+from sqlmodel import select, Session
+from db import get_session
+from models.RoutesAndVisits import Route, RoutePoint, Territory
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.route_sequence_util import optimize_routes, optimize_territory
+
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+RouteSequenceRouter = rr = APIRouter()
+
+endpoint_name = "route-sequence"
+db_model = RoutePoint
+
+endpoint = {
+    "get": f"/get-{endpoint_name}",
+    "optimize": f"/optimize-{endpoint_name}",
+    "optimize_territory": f"/optimize-territory-{endpoint_name}s",
+}
+
+role_modules = {   
+    "get": ["Route"],
+    "optimize": ["Route"],
+}
+
+
+def get_scoped(session: Session, current_user, model, id: int):
+    entry = session.get(model, id)
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+
+    if entry.organization not in get_organization_ids_by_scope_group(session, current_user):
+        raise HTTPException(status_code=403, detail="You Do not have the required privilege")
+
+    return entry
+
+
+@rr.get(endpoint['get'] + "/{id}")
+def get_template(
+    session: SessionDep, 
+    current_user: UserDep, 
+    tenant: str,
+    id: int,
+):
+    """
+    Points of sale of a route in visiting order, unsequenced points last.
+    """
+    try:  
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        route = get_scoped(session, current_user, Route, id)
+
+        route_points = session.exec(
+            select(db_model)
+            .where(db_model.route == route.id)
+            .order_by(db_model.sequence.is_(None), db_model.sequence, db_model.id)
+        ).all()
+
+        return [
+            {
+                "id": route_point.id,
+                "point_of_sale": route_point.point_of_sale,
+                "sequence": route_point.sequence,
+            }
+            for route_point in route_points
+        ]
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@rr.post(endpoint['optimize'] + "/{id}")
+def optimize_template(
+    session: SessionDep, 
+    current_user: UserDep, 
+    tenant: str,
+    id: int,
+):
+    try:  
+        if not check_permission(
+            session, "Update", role_modules['optimize'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        route = get_scoped(session, current_user, Route, id)
+        sequenced = optimize_routes(session, [route.id])
+
+        return {"message": f"{sequenced} route points sequenced"}
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@rr.post(endpoint['optimize_territory'] + "/{id}")
+def optimize_territory_template(
+    session: SessionDep, 
+    current_user: UserDep, 
+    tenant: str,
+    id: int,
+):
+    """
+    Sequences every route of a territory, routes are optimized in parallel worker processes.
+    """
+    try:  
+        if not check_permission(
+            session, "Update", role_modules['optimize'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        territory = get_scoped(session, current_user, Territory, id)
+        sequenced = optimize_territory(session, territory.id)
+
+        return {"message": f"{sequenced} route points sequenced"}
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
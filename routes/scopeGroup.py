@@ -10,9 +10,11 @@ from models.viewModel.AccountsView import ScopeGroupView as TemplateView, Update
 from models.Account import User, ScopeGroup, ScopeGroupLink, Organization, Gender, Scope, Role, AccessPolicy, IdType
 from utils.util_functions import validate_name, validate_email, validate_phone_number, parse_datetime_field, format_date_for_input, parse_enum
 from utils.auth_util import get_current_user, check_permission, check_permission_and_scope, add_organization_path, verify_password, get_password_hash, create_access_token, generate_random_password
+from utils.pagination_util import Page, paginate
 from utils.get_hierarchy import get_organization_ids_by_scope_group
 from utils.form_db_fetch import fetch_category_id_and_name, fetch_organization_id_and_name, fetch_id_and_name
 from utils.get_hierarchy import get_child_organization, get_organization_ids_by_scope_group, get_heirarchy
+from utils.conditional_util import conditional_get
 import traceback
 
 ScopeGroupRouter = sgr = APIRouter()
@@ -38,10 +40,13 @@ role_modules = {
     "delete": ["Administrative"],
 }
 
-@sgr.get(endpoint['get'])
+PageDep = Annotated[Page, Depends(paginate(ScopeGroup, sort_keys={"name": ScopeGroup.name}))]
+
+@sgr.get(endpoint['get'], dependencies=[Depends(conditional_get("organization", modules=role_modules['get']))])
 def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str
 ):
     try:  
@@ -60,12 +65,13 @@ def get_template(
         if not current_tenant:
             raise HTTPException(status_code=404, detail="Tenant organization not found")
 
-        entries_list = session.exec(
+        entries_list = page.fetch(
+            session,
             select(ScopeGroup)
             .join(ScopeGroupLink, ScopeGroup.id == ScopeGroupLink.scope_group)
             .where(ScopeGroup.tenant_id == current_tenant.id)
             .distinct()
-        ).all()
+        )
 
         
         if not entries_list:
@@ -0,0 +1,62 @@
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlmodel import Session
+import traceback
+from db import get_session
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.search_util import search_entities, search_names, SEARCH_LIMIT_DEFAULT, SEARCH_LIMIT_MAX
+
+SearchRouter = sr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint = {
+    "search": "/search",
+}
+
+# Modules granting Read on each searchable entity, as on the entity's own routes.
+role_modules = {
+    "product": ["Administrative", "Product"],
+    "user": ["Administrative"],
+    "organization": ["Administrative"],
+    "outlet": ["Point Of Sale"],
+}
+
+
+@sr.get(endpoint['search'] + "/{entity}")
+def search(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    entity: str,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(SEARCH_LIMIT_DEFAULT, ge=1, le=SEARCH_LIMIT_MAX),
+):
+    """
+    Typeahead matches of q among products, users, organizations or outlets in the user's scope.
+
+    Returns the same id / name pairs as the form lookups, best match first.
+    """
+    try:
+        if entity not in search_entities:
+            raise HTTPException(
+                status_code=404, detail=f"entity must be one of {', '.join(search_entities)}"
+            )
+        if not check_permission(
+            session, "Read", role_modules[entity], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+        if not q.strip():
+            return []
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+        return search_names(session, entity, q, organization_ids, limit)
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
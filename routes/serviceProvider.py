@@ -6,6 +6,7 @@ from sqlmodel import select, Session
 from db import get_session
 import traceback
 from utils.auth_util import verify_password, create_access_token, get_password_hash
+from utils.pagination_util import Page, paginate
 from utils.util_functions import validate_name, validate_email, validate_phone_number, parse_enum
 from utils.auth_util import get_current_user, check_permission, generate_random_password, get_tenant_hash, extract_username, add_organization_path
 from utils.model_converter_util import get_html_types
@@ -65,6 +66,8 @@ role_modules = {
     "delete": ["Service Provider"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"username": User.username}, filters={"organization": User.organization, "role": User.role}))]
+
 #Authentication Related
 @sr.get("/has-superadmin")
 def has_superadmin_created(
@@ -129,14 +132,16 @@ def login(
 def get(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str
 ):
     try:
         orgs_in_scope = check_permission_and_scope(session, "Read", role_modules['get'], current_user)
 
-        entries_list = session.exec(
+        entries_list = page.fetch(
+            session,
             select(db_model).where(db_model.organization.in_(orgs_in_scope["organization_ids"]))
-        ).all()
+        )
 
         return entries_list
 
@@ -8,14 +8,16 @@ from models.Warehouse import RequestStatus, RequestType, LogType, StockLog, Stoc
 from models.Account import AccessPolicy, Organization
 from models.Address import Address, Geolocation
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.model_converter_util import get_html_types
 from utils.util_functions import validate_name, parse_enum, parse_datetime_field, format_date_for_input
 from utils.form_db_fetch import fetch_organization_id_and_name, fetch_user_id_and_name, fetch_product_id_and_name,fetch_category_id_and_name, fetch_warehouse_id_and_name, fetch_vehicle_id_and_name, fetch_stocks_id_and_name, fetch_warehouse_group_id_and_name, fetch_admin_warehouse_id_and_name, fetch_address_id_and_name
-from utils.warehouse_util import check_warehouse_permission
+from utils.warehouse_util import check_warehouse_permission, get_warehouse_reservations
 from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.response_util import CompressedRoute, FastJSONResponse, fast_json
 from models.viewModel.WarehouseView import Stock as TemplateView
 
-StockRouter = sr = APIRouter()
+StockRouter = sr = APIRouter(route_class=CompressedRoute)
 SessionDep = Annotated[Session, Depends(get_session)]
 UserDep = Annotated[dict, Depends(get_current_user)]
 
@@ -39,6 +41,8 @@ role_modules = {
     "delete": ["Inventory Management"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(Stock, sort_keys={"quantity": Stock.quantity, "date_added": Stock.date_added}, filters={"product": Stock.product_id, "stock_type": Stock.stock_type}))]
+
 @sr.get(endpoint['get_form'])
 async def get_template_form(
     session: SessionDep,
@@ -116,9 +120,11 @@ async def create_template(
 
 #checked    
 @sr.get(endpoint['get']+ "/{id}")
+@fast_json
 async def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str,
     id: int
 
@@ -139,22 +145,27 @@ async def get_template(
             )
       
 
-        stocks = session.exec(select(Stock).where((Stock.warehouse_id==id))).all()
+        stocks = page.fetch(session, select(Stock).where((Stock.warehouse_id==id)))
+        reservations = get_warehouse_reservations(session, id)
     
 
         stock_list = []
         if stocks:
 
             for stock in stocks:
+                reservation = reservations.get((stock.product_id, stock.stock_type))
+                reserved = reservation.reserved if reservation else 0
                 stock_list.append({
                     "id": stock.id,
                     "warehouse": stock.warehouse.warehouse_name,
                     "product": stock.product.name,
                     "quantity": stock.quantity,
+                    "reserved": reserved,
+                    "available": stock.quantity - reserved,
                     "stock_type": stock.stock_type,
                     "date_added": format_date_for_input(stock.date_added)
                 })
-        return stock_list
+        return FastJSONResponse(stock_list, headers=page.headers)
 
     except Exception as e:
         traceback.print_exc()
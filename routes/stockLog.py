@@ -3,20 +3,22 @@ from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, Body, Path, status
 from sqlmodel import Session, select
 import traceback
-from collections import defaultdict
 from db import SECRET_KEY, get_session
 from models.Warehouse import RequestStatus, RequestType, LogType, StockLog, StockType, Warehouse, WarehouseGroup, WarehouseGroupLink, WarehouseStop, WarehouseStoreAdminLink, Stock, Vehicle
 from models.Account import AccessPolicy, Organization
 from models.Address import Address, Geolocation
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.model_converter_util import get_html_types
 from utils.util_functions import validate_name, parse_enum, parse_datetime_field, format_date_for_input
 from utils.form_db_fetch import fetch_organization_id_and_name, fetch_user_id_and_name, fetch_product_id_and_name,fetch_category_id_and_name, fetch_warehouse_id_and_name, fetch_vehicle_id_and_name, fetch_stocks_id_and_name, fetch_warehouse_group_id_and_name, fetch_admin_warehouse_id_and_name, fetch_address_id_and_name
 from utils.warehouse_util import check_warehouse_permission
+from utils.stock_movement_util import record_stock_movement
 from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.response_util import CompressedRoute, FastJSONResponse, fast_json
 from models.viewModel.WarehouseView import Stock as TemplateView
 
-StockLogRouter = sr = APIRouter()
+StockLogRouter = sr = APIRouter(route_class=CompressedRoute)
 SessionDep = Annotated[Session, Depends(get_session)]
 UserDep = Annotated[dict, Depends(get_current_user)]
 
@@ -40,6 +42,9 @@ role_modules = {
     "update": ["Inventory Management"],
     "delete": ["Inventory Management"],
 }
+
+# A page is a set of stock ids, the log lines of one stock id are listed together.
+PageDep = Annotated[Page, Depends(paginate(StockLog, filters={"product": StockLog.product_id, "log_type": StockLog.log_type, "request_type": StockLog.request_type, "stock_type": StockLog.stock_type}, key=StockLog.stock_id))]
     
 @sr.post(endpoint['create']+ "/{id}/{stock_id}")
 async def create_template(
@@ -76,6 +81,7 @@ async def create_template(
         )
 
         session.add(stock_log)
+        record_stock_movement(session, stock_log)
         session.commit()
         session.refresh(stock_log)
       
@@ -86,9 +92,11 @@ async def create_template(
         raise HTTPException(status_code=400, detail=str(e))
     
 @sr.get(endpoint['get'] + "/{id}")
+@fast_json
 async def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str,
     id: int
 
@@ -102,9 +110,14 @@ async def get_template(
                 status_code=403, detail="You Do not have the required privilege"
             )
     
-        stocks = session.exec(select(StockLog).where(StockLog.warehouse_id == id)).all()
+        stock_ids = page.fetch(session, select(StockLog.stock_id).where(StockLog.warehouse_id == id).distinct())
+        stocks = session.exec(
+            select(StockLog)
+            .where(StockLog.warehouse_id == id, StockLog.stock_id.in_(stock_ids))
+            .order_by(StockLog.id)
+        ).all()
 
-        grouped_stocks = defaultdict(list)
+        grouped_stocks = {stock_id: [] for stock_id in stock_ids}
 
         # Group by stock_id
         for stock in stocks:
@@ -138,7 +151,7 @@ async def get_template(
                 "log_type": "<br/><br/>".join(log_types),
                 "request_type": "<br/><br/>".join(request_types) if len(request_types) > 0 else ""
             })
-        return stock_list
+        return FastJSONResponse(stock_list, headers=page.headers)
 
     except Exception as e:
         traceback.print_exc()
@@ -217,9 +230,11 @@ async def update_template(
         )
 
         
+        record_stock_movement(session, existing_stock, -1)
         existing_stock.product_id =valid.product
         existing_stock.quantity = valid.quantity
         existing_stock.stock_type = valid.stock_type
+        record_stock_movement(session, existing_stock)
        
 
         session.add(existing_stock)
@@ -336,6 +351,7 @@ async def delete_template(
        
 
         
+        record_stock_movement(session, stock_log, -1)
         session.delete(stock_log)
         session.commit()
 
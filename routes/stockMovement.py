@@ -0,0 +1,116 @@
+from typing import Annotated, Optional
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import func
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.Warehouse import DailyStockMovement
+from models.Product_Category import Product
+from models.Dashboard import TimelineType
+from utils.auth_util import get_current_user, check_permission
+from utils.util_functions import parse_enum, parse_datetime_field, format_date_for_input
+from utils.warehouse_util import check_warehouse_permission
+from utils.response_util import CompressedRoute, fast_json
+
+StockMovementRouter = sr = APIRouter(route_class=CompressedRoute)
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint_name = "stock-movement"
+db_model = DailyStockMovement
+
+endpoint = {
+    "get": f"/get-{endpoint_name}s",
+}
+
+role_modules = {   
+    "get": ["Inventory Management"],
+}
+
+timeline_to_date_trunc = {
+    TimelineType.daily: "day",
+    TimelineType.weekly: "week",
+    TimelineType.monthly: "month",
+    TimelineType.yearly: "year",
+}
+
+
+@sr.get(endpoint['get'] + "/{id}")
+@fast_json
+async def get_stock_movements(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    product: Optional[int] = None,
+    timeline: Optional[str] = None,
+):
+    """
+    Stock movement history of a warehouse read from the daily rollup.
+
+    Quantities are summed per period (Daily, Weekly, Monthly or Yearly), product,
+    stock type and log type over the optional [start_date, end_date] range.
+    """
+  
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+        if not check_warehouse_permission(
+            session, "Read", id, current_user
+        ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        timeline_type = parse_enum(TimelineType, timeline, "Timeline") or TimelineType.daily
+        period = func.date_trunc(timeline_to_date_trunc[timeline_type], db_model.day).label("period")
+
+        statement = (
+            select(
+                period,
+                db_model.product_id,
+                Product.name,
+                db_model.stock_type,
+                db_model.log_type,
+                func.sum(db_model.quantity),
+                func.sum(db_model.movements),
+            )
+            .join(Product, Product.id == db_model.product_id)
+            .where(db_model.warehouse_id == id)
+            .group_by(period, db_model.product_id, Product.name, db_model.stock_type, db_model.log_type)
+            .order_by(period, Product.name)
+        )
+
+        start = parse_datetime_field(start_date)
+        end = parse_datetime_field(end_date)
+        if start:
+            statement = statement.where(db_model.day >= start.date())
+        if end:
+            statement = statement.where(db_model.day <= end.date())
+        if product:
+            statement = statement.where(db_model.product_id == product)
+
+        rows = session.exec(statement).all()
+
+        return [
+            {
+                "period": format_date_for_input(row[0]),
+                "product_id": row[1],
+                "product": row[2],
+                "stock_type": row[3],
+                "log_type": row[4],
+                "quantity": row[5],
+                "movements": row[6],
+            }
+            for row in rows
+        ]
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e)) 
@@ -7,11 +7,14 @@ from sqlmodel import select, Session
 from db import get_session
 import traceback
 from utils.auth_util import verify_password, create_access_token, get_password_hash
+from utils.pagination_util import Page, paginate
 from utils.util_functions import validate_name, validate_email, validate_phone_number, parse_enum
 from utils.auth_util import get_current_user, check_permission, generate_random_password, get_tenant_hash, extract_username, add_organization_path
 from utils.model_converter_util import get_html_types
 from utils.form_db_fetch import get_organization_ids_by_scope_group, fetch_organization_id_and_name, fetch_inheritance_group_id_and_name, fetch_address_id_and_name
 from utils.domain_util import getPath
+from utils.address_util import check_address
+from utils.blob_util import get_blob_url, get_thumbnail_url, store_request_image
 from utils.auth_util import check_permission_and_scope
 
 from models.Account import (
@@ -61,6 +64,8 @@ role_modules = {
     "delete": "Service Provider",
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"name": Organization.name}, filters={"active": Organization.active}))]
+
 @tr.get("/{tenant}/get-my-tenant/")
 async def get_my_tenant(
     session: SessionDep,
@@ -94,7 +99,7 @@ async def get_my_tenant(
             "id": organization.id,
             "organization": organization.name,
             "owner": organization.owner_name,
-            "logo": organization.logo_image,
+            "logo": get_blob_url(organization.logo_image),
         }
         
     except HTTPException as http_exc:
@@ -108,6 +113,7 @@ async def get_my_tenant(
 def get(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
 ):
     try:
         if not check_permission(
@@ -117,9 +123,10 @@ def get(
                 status_code=403, detail="You Do not have the required privilege"
             )
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
-        entries_list = session.exec(
+        entries_list = page.fetch(
+            session,
             select(db_model).where(db_model.id.in_(organization_ids), db_model.organization_type == "Company")
-        ).all()
+        )
         
         if not entries_list or entries_list is None:
             raise HTTPException(status_code=400, detail="No Tenants Created")
@@ -131,7 +138,7 @@ def get(
                 "tenant": tenant.name,
                 "owner": tenant.owner_name,
                 "description": tenant.description,
-                "logo": tenant.logo_image,
+                "logo": get_thumbnail_url(tenant.logo_image),
                 "domain": f"{Domain}/{tenant.tenant_hashed}",
                 "Status": tenant.active                
                 }
@@ -171,7 +178,7 @@ def get_by_Id_template(
             "id": entry.id,
             "name": entry.name,
             "owner_name": entry.owner_name,
-            "logo_image": entry.logo_image,
+            "logo_image": get_blob_url(entry.logo_image),
             "description": entry.description,
             "country": tenant_address.country if tenant_address else "",
             "city" : tenant_address.city if tenant_address else "",
@@ -271,15 +278,12 @@ def create_template(
         org_geolocation = None
         tenant_address = None
         if valid.country is not None and valid.city is not None:
-            tenant_address = Address(
+            tenant_address = check_address(session, Address(
                 country = valid.country,
                 city = valid.city,
                 sub_city = valid.sub_city,
                 woreda = valid.woreda
-            )
-            session.add(tenant_address)
-            session.commit()
-            session.refresh(tenant_address)
+            ))
 
         latitude = parse_float(valid.latitude)
         longitude = parse_float(valid.longitude)
@@ -300,7 +304,7 @@ def create_template(
             tenant_hashed = hashed_tenant_name,
             owner_name = valid.owner_name,
             description= valid.description,
-            logo_image=valid.logo_image,
+            logo_image=store_request_image(session, valid.logo_image, current_user, "logo image"),
             organization_type=OrganizationType.company.value,
             tenant_domain = f"{Domain}/{hashed_tenant_name}",
             parent_organization = None,
@@ -477,25 +481,14 @@ def update_template(
         new_tenant_address = None
         if valid.country is not None and valid.city is not None:
             exisitng_tenant_address = session.exec(select(Address).where(Address.id == selected_tenant.address)).first()  
-            if exisitng_tenant_address:
-                if valid.country:
-                    exisitng_tenant_address.country = valid.country
-                if valid.city:
-                    exisitng_tenant_address.city = valid.city,
-                if valid.sub_city:
-                    exisitng_tenant_address.sub_city = valid.sub_city,
-                if valid.woreda:
-                    exisitng_tenant_address.woreda = valid.woreda
-            else:
-                new_tenant_address = Address(
-                    country = valid.country,
-                    city = valid.city,
-                    sub_city = valid.sub_city,
-                    woreda = valid.woreda
-                )
-                session.add(new_tenant_address)
-                session.commit()
-                session.refresh(new_tenant_address)
+            # Address rows are shared by key, resolve the edited address instead of changing the row
+            new_tenant_address = check_address(session, Address(
+                country = valid.country or (exisitng_tenant_address.country if exisitng_tenant_address else None),
+                city = valid.city or (exisitng_tenant_address.city if exisitng_tenant_address else None),
+                sub_city = valid.sub_city or (exisitng_tenant_address.sub_city if exisitng_tenant_address else None),
+                woreda = valid.woreda or (exisitng_tenant_address.woreda if exisitng_tenant_address else None),
+                organization = exisitng_tenant_address.organization if exisitng_tenant_address else None,
+            ))
             
         if latitude is not None and longitude is not None:  
             exisitng_tenant_geolocation = session.exec(select(Geolocation).where(Geolocation.id == selected_tenant.geolocation)).first()  
@@ -512,7 +505,7 @@ def update_template(
                     name = f"{valid.name} location",
                     latitude = latitude,
                     longitude = longitude,
-                    address = new_tenant_address.id if new_tenant_address else exisitng_tenant_address.id,
+                    address_id = new_tenant_address.id if new_tenant_address else selected_tenant.address,
 
                 )
                 session.add(new_tenant_geolocation)
@@ -523,11 +516,13 @@ def update_template(
         selected_tenant.name = valid.name
         selected_tenant.owner_name = valid.owner_name
         selected_tenant.description= valid.description
-        selected_tenant.logo_image=valid.logo_image
+        selected_tenant.logo_image=store_request_image(session, valid.logo_image, current_user, "logo image")
         # selected_tenant.organization_type=OrganizationType.company.value
         # selected_tenant.parent_organization = None
-        selected_tenant.address = new_tenant_address.id if new_tenant_address else exisitng_tenant_address.id
-        selected_tenant.geolocation = new_tenant_geolocation.id if new_tenant_geolocation else exisitng_tenant_geolocation.id
+        if new_tenant_address:
+            selected_tenant.address = new_tenant_address.id
+        if new_tenant_geolocation:
+            selected_tenant.geolocation = new_tenant_geolocation.id
         if valid.landmark:
             selected_tenant.landmark = valid.landmark
     
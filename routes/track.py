@@ -0,0 +1,103 @@
+import traceback
+from fastapi import Depends, HTTPException, APIRouter, Query
+from typing import Annotated, Optional
+from sqlmodel import Session, or_, select
+from db import get_session
+from models.Account import User
+from models.RoutesAndVisits import Travel
+from models.viewModel.VisitView import TrackUpload as TemplateView
+from utils.auth_util import get_current_user, check_permission
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.track_util import get_track, ingest_track_points
+
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+TrackRouter = tr = APIRouter()
+
+endpoint_name = "travel-track"
+
+endpoint = {
+    "get": f"/get-{endpoint_name}",
+    "create": f"/upload-{endpoint_name}",
+}
+
+role_modules = {   
+    "get": ["Visit"],
+    "create": ["Visit"],
+}
+
+
+@tr.post(endpoint['create'])
+def create_template(
+    session: SessionDep, 
+    current_user: UserDep, 
+    tenant: str,
+    valid: TemplateView,
+):
+    """
+    Appends a batch of GPS points to a travel's track, re-sent points are ignored.
+    """
+    try:  
+        if not check_permission(
+            session, "Create", role_modules['create'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        travel = session.get(Travel, valid.travel)
+        if not travel:
+            raise HTTPException(status_code=404, detail="Travel not found")
+        if travel.employee != current_user.id:
+            raise HTTPException(status_code=403, detail="You can only upload tracks for your own travels")
+
+        try:
+            inserted = ingest_track_points(session, valid)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return {"message": "Track uploaded successfully", "points": inserted}
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
+
+
+@tr.get(endpoint['get'] + "/{id}")
+def get_template(
+    session: SessionDep, 
+    current_user: UserDep, 
+    tenant: str,
+    id: int,
+    tolerance_m: Annotated[Optional[float], Query(ge=0)] = 10,
+):
+    """
+    Track of one of the user's travels, or of an employee in the user's scope, as columns,
+    simplified to tolerance_m metres (0 returns every point).
+    """
+    try:  
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        organization_ids = get_organization_ids_by_scope_group(session, current_user)
+        # own travels, or travels of employees in the user's scope
+        travel = session.exec(
+            select(Travel.id)
+            .join(User, User.id == Travel.employee)
+            .where(Travel.id == id, or_(Travel.employee == current_user.id, User.organization.in_(organization_ids)))
+        ).first()
+        if not travel:
+            raise HTTPException(status_code=404, detail="Travel not found")
+
+        return get_track(session, id, tolerance_m)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Something went wrong")
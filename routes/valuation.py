@@ -0,0 +1,65 @@
+from typing import Annotated, Optional
+from fastapi import APIRouter, HTTPException, Depends
+from sqlmodel import Session
+import traceback
+from db import get_session
+from utils.auth_util import get_current_user, check_permission
+from utils.form_db_fetch import fetch_warehouse_id_and_name
+from utils.warehouse_util import check_warehouse_permission
+from utils.valuation_util import get_inventory_valuation
+
+ValuationRouter = vr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint_name = "inventory-valuation"
+
+endpoint = {
+    "get": f"/get-{endpoint_name}",
+}
+
+role_modules = {   
+    "get": ["Inventory Management"],
+}
+
+
+@vr.get(endpoint['get'])
+async def get_inventory_valuation_report(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    warehouse: Optional[int] = None,
+):
+    """
+    Stock value (quantity x price) per warehouse, category subtree and stock type.
+
+    Covers one warehouse, or every warehouse the user administers when none is given.
+    """
+  
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        if warehouse:
+            if not check_warehouse_permission(
+                session, "Read", warehouse, current_user
+            ):
+                raise HTTPException(
+                    status_code=403, detail="You Do not have the required privilege"
+                )
+            warehouse_ids = [warehouse]
+        else:
+            warehouse_ids = list(fetch_warehouse_id_and_name(session, current_user).keys())
+
+        if not warehouse_ids:
+            return {"warehouses": [], "total": 0}
+
+        return get_inventory_valuation(session, tenant, warehouse_ids)
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e)) 
@@ -1828,6 +1828,9 @@ async def update_warehouse_stop(
 
         if not warehouse_stop:
             raise HTTPException(status_code=404, detail="Warehouse stop not found")
+
+        if warehouse_stop.confirmed or warehouse_stop.request_status in (RequestStatus.in_transit, RequestStatus.received):
+            raise HTTPException(status_code=400, detail="Confirmed warehouse stops can not be updated")
         
         stock_data = session.exec(select(Stock).where(Stock.id == stock)).first()
 
@@ -1874,6 +1877,9 @@ async def delete_warehouse_stop(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Warehouse stop not found",
             )
+
+        if warehouse_stop.request_status in (RequestStatus.in_transit, RequestStatus.received):
+            raise HTTPException(status_code=400, detail="In transit or received warehouse stops can not be deleted")
  
         session.delete(warehouse_stop)
         session.commit()
@@ -7,6 +7,7 @@ from db import SECRET_KEY, get_session
 from models.Warehouse import WarehouseGroup, WarehouseGroupLink, WarehouseStoreAdminLink
 from models.Account import AccessPolicy, Organization
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.model_converter_util import get_html_types
 from utils.util_functions import parse_enum
 from utils.form_db_fetch import fetch_admin_warehouse_id_and_name
@@ -37,6 +38,8 @@ role_modules = {
     "delete": ["Administrative"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(db_model, sort_keys={"name": WarehouseGroup.name}, filters={"access_policy": WarehouseGroup.access_policy}))]
+
 @wr.get(endpoint['get_form'])
 async def get_template_form(
     session: SessionDep,
@@ -117,6 +120,7 @@ async def create_template(
 async def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str,
 
 ):
@@ -131,9 +135,10 @@ async def get_template(
         
         organization_ids = get_organization_ids_by_scope_group(session, current_user)
         
-        warehouse_groups = session.exec(
+        warehouse_groups = page.fetch(
+            session,
             select(db_model).where(db_model.organization_id.in_(organization_ids))
-        ).all()
+        )
 
         warehouse_group_list = []
 
@@ -8,6 +8,7 @@ from models.Warehouse import RequestStatus, RequestType, LogType, StockLog, Stoc
 from models.Account import AccessPolicy, Organization
 from models.Address import Address, Geolocation
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.model_converter_util import get_html_types
 from utils.util_functions import validate_name, parse_enum, parse_datetime_field, format_date_for_input
 from utils.form_db_fetch import fetch_organization_id_and_name, fetch_user_id_and_name, fetch_product_id_and_name,fetch_category_id_and_name, fetch_warehouse_id_and_name, fetch_vehicle_id_and_name, fetch_stocks_id_and_name, fetch_warehouse_group_id_and_name, fetch_admin_warehouse_id_and_name, fetch_address_id_and_name
@@ -40,6 +41,8 @@ role_modules = {
     "delete": ["Administrative"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(WarehouseGroup, sort_keys={"name": WarehouseGroup.name}))]
+
 @wr.get(endpoint['get_form'])
 async def get_template_form(
     session: SessionDep,
@@ -109,6 +112,7 @@ async def create_template(
 async def get_template(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str,
 
 ):
@@ -121,13 +125,14 @@ async def get_template(
                 status_code=403, detail="You Do not have the required privilege"
             )
         
-        warehouse_groups = session.exec(
+        warehouse_groups = page.fetch(
+            session,
             select(WarehouseGroup).where(
                 WarehouseGroup.id.in_(
                     select(WarehouseStoreAdminLink.warehouse_group_id)
                 )
             )
-        ).all()
+        )
 
         store_admin_list = []
 
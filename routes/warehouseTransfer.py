@@ -0,0 +1,291 @@
+from typing import Annotated, Any, Dict, List
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends
+from sqlmodel import Session, select
+import traceback
+from db import get_session
+from models.Warehouse import RequestStatus, RequestType, StockType, WarehouseStop
+from utils.auth_util import get_current_user, check_permission
+from utils.util_functions import parse_enum, format_date_for_input
+from utils.warehouse_util import check_warehouse_permission, hold_request_quantity, approve_warehouse_stop, confirm_warehouse_stop, receive_warehouse_stop
+from models.viewModel.WarehouseView import WarehouseTransfer as TemplateView
+
+WarehouseTransferRouter = wr = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+endpoint_name = "warehouse-transfer"
+db_model = WarehouseStop
+
+endpoint = {
+    "get_incoming": f"/get-incoming-{endpoint_name}s",
+    "get_by_id": f"/get-{endpoint_name}",
+    "create": f"/create-{endpoint_name}",
+    "approve": f"/approve-{endpoint_name}",
+    "dispatch": f"/dispatch-{endpoint_name}",
+    "receive": f"/receive-{endpoint_name}",
+}
+
+role_modules = {   
+    "get": ["Inventory Management", "Warehouse-stop"],
+    "create": ["Inventory Management", "Warehouse-stop"],
+    "update_status": ["Inventory Management"],
+    "confirm": ["Inventory Management", "Warehouse-stop"],
+}
+
+
+def get_transfer_lines(session: Session, stock_id: str) -> List[WarehouseStop]:
+    """
+    Returns every line of a two sided transfer, a transfer is the set of stops sharing a stock_id.
+    """
+    lines = session.exec(
+        select(WarehouseStop).where(
+            (WarehouseStop.stock_id == stock_id)
+            & (WarehouseStop.request_type == RequestType.transfer)
+            & (WarehouseStop.destination_warehouse_id.is_not(None))
+        ).order_by(WarehouseStop.id)
+    ).all()
+
+    if not lines:
+        raise HTTPException(status_code=404, detail="Warehouse transfer not found")
+
+    return lines
+
+
+def transfer_line_to_dict(line: WarehouseStop) -> Dict[str, Any]:
+    return {
+        "id": line.id,
+        "stock_id": line.stock_id,
+        "warehouse_name": line.warehouse.warehouse_name,
+        "destination_warehouse_name": line.destination_warehouse.warehouse_name,
+        "product": line.product_id,
+        "stock_type": line.stock_type,
+        "quantity": line.quantity,
+        "vehicle": line.vehicle.name if line.vehicle else "",
+        "request_status": line.request_status,
+        "request_date": format_date_for_input(line.request_date),
+        "approved_date": format_date_for_input(line.approve_date),
+        "dispatched_date": format_date_for_input(line.confirm_date),
+        "received_date": format_date_for_input(line.receive_date),
+    }
+
+
+def apply_transfer_action(session: Session, current_user, stock_id: str, warehouse_field: str, action) -> int:
+    """
+    Applies an action to every line of a transfer, all lines succeed together or none do.
+    """
+    lines = get_transfer_lines(session, stock_id)
+
+    if not check_warehouse_permission(
+        session, "Update", getattr(lines[0], warehouse_field), current_user
+    ):
+        raise HTTPException(
+            status_code=403, detail="You Do not have the required privilege"
+        )
+
+    for line in lines:
+        action(session, line, current_user)
+
+    session.commit()
+    return len(lines)
+
+
+@wr.post(endpoint['create'] + "/{stock_id}")
+async def create_warehouse_transfer(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    valid: TemplateView,
+    stock_id: str
+):
+
+    try:
+        if not check_permission(
+            session, "Create", role_modules['create'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+        if not check_warehouse_permission(
+            session, "Create", valid.warehouse, current_user
+        ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        if valid.warehouse == valid.destination_warehouse:
+            raise HTTPException(status_code=400, detail="Source and destination warehouse must be different")
+
+        if not valid.items:
+            raise HTTPException(status_code=400, detail="A transfer needs at least one item")
+
+        existing_transfer = session.exec(select(WarehouseStop.id).where(WarehouseStop.stock_id == stock_id)).first()
+        if existing_transfer is not None:
+            raise HTTPException(status_code=400, detail="Warehouse transfer already registered")
+
+        for item in valid.items:
+            if item.quantity <= 0:
+                raise HTTPException(status_code=400, detail="Transfer quantity must be greater than zero")
+
+            line = WarehouseStop(
+                id = None,
+                stock_id = stock_id,
+                requester_id = current_user.id,
+                request_type = RequestType.transfer,
+                request_date = datetime.now(),
+                request_status = RequestStatus.pending,
+                vehicle_id = valid.vehicle,
+                product_id = item.product,
+                warehouse_id = valid.warehouse,
+                destination_warehouse_id = valid.destination_warehouse,
+                quantity = item.quantity,
+                stock_type = parse_enum(StockType, item.stock_type, "Stock Type"),
+            )
+            session.add(line)
+            hold_request_quantity(session, line)
+
+        session.commit()
+
+        return {"message": "Warehouse transfer created successfully"}
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@wr.get(endpoint['get_by_id'] + "/{stock_id}")
+async def get_warehouse_transfer(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    stock_id: str
+):
+
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        lines = get_transfer_lines(session, stock_id)
+
+        if not (
+            check_warehouse_permission(session, "Read", lines[0].warehouse_id, current_user)
+            or check_warehouse_permission(session, "Read", lines[0].destination_warehouse_id, current_user)
+        ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        return [transfer_line_to_dict(line) for line in lines]
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@wr.get(endpoint['get_incoming'] + "/{id}")
+async def get_incoming_warehouse_transfers(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    id: int
+):
+
+    try:
+        if not check_permission(
+            session, "Read", role_modules['get'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+        if not check_warehouse_permission(
+            session, "Read", id, current_user
+        ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        lines = session.exec(
+            select(WarehouseStop).where(
+                (WarehouseStop.destination_warehouse_id == id)
+                & (WarehouseStop.request_status == RequestStatus.in_transit)
+            ).order_by(WarehouseStop.id)
+        ).all()
+
+        return [transfer_line_to_dict(line) for line in lines]
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@wr.put(endpoint['approve'] + "/{stock_id}")
+async def approve_warehouse_transfer(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    stock_id: str
+):
+
+    try:
+        if not check_permission(
+            session, "Read", role_modules['update_status'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        apply_transfer_action(session, current_user, stock_id, "warehouse_id", approve_warehouse_stop)
+
+        return "Warehouse transfer approved successfully"
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@wr.put(endpoint['dispatch'] + "/{stock_id}")
+async def dispatch_warehouse_transfer(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    stock_id: str
+):
+
+    try:
+        if not check_permission(
+            session, "Read", role_modules['confirm'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        apply_transfer_action(session, current_user, stock_id, "warehouse_id", confirm_warehouse_stop)
+
+        return "Warehouse transfer dispatched successfully"
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@wr.put(endpoint['receive'] + "/{stock_id}")
+async def receive_warehouse_transfer(
+    session: SessionDep,
+    current_user: UserDep,
+    tenant: str,
+    stock_id: str
+):
+
+    try:
+        if not check_permission(
+            session, "Read", role_modules['confirm'], current_user
+            ):
+            raise HTTPException(
+                status_code=403, detail="You Do not have the required privilege"
+            )
+
+        apply_transfer_action(session, current_user, stock_id, "destination_warehouse_id", receive_warehouse_stop)
+
+        return "Warehouse transfer received successfully"
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
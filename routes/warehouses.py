@@ -1,6 +1,6 @@
 from typing import Annotated, Any, Dict, List
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends, Body, Path, status
+from fastapi import APIRouter, HTTPException, Depends, Body, Path, Request, Response, status
 from sqlmodel import Session, select
 import traceback
 from db import SECRET_KEY, get_session
@@ -8,8 +8,11 @@ from models.Warehouse import RequestStatus, RequestType, LogType, StockLog, Stoc
 from models.Account import AccessPolicy, Organization
 from models.Address import Address, Geolocation
 from utils.auth_util import get_current_user, check_permission
+from utils.pagination_util import Page, paginate
 from utils.model_converter_util import get_html_types
 from utils.util_functions import validate_name, parse_enum, parse_datetime_field, format_date_for_input
+from utils.lookup_cache import get_lookup_etag, etag_matches
+from utils.conditional_util import conditional_get
 from utils.form_db_fetch import fetch_organization_id_and_name, fetch_user_id_and_name, fetch_product_id_and_name,fetch_category_id_and_name, fetch_warehouse_id_and_name, fetch_vehicle_id_and_name, fetch_stocks_id_and_name, fetch_warehouse_group_id_and_name, fetch_admin_warehouse_id_and_name, fetch_address_id_and_name
 from utils.warehouse_util import check_warehouse_permission
 from utils.get_hierarchy import get_organization_ids_by_scope_group
@@ -39,11 +42,15 @@ role_modules = {
     "delete": ["Administrative"],
 }
 
+PageDep = Annotated[Page, Depends(paginate(Warehouse, sort_keys={"warehouse_name": Warehouse.warehouse_name}, filters={"organization": Warehouse.organization_id}))]
+
 @wr.get(endpoint['get_form'])
 async def form_warehouse(
     session: SessionDep,
     current_user: UserDep,
-    tenant: str
+    tenant: str,
+    request: Request,
+    response: Response,
 ):
     try:
         if not check_permission(
@@ -52,6 +59,11 @@ async def form_warehouse(
             raise HTTPException(
                 status_code=403, detail="You Do not have the required privilege"
             )
+        etag = get_lookup_etag(session, current_user, fetch_organization_id_and_name, fetch_address_id_and_name)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
         
         
         warehouse_data = {
@@ -145,10 +157,11 @@ async def create_warehouse(
 
     
 
-@wr.get(endpoint['get'])
+@wr.get(endpoint['get'], dependencies=[Depends(conditional_get("warehouse", "warehouse_group", "warehouse_group_link", "warehouse_store_admin_link", modules=role_modules['get']))])
 async def get_warehouses(
     session: SessionDep,
     current_user: UserDep,
+    page: PageDep,
     tenant: str,
 
 ):
@@ -188,8 +201,7 @@ async def get_warehouses(
         )
 
 
-        warehouses = session.exec(statement).all()
-        print("warehouses",warehouses)
+        warehouses = page.fetch(session, statement)
 
         
         access_policy_order = {
@@ -0,0 +1,31 @@
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session, SQLModel, create_engine
+
+import utils.lookup_cache  # noqa: F401  registers the session events
+from models.Address import Address
+
+
+def make_session() -> Session:
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[Address.__table__])
+    return Session(engine)
+
+
+def test_core_statements_through_a_session_mark_their_table_changed():
+    session = make_session()
+    session.execute(insert(Address), [{"country": "Ethiopia", "city": "Addis Ababa", "sub_city": "Bole", "woreda": "03"}])
+    assert session.info["changed_tables"] == {"address"}
+
+
+def test_bulk_update_and_delete_mark_their_table_changed():
+    session = make_session()
+    session.execute(update(Address).where(Address.id == 1).values(city="Adama"))
+    session.execute(delete(Address).where(Address.id == 1))
+    assert session.info["changed_tables"] == {"address"}
+
+
+def test_rollback_discards_changed_tables():
+    session = make_session()
+    session.execute(insert(Address), [{"country": "Ethiopia", "city": "Addis Ababa", "sub_city": "Bole", "woreda": "03"}])
+    session.rollback()
+    assert "changed_tables" not in session.info
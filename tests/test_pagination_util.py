@@ -0,0 +1,71 @@
+from typing import Optional
+
+from fastapi import Response
+from sqlmodel import Field, Session, SQLModel, create_engine, select
+from starlette.requests import Request
+
+from utils.pagination_util import paginate
+
+
+class PagedItem(SQLModel, table=True):
+    __tablename__ = "paged_item"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+    brand: str
+
+
+def make_request(query_string: str = "") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": "/items",
+        "query_string": query_string.encode(),
+        "headers": [],
+    })
+
+
+def make_session() -> Session:
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[PagedItem.__table__])
+    session = Session(engine)
+    # duplicate names so the key breaks ties across page boundaries
+    session.add_all([PagedItem(name=f"item {index // 2:02d}", brand="acme" if index % 3 else "other") for index in range(25)])
+    session.commit()
+    return session
+
+
+get_page = paginate(PagedItem, sort_keys={"name": PagedItem.name}, filters={"brand": PagedItem.brand})
+
+
+def walk(session: Session, sort: str, query_string: str = "") -> list:
+    rows, cursor = [], None
+    while True:
+        response = Response()
+        page = get_page(make_request(query_string), response, limit=4, cursor=cursor, sort=sort, count=None)
+        rows.extend(page.fetch(session, select(PagedItem)))
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return rows
+
+
+def test_cursors_walk_string_sort_key_to_the_end():
+    session = make_session()
+    rows = walk(session, "name")
+    expected = session.exec(select(PagedItem).order_by(PagedItem.name, PagedItem.id)).all()
+    assert [row.id for row in rows] == [row.id for row in expected]
+
+
+def test_cursors_walk_descending_string_sort_key_to_the_end():
+    session = make_session()
+    rows = walk(session, "-name")
+    expected = session.exec(select(PagedItem).order_by(PagedItem.name.desc(), PagedItem.id.desc())).all()
+    assert [row.id for row in rows] == [row.id for row in expected]
+
+
+def test_string_filter():
+    session = make_session()
+    rows = walk(session, "name", "brand=other")
+    assert rows and all(row.brand == "other" for row in rows)
@@ -1,58 +1,156 @@
 
 """
-A function that will check whether the address is valid or not.
-And if the address was added previously, it will return the address id.
-And make the first letters capital of the city, sub_city, and landmark.
+Address normalization and insert-or-get.
+
+Every address is stored with its parts capitalized word by word and an `address_key`
+built from the organization and the lower cased parts. The key has a unique index, so
+`check_address` resolves an address to its row with a single INSERT ... ON CONFLICT ...
+RETURNING, concurrent creates of the same address return the same row instead of
+duplicating it.
+
+Address rows are shared by everything with the same key, so an edit never changes a row in
+place: the edited address is resolved with `check_address` and the editor's references are
+moved to it with `repoint_address`.
+
+Addresses stored before the key existed are keyed by the backfill, duplicates among
+them keep a NULL key and are reported:
+
+    python -m utils.address_util backfill
 """
 
 import re
-from typing import Annotated
+import sys
+from typing import Annotated, Dict, List
 
 from fastapi import Depends, HTTPException
-from sqlmodel import Session, and_, select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
 
 from db import get_session
-from models.Address import Address
+from models.Account import Organization, User
+from models.Address import Address, Geolocation
+from models.SalesAndTransactions import Penetration
+from models.Warehouse import Warehouse
 
 
 SessionDep = Annotated[Session, Depends(get_session)]
 
+ADDRESS_PARTS = ("country", "city", "sub_city", "woreda")
+
+# address column -> rows of organization_ids holding it
+address_references = [
+    (Organization.address, lambda organization_ids: Organization.id.in_(organization_ids)),
+    (User.address, lambda organization_ids: User.organization.in_(organization_ids)),
+    (Geolocation.address_id, lambda organization_ids: Geolocation.organization.in_(organization_ids)),
+    (Warehouse.address_id, lambda organization_ids: Warehouse.organization_id.in_(organization_ids)),
+    (Penetration.address, lambda organization_ids: Penetration.employee.in_(
+        select(User.id).where(User.organization.in_(organization_ids))
+    )),
+]
+
+
+def normalize_address_part(value: str) -> str:
+    if value is None:
+        return value
+    split = re.split(r"[,\s]+", value.strip())
+    return " ".join(item.capitalize() for item in split if item)
+
+
+def get_address_key(address: Address) -> str:
+    parts = [str(address.organization or 0)]
+    parts.extend((getattr(address, part) or "").lower() for part in ADDRESS_PARTS)
+    return "|".join(parts)
+
+
+def normalize_address(address: Address) -> Address:
+    for part in ADDRESS_PARTS:
+        setattr(address, part, normalize_address_part(getattr(address, part)))
+    address.address_key = get_address_key(address)
+    return address
+
+
+def upsert_addresses(session: Session, values: List[dict]) -> List[Address]:
+    statement = insert(Address).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["address_key"],
+        # no-op update so RETURNING also yields the rows that already existed
+        set_={"address_key": statement.excluded.address_key},
+    ).returning(Address)
+
+    return session.scalars(statement, execution_options={"populate_existing": True}).all()
+
 
-def check_address(session: SessionDep, address: Address):
+def check_address(session: SessionDep, address: Address) -> Address:
+    """
+    Returns the stored address matching address, inserting it when there is none.
+    """
     try:
+        normalize_address(address)
+        values = {part: getattr(address, part) for part in ADDRESS_PARTS}
+        values.update(organization=address.organization, address_key=address.address_key)
 
-        split = re.split(r"[,\s]+", address.city)
-        split = [item.capitalize() for item in split]
-        address.city = " ".join(split)
-
-        split = re.split(r"[,\s]+", address.sub_city)
-        split = [item.capitalize() for item in split]
-        address.sub_city = " ".join(split)
-
-        split = re.split(r"[,\s]+", address.woreda)
-        split = [item.capitalize() for item in split]
-        address.woreda = " ".join(split)
-
-        split = re.split(r"[,\s]+", address.landmark)
-        split = [item.capitalize() for item in split]
-        address.landmark = " ".join(split)
-
-        address_db = session.exec(
-            select(Address).where(
-                and_(
-                    Address.city == address.city,
-                    Address.sub_city == address.sub_city,
-                    Address.woreda == address.woreda,
-                    Address.landmark == address.landmark,
-                )
-            )
-        ).first()
-        if address_db:
-            return address_db
-        address.id = None
-        session.add(address)
+        address_db = upsert_addresses(session, [values])[0]
         session.commit()
-        session.refresh(address)
-        return address
+        return address_db
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+def repoint_address(session: Session, old_id: int, new_id: int, organization_ids: List[int]):
+    """
+    Moves the references to address old_id held by rows of organization_ids to new_id.
+
+    The old row is left as is for whatever else still points at it. Not committed.
+    """
+    for column, in_scope in address_references:
+        session.execute(
+            update(column.class_)
+            .where(column == old_id, in_scope(organization_ids))
+            .values({column.key: new_id})
+        )
+
+
+def backfill_address_keys(session: Session) -> Dict[str, int]:
+    """
+    Normalizes and keys every address without a key, the lowest id wins a duplicated key.
+
+    Returns:
+        dict: Number of addresses keyed and of duplicates left without a key.
+    """
+    taken = set(session.exec(select(Address.address_key).where(Address.address_key.is_not(None))).all())
+    addresses = session.exec(select(Address).where(Address.address_key.is_(None)).order_by(Address.id)).all()
+
+    updates = []
+    duplicates = 0
+    for address in addresses:
+        normalize_address(address)
+        if address.address_key in taken:
+            duplicates += 1
+            continue
+        taken.add(address.address_key)
+        updates.append({
+            "id": address.id,
+            "address_key": address.address_key,
+            **{part: getattr(address, part) for part in ADDRESS_PARTS},
+        })
+
+    session.expunge_all()
+    if updates:
+        session.execute(update(Address), updates)
+    session.commit()
+
+    return {"keyed": len(updates), "duplicates": duplicates}
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print("usage: python -m utils.address_util backfill")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        result = backfill_address_keys(session)
+
+    print(f"Keyed {result['keyed']} addresses, {result['duplicates']} duplicates left without a key")
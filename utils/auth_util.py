@@ -19,6 +19,7 @@ import random
 import re
 
 from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.batch_util import batch_context, cache_in_batch
 # from utils.form_db_fetch import fetch_id_and_name
 
 
@@ -97,6 +98,11 @@ def get_current_user(session: SessionDep,credentials: HTTPAuthorizationCredentia
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    context = batch_context.get()
+    if context is not None:
+        # sub-request of /batch, the batch already resolved its token
+        return context.user
+
     try:
         token = credentials.credentials
         if token.startswith("Bearer "):
@@ -120,6 +126,7 @@ def generate_random_password(length: int = 12) -> str:
     characters = string.ascii_letters + string.digits
     return ''.join(random.SystemRandom().choice(characters) for _ in range(length))
 
+@cache_in_batch
 def check_permission(
     session: Session,
     policy_type: str,
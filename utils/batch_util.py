@@ -0,0 +1,151 @@
+"""
+Composite requests: several GETs answered by one round trip.
+
+`run_batch` sends each sub-request through the application in-process (middleware,
+routing, validation and the endpoint's own permission checks all apply, nothing is
+re-implemented) while the batch supplies what every sub-request would otherwise redo:
+
+    batch_context  the user resolved once from the batch's token, returned by
+                   `get_current_user`, and a memo of `check_permission` results
+    batch_session  the Session `get_session` yields instead of opening a new one
+
+Sub-requests are read-only, so they are independent. They are spread over at most
+BATCH_WORKERS workers running concurrently, each working through its share in order on
+one Session, the first worker on the batch request's own. A Session (and the connection
+under it) serves one query at a time, so concurrent sub-requests cannot share one. The
+Session is rolled back after each sub-request so a failed one does not carry over to the
+next:
+
+    [{"id": "me", "path": "/acme/account/my-user"}, {"id": "roles", "path": "/acme/role/get-roles", "query": {"limit": 20}}]
+"""
+
+import asyncio
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import orjson
+
+
+BATCH_SIZE_MAX = 20
+BATCH_WORKERS = 4
+# Returned with each sub-response, the rest of its headers are dropped.
+BATCH_HEADERS = {b"etag", b"x-next-cursor", b"x-total-count", b"x-estimated-count", b"link"}
+# Not forwarded to sub-requests, they describe the batch body or would compress sub-responses.
+SKIPPED_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"transfer-encoding"}
+
+
+class BatchContext:
+    """Auth state shared by the sub-requests of one batch."""
+
+    def __init__(self, user):
+        self.user = user
+        self.permissions: Dict[tuple, bool] = {}
+
+
+batch_context: ContextVar[Optional[BatchContext]] = ContextVar("batch_context", default=None)
+batch_session: ContextVar = ContextVar("batch_session", default=None)
+
+
+def cache_in_batch(check_permission: Callable):
+    """Memoizes a `check_permission(session, policy_type, endpoint_groups, user)` for the current batch."""
+    @wraps(check_permission)
+    def wrapper(session, policy_type, endpoint_groups, user):
+        context = batch_context.get()
+        if context is None:
+            return check_permission(session, policy_type, endpoint_groups, user)
+
+        groups = (endpoint_groups,) if isinstance(endpoint_groups, str) else tuple(endpoint_groups or ())
+        key = (policy_type, groups, getattr(user, "id", None))
+        if key not in context.permissions:
+            context.permissions[key] = check_permission(session, policy_type, endpoint_groups, user)
+        return context.permissions[key]
+
+    return wrapper
+
+
+async def dispatch(app, scope: dict, headers: List[Tuple[bytes, bytes]], path: str, query: Optional[dict]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Runs GET path through app in-process, returns status, headers and body."""
+    query_string = urlencode(query or {}, doseq=True)
+    sub_scope = {
+        "type": "http",
+        "asgi": scope.get("asgi", {"version": "3.0"}),
+        "http_version": scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": scope.get("scheme", "http"),
+        "server": scope.get("server"),
+        "client": scope.get("client"),
+        "root_path": scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "headers": headers,
+    }
+
+    response = {"status": 500, "headers": [], "body": []}
+    finished = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Middleware listening for a disconnect must not see one before the response is done.
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        await app(sub_scope, receive, send)
+    finally:
+        finished.set()
+    return response["status"], response["headers"], b"".join(response["body"])
+
+
+def encode_result(id, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> bytes:
+    """One entry of the batch response, a JSON body is spliced in as is rather than re-parsed."""
+    kept = {name.decode().lower(): value.decode() for name, value in headers if name.lower() in BATCH_HEADERS}
+    content_type = next((value for name, value in headers if name.lower() == b"content-type"), b"")
+    if not content_type.startswith(b"application/json") or not body:
+        body = orjson.dumps(body.decode("utf-8", "replace") if body else None)
+
+    envelope = orjson.dumps({"id": id, "status": status, "headers": kept})
+    return envelope[:-1] + b',"body":' + body + b"}"
+
+
+async def run_batch(app, scope: dict, requests: List[dict], context: BatchContext, sessions: list) -> bytes:
+    """
+    Answers requests ({"id", "path", "query"}) with one worker per session, returns the
+    JSON array of results in request order.
+    """
+    headers = [(name, value) for name, value in scope["headers"] if name.lower() not in SKIPPED_HEADERS]
+    results: List[Optional[bytes]] = [None] * len(requests)
+
+    async def work(session, indices):
+        batch_context.set(context)
+        batch_session.set(session)
+        for index in indices:
+            request = requests[index]
+            try:
+                status, response_headers, body = await dispatch(app, scope, headers, request["path"], request.get("query"))
+            except Exception:
+                status, response_headers, body = 500, [(b"content-type", b"application/json")], b'{"detail":"Something went wrong"}'
+            # sub-requests only read, and a failed query (often answered as a 400) aborts the
+            # transaction, so every sub-request starts the next one on a fresh transaction
+            session.rollback()
+            id = request.get("id")
+            results[index] = encode_result(index if id is None else id, status, response_headers, body)
+
+    workers = [list(range(start, len(requests), len(sessions))) for start in range(len(sessions))]
+    await asyncio.gather(*[work(session, indices) for session, indices in zip(sessions, workers) if indices])
+    return b"[" + b",".join(results) + b"]"
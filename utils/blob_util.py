@@ -0,0 +1,411 @@
+"""
+Content addressed blob store for images and deposit slips.
+
+Blobs are keyed by the SHA-256 of their bytes, so storing the same image twice writes
+it once. Rows only keep the hex digest and `get_blob_url` turns it into the download URL
+served by `routes/blob.py` (`get_thumbnail_url` for the resized copies, see
+`utils.thumbnail_util`). The bytes live in a pluggable backend, `LocalBlobBackend`
+keeps them under BLOB_ROOT as <aa>/<bb>/<digest> and publishes each file with an atomic
+rename, so a reader never sees a partial blob.
+
+Writes stream through `BlobWriter`, which hashes and spools chunks to a temporary file
+instead of buffering the whole upload in memory.
+
+A blob belongs to no one, the same bytes may be shared by several tenants, so it is served
+to, and may be saved in a row by, a user who uploaded it or who can see a row referencing
+it (`is_blob_in_scope`).
+
+`migrate_inline_blobs` moves the base64 values still stored inline in Product.image,
+Organization.logo_image, User.image and Deposit.deposit_slip into the store:
+
+    python -m utils.blob_util migrate
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, or_, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from models.Account import Organization, User
+from models.FinanceModule import Deposit
+from models.Product_Category import Product, ProductLink
+from models.Utils import Blob, BlobUpload
+from utils.get_hierarchy import get_organization_ids_by_scope_group
+from utils.thumbnail_util import DEFAULT_THUMBNAIL_SIZE, THUMBNAIL_URL, schedule_thumbnails
+
+
+BLOB_ROOT = os.getenv("BLOB_ROOT", "blobs")
+MAX_BLOB_SIZE = 20 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+BLOB_URL = "/blob/get-blob/{digest}"
+MIGRATION_BATCH_SIZE = 100
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+DATA_URL_PATTERN = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?(?:;[\w=.-]+)*;base64,(.*)$", re.DOTALL)
+
+MAGIC_NUMBERS = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"%PDF", "application/pdf"),
+)
+
+
+class LocalBlobBackend:
+    """Blobs as files on local disk."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def size(self, digest: str) -> int:
+        return os.path.getsize(self.path(digest))
+
+    def open_temp(self):
+        """Returns (file, name) of a temporary file on the same filesystem as the blobs."""
+        directory = os.path.join(self.root, "tmp")
+        os.makedirs(directory, exist_ok=True)
+        temp = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+        return temp, temp.name
+
+    def publish(self, temp_name: str, digest: str):
+        """Moves a finished temporary file into place, or drops it if the blob exists."""
+        if self.exists(digest):
+            os.remove(temp_name)
+            return
+        os.makedirs(os.path.dirname(self.path(digest)), exist_ok=True)
+        os.replace(temp_name, self.path(digest))
+
+    def discard(self, temp_name: str):
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+
+    def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yields the bytes start..end (inclusive) of a blob in CHUNK_SIZE pieces."""
+        with open(self.path(digest), "rb") as blob:
+            blob.seek(start)
+            remaining = (end if end is not None else self.size(digest) - 1) - start + 1
+            while remaining > 0:
+                chunk = blob.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+_backend = LocalBlobBackend(BLOB_ROOT)
+
+
+def get_blob_backend():
+    return _backend
+
+
+def set_blob_backend(backend):
+    """Replaces the storage backend, any object with the LocalBlobBackend methods works."""
+    global _backend
+    _backend = backend
+
+
+class BlobWriter:
+    """Hashes and spools a blob chunk by chunk, `save` publishes it."""
+
+    def __init__(self):
+        self.backend = get_blob_backend()
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.file, self.temp_name = self.backend.open_temp()
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > MAX_BLOB_SIZE:
+            self.abort()
+            raise ValueError(f"Blob is larger than {MAX_BLOB_SIZE} bytes")
+        if len(self.head) < 16:
+            self.head += chunk[:16]
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+
+    def abort(self):
+        self.file.close()
+        self.backend.discard(self.temp_name)
+
+    def save(self, session: Session, content_type: Optional[str] = None, uploader: Optional[int] = None) -> str:
+        """
+        Publishes the blob and records it with its uploader, the caller commits. Image
+        content types are taken from the bytes rather than the client's claim.
+
+        Returns:
+            str: SHA-256 hex digest of the blob.
+        """
+        self.file.close()
+        if self.size == 0:
+            self.backend.discard(self.temp_name)
+            raise ValueError("Blob is empty")
+
+        digest = self.hasher.hexdigest()
+        sniffed = sniff_content_type(self.head)
+        # only bytes that look like an image are thumbnailed and served as one
+        if not content_type or content_type.startswith("image/") or sniffed.startswith("image/"):
+            content_type = sniffed
+        self.backend.publish(self.temp_name, digest)
+
+        session.execute(
+            insert(Blob)
+            .values(hash=digest, content_type=content_type, size=self.size)
+            .on_conflict_do_nothing(index_elements=["hash"])
+        )
+        if uploader is not None:
+            session.execute(
+                insert(BlobUpload)
+                .values(hash=digest, user=uploader)
+                .on_conflict_do_nothing(index_elements=["hash", "user"])
+            )
+        schedule_thumbnails(self.backend.root, self.backend.path(digest), digest, content_type)
+        return digest
+
+
+def sniff_content_type(head: bytes) -> str:
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def store_blob_bytes(session: Session, data: bytes, content_type: Optional[str] = None, uploader: Optional[int] = None) -> str:
+    writer = BlobWriter()
+    for start in range(0, len(data), CHUNK_SIZE):
+        writer.write(data[start:start + CHUNK_SIZE])
+    return writer.save(session, content_type, uploader)
+
+
+def decode_data_url(value: str) -> Tuple[bytes, Optional[str]]:
+    """
+    Decodes a `data:<type>;base64,...` URL or a bare base64 string.
+
+    Raises:
+        ValueError: When the value is not valid base64.
+    """
+    match = DATA_URL_PATTERN.match(value.strip())
+    content_type, payload = (match.group(1), match.group(2)) if match else (None, value)
+    try:
+        return base64.b64decode("".join(payload.split()), validate=True), content_type
+    except binascii.Error:
+        raise ValueError("Invalid base64 data")
+
+
+def is_blob_digest(value) -> bool:
+    return isinstance(value, str) and DIGEST_PATTERN.match(value) is not None
+
+
+# blob column -> rows of organization_ids, or of the user themselves, referencing it
+blob_references = [
+    (Product.image, lambda organization_ids, user: or_(
+        Product.organization.in_(organization_ids),
+        Product.id.in_(
+            select(ProductLink.product_id).where(
+                ProductLink.inheritance_group_id == select(Organization.inheritance_group)
+                .where(Organization.id == user.organization)
+                .scalar_subquery()
+            )
+        ),
+    )),
+    (Organization.logo_image, lambda organization_ids, user: or_(
+        Organization.id.in_(organization_ids), Organization.id == user.organization
+    )),
+    (User.image, lambda organization_ids, user: or_(User.organization.in_(organization_ids), User.id == user.id)),
+    (Deposit.deposit_slip, lambda organization_ids, user: or_(
+        Deposit.organization.in_(organization_ids), Deposit.sales_representative == user.id
+    )),
+]
+
+
+def is_blob_in_scope(session: Session, digest: str, organization_ids, user) -> bool:
+    """Whether the user uploaded the digest or a row visible to them (see `blob_references`) holds it."""
+    if session.get(BlobUpload, (digest, user.id)) is not None:
+        return True
+    for column, in_scope in blob_references:
+        statement = select(column).where(column == digest, in_scope(organization_ids, user)).limit(1)
+        if session.exec(statement).first() is not None:
+            return True
+    return False
+
+
+def store_image_field(session: Session, value: Optional[str], user=None) -> Optional[str]:
+    """
+    Normalizes an image field of a create/update request to a blob digest.
+
+    Accepts the digest or blob URL of a stored blob (returned as the digest), which the
+    user, when given, must have uploaded or be able to see, or an inline base64 / data URL
+    value, which is stored first. Empty values are returned unchanged.
+
+    Raises:
+        ValueError: When the value is not valid base64 or names a blob the user may not use.
+    """
+    if not value:
+        return value
+
+    digest = value.rstrip("/").rsplit("/", 1)[-1]
+    if is_blob_digest(value) or (BLOB_URL.format(digest="") in value and is_blob_digest(digest)):
+        if not session.get(Blob, digest) or (user is not None and not is_blob_in_scope(
+            session, digest, get_organization_ids_by_scope_group(session, user), user
+        )):
+            raise ValueError("Blob not found")
+        return digest
+
+    data, content_type = decode_data_url(value)
+    return store_blob_bytes(session, data, content_type, getattr(user, "id", None))
+
+
+def store_request_image(session: Session, value: Optional[str], current_user, field: str = "image") -> Optional[str]:
+    """`store_image_field` for request handlers, invalid data or an unusable blob is a 400."""
+    try:
+        return store_image_field(session, value, current_user)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}")
+
+
+def get_blob_url(value: Optional[str]) -> Optional[str]:
+    """Download URL of a stored digest, values not yet migrated are returned as they are."""
+    if is_blob_digest(value):
+        return BLOB_URL.format(digest=value)
+    return value
+
+
+def get_thumbnail_url(value: Optional[str], size: str = DEFAULT_THUMBNAIL_SIZE) -> Optional[str]:
+    """Thumbnail URL of a stored digest, values not yet migrated are returned as they are."""
+    if is_blob_digest(value):
+        return THUMBNAIL_URL.format(digest=value, size=size)
+    return value
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single `bytes=` range into inclusive (start, end) offsets.
+
+    Returns None when the whole blob should be sent (no header, or several ranges).
+
+    Raises:
+        ValueError: When the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def migrate_column(session: Session, model, column) -> int:
+    """Moves inline values of a text column into the store, one batch per commit."""
+    ids = session.exec(
+        select(model.id).where(column.is_not(None), column != "", func.length(column) != 64)
+    ).all()
+
+    moved = 0
+    for start in range(0, len(ids), MIGRATION_BATCH_SIZE):
+        rows = session.exec(
+            select(model.id, column).where(model.id.in_(ids[start:start + MIGRATION_BATCH_SIZE]))
+        ).all()
+
+        updates = []
+        for row_id, value in rows:
+            try:
+                updates.append({"id": row_id, column.key: store_image_field(session, value)})
+            except ValueError:
+                print(f"Skipping {model.__tablename__} {row_id}: not base64")
+
+        if updates:
+            session.execute(update(model), updates)
+        session.commit()
+        moved += len(updates)
+
+    return moved
+
+
+def migrate_deposit_slips(session: Session) -> int:
+    """
+    Moves `deposit.deposit_slip` from bytea to a digest column.
+
+    The slips are read and stored before the column type changes, and the type change and
+    the new digests commit together, so a failed run leaves the table untouched.
+    """
+    column_type = session.execute(text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = 'deposit' AND column_name = 'deposit_slip'"
+    )).scalar()
+    if column_type != "bytea":
+        return 0
+
+    ids = session.execute(text("SELECT id FROM deposit WHERE deposit_slip IS NOT NULL")).scalars().all()
+
+    digests = []
+    for start in range(0, len(ids), MIGRATION_BATCH_SIZE):
+        rows = session.execute(
+            text("SELECT id, deposit_slip FROM deposit WHERE id = ANY(:ids)"),
+            {"ids": ids[start:start + MIGRATION_BATCH_SIZE]},
+        ).all()
+        for row_id, slip in rows:
+            # Slips were saved as the bytes of the base64 text the client sent.
+            try:
+                data, content_type = decode_data_url(bytes(slip).decode("ascii"))
+            except (UnicodeDecodeError, ValueError):
+                data, content_type = bytes(slip), None
+            digests.append({"slip_id": row_id, "digest": store_blob_bytes(session, data, content_type)})
+
+    session.execute(text("ALTER TABLE deposit ALTER COLUMN deposit_slip TYPE varchar(64) USING NULL"))
+    if digests:
+        session.execute(text("UPDATE deposit SET deposit_slip = :digest WHERE id = :slip_id"), digests)
+    session.commit()
+
+    return len(digests)
+
+
+def migrate_inline_blobs(session: Session) -> dict:
+    return {
+        "product.image": migrate_column(session, Product, Product.image),
+        "organization.logo_image": migrate_column(session, Organization, Organization.logo_image),
+        "users.image": migrate_column(session, User, User.image),
+        "deposit.deposit_slip": migrate_deposit_slips(session),
+    }
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("usage: python -m utils.blob_util migrate")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        moved = migrate_inline_blobs(session)
+
+    for column, count in moved.items():
+        print(f"Moved {count} values of {column}")
@@ -0,0 +1,65 @@
+"""
+Conditional GET (ETag / If-None-Match) for list endpoints.
+
+`conditional_get` builds a route dependency that derives an ETag from the change counters
+of the tables a list reads (see `utils.lookup_cache`), qualified by tenant, path, query
+string and the user's scope. When the client already holds that ETag the dependency
+answers 304 before the endpoint runs, so the list is never queried or serialized.
+Otherwise the ETag is attached to the normal response.
+
+    @pr.get(endpoint['get'], dependencies=[Depends(conditional_get("product", modules=role_modules['get']))])
+"""
+
+from typing import Annotated, List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlmodel import Session
+
+from db import get_session
+from utils.auth_util import get_current_user, check_permission
+from utils.lookup_cache import SCOPE_TABLES, etag_matches, get_version_etag
+
+SessionDep = Annotated[Session, Depends(get_session)]
+UserDep = Annotated[dict, Depends(get_current_user)]
+
+# Clients may keep the payload but must revalidate it on every use.
+CACHE_CONTROL = "private, no-cache"
+
+
+def conditional_get(*tables: str, modules: Optional[List[str]] = None):
+    """
+    Route dependency answering 304 while none of tables changed.
+
+    Args:
+        *tables (str): Tables the endpoint's payload is built from, the scope tables are
+            always added.
+        modules (Optional[List[str]]): Role modules needing Read access before a 304 is
+            sent, so the status never discloses data to users the endpoint would refuse.
+    """
+    tables = tables + SCOPE_TABLES
+
+    def check_not_modified(
+        request: Request,
+        response: Response,
+        session: SessionDep,
+        current_user: UserDep,
+    ):
+        etag = get_version_etag(
+            session,
+            tables,
+            request.url.path,
+            str(request.query_params),
+            current_user.id,
+            current_user.scope_group,
+            current_user.organization,
+        )
+
+        if etag_matches(request.headers.get("if-none-match"), etag) and (
+            modules is None or check_permission(session, "Read", modules, current_user)
+        ):
+            raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
+    return check_not_modified
@@ -0,0 +1,127 @@
+"""
+Call coverage rollup.
+
+`daily_call_coverage` holds one row per (day, employee, route) with the planned calls
+(route points x schedules), the route points actually visited, the productive calls
+(route points visited with a sale) and all visits. `refresh_call_coverage` rebuilds a window
+of days with one grouped INSERT ... SELECT over schedules and visits, re-run it over
+the affected days when visits arrive late:
+
+    python -m utils.coverage_util refresh recent        # last REFRESH_WINDOW_DAYS days
+    python -m utils.coverage_util refresh [YYYY-MM-DD]  # from a day, or everything
+"""
+
+import sys
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, case, delete, func, literal, true, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from models.RoutesAndVisits import DailyCallCoverage, RoutePoint, RouteSchedule, Travel, Visit
+
+
+COVERAGE_KEY = ["day", "employee", "route"]
+COVERAGE_MEASURES = ["planned", "completed", "productive", "visits"]
+REFRESH_WINDOW_DAYS = 3
+
+
+def in_window(day, start: Optional[date], end: Optional[date]):
+    conditions = []
+    if start is not None:
+        conditions.append(day >= start)
+    if end is not None:
+        conditions.append(day <= end)
+    return and_(true(), *conditions)
+
+
+def get_planned_rows(start: Optional[date], end: Optional[date]):
+    day = func.date(RouteSchedule.date)
+
+    return (
+        select(
+            day.label("day"),
+            RouteSchedule.employee.label("employee"),
+            RouteSchedule.route.label("route"),
+            func.count(RoutePoint.id).label("planned"),
+            literal(0).label("completed"),
+            literal(0).label("productive"),
+            literal(0).label("visits"),
+        )
+        .join(RoutePoint, RoutePoint.route == RouteSchedule.route)
+        .where(in_window(day, start, end))
+        .group_by(day, RouteSchedule.employee, RouteSchedule.route)
+    )
+
+
+def get_visited_rows(start: Optional[date], end: Optional[date]):
+    day = func.date(Travel.date)
+
+    return (
+        select(
+            day.label("day"),
+            Travel.employee.label("employee"),
+            Travel.route.label("route"),
+            literal(0).label("planned"),
+            func.count(func.distinct(RoutePoint.point_of_sale)).label("completed"),
+            func.count(func.distinct(case((Visit.sales.is_not(None) & RoutePoint.id.is_not(None), Visit.point_of_sale)))).label("productive"),
+            func.count(Visit.id).label("visits"),
+        )
+        .join(Travel, Travel.id == Visit.travel)
+        .outerjoin(
+            RoutePoint,
+            (RoutePoint.route == Travel.route) & (RoutePoint.point_of_sale == Visit.point_of_sale),
+        )
+        .where(in_window(day, start, end))
+        .group_by(day, Travel.employee, Travel.route)
+    )
+
+
+def refresh_call_coverage(session: Session, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """
+    Rebuilds the call coverage rollup for [start, end].
+
+    Args:
+        session (Session): DB session, committed by this function.
+        start (Optional[date]): First day to rebuild, open ended when None.
+        end (Optional[date]): Last day to rebuild, open ended when None.
+
+    Returns:
+        int: Number of coverage rows written.
+    """
+    calls = union_all(get_planned_rows(start, end), get_visited_rows(start, end)).subquery()
+
+    rows = select(
+        *[calls.c[column] for column in COVERAGE_KEY],
+        *[func.sum(calls.c[column]) for column in COVERAGE_MEASURES],
+    ).group_by(*[calls.c[column] for column in COVERAGE_KEY])
+
+    session.execute(delete(DailyCallCoverage).where(in_window(DailyCallCoverage.day, start, end)))
+    result = session.execute(
+        insert(DailyCallCoverage).from_select(COVERAGE_KEY + COVERAGE_MEASURES, rows)
+    )
+    session.commit()
+
+    return result.rowcount
+
+
+def refresh_recent_call_coverage(session: Session, days: int = REFRESH_WINDOW_DAYS) -> int:
+    return refresh_call_coverage(session, date.today() - timedelta(days=days))
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "refresh":
+        print("usage: python -m utils.coverage_util refresh [recent | YYYY-MM-DD]")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        if len(sys.argv) > 2 and sys.argv[2] == "recent":
+            written = refresh_recent_call_coverage(session)
+        else:
+            start = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+            written = refresh_call_coverage(session, start)
+
+    print(f"Wrote {written} daily call coverage rows")
@@ -0,0 +1,179 @@
+"""
+Daily sales rollup behind the dashboard.
+
+`daily_sales_summary` holds one row per (day, organization, territory, route, employee)
+with sales, cash/credit, presales and order totals. `refresh_sales_summary` rebuilds
+a window of days from `sale` and `order` with one grouped INSERT ... SELECT, so late
+or edited sales are picked up by re-running it over the affected days. Weekly, monthly
+and yearly figures are `date_trunc` aggregates over the daily rows.
+
+Schedule the incremental refresh (last few days) regularly and run a full rebuild once
+after deploying the table:
+
+    python -m utils.dashboard_util refresh recent        # last REFRESH_WINDOW_DAYS days
+    python -m utils.dashboard_util refresh [YYYY-MM-DD]  # from a day, or everything
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import case, delete, exists, func, literal, or_, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from models.Dashboard import DailySalesSummary, Filter, TimelineType
+from models.PointOfSale import PointOfSale
+from models.RoutesAndVisits import Route
+from models.SalesAndTransactions import Order, Sale, SalesStates, SalesType
+
+
+SUMMARY_KEY = ["day", "organization", "territory", "route", "employee"]
+SUMMARY_MEASURES = [
+    "sales", "gross_sales", "quantity", "sales_count", "cash", "credit",
+    "presales", "orders", "order_quantity", "order_count",
+]
+REFRESH_WINDOW_DAYS = 3
+
+timeline_to_date_trunc = {
+    TimelineType.daily: "day",
+    TimelineType.weekly: "week",
+    TimelineType.monthly: "month",
+    TimelineType.yearly: "year",
+}
+
+
+def get_sales_rows(start: Optional[date]):
+    day = func.date(Sale.date)
+    is_presale = exists().where(Order.sales == Sale.id)
+
+    rows = (
+        select(
+            day.label("day"),
+            PointOfSale.organization.label("organization"),
+            Route.territory.label("territory"),
+            Sale.route.label("route"),
+            Sale.employee.label("employee"),
+            Sale.total_sales.label("sales"),
+            Sale.gross_sales.label("gross_sales"),
+            Sale.total_quantity.label("quantity"),
+            literal(1).label("sales_count"),
+            case((Sale.sales_type == SalesType.Credit, 0), else_=Sale.total_sales).label("cash"),
+            case((Sale.sales_type == SalesType.Credit, Sale.total_sales), else_=0).label("credit"),
+            case((is_presale, Sale.total_sales), else_=0).label("presales"),
+            literal(0).label("orders"),
+            literal(0).label("order_quantity"),
+            literal(0).label("order_count"),
+        )
+        .join(PointOfSale, PointOfSale.id == Sale.point_of_sale)
+        .join(Route, Route.id == Sale.route)
+        .where(or_(Sale.status.is_(None), Sale.status != SalesStates.void))
+    )
+    if start is not None:
+        rows = rows.where(day >= start)
+    return rows
+
+
+def get_order_rows(start: Optional[date]):
+    day = func.date(Order.date)
+
+    rows = (
+        select(
+            day.label("day"),
+            PointOfSale.organization.label("organization"),
+            Route.territory.label("territory"),
+            Sale.route.label("route"),
+            Order.employee.label("employee"),
+            literal(0).label("sales"),
+            literal(0).label("gross_sales"),
+            literal(0).label("quantity"),
+            literal(0).label("sales_count"),
+            literal(0).label("cash"),
+            literal(0).label("credit"),
+            literal(0).label("presales"),
+            Order.total.label("orders"),
+            Order.total_quantity.label("order_quantity"),
+            literal(1).label("order_count"),
+        )
+        .join(PointOfSale, PointOfSale.id == Order.point_of_sale)
+        .outerjoin(Sale, Sale.id == Order.sales)
+        .outerjoin(Route, Route.id == Sale.route)
+    )
+    if start is not None:
+        rows = rows.where(day >= start)
+    return rows
+
+
+def refresh_sales_summary(session: Session, start: Optional[date] = None) -> int:
+    """
+    Rebuilds the daily sales summary from `sale` and `order`.
+
+    Args:
+        session (Session): DB session, committed by this function.
+        start (Optional[date]): Only rebuild days on or after this date, everything when None.
+
+    Returns:
+        int: Number of summary rows written.
+    """
+    movements = union_all(get_sales_rows(start), get_order_rows(start)).subquery()
+
+    rows = select(
+        *[movements.c[column] for column in SUMMARY_KEY],
+        *[func.sum(movements.c[column]) for column in SUMMARY_MEASURES],
+    ).group_by(*[movements.c[column] for column in SUMMARY_KEY])
+
+    clear = delete(DailySalesSummary)
+    if start is not None:
+        clear = clear.where(DailySalesSummary.day >= start)
+
+    session.execute(clear)
+    result = session.execute(
+        insert(DailySalesSummary).from_select(SUMMARY_KEY + SUMMARY_MEASURES, rows)
+    )
+    session.commit()
+
+    return result.rowcount
+
+
+def refresh_recent_sales_summary(session: Session, days: int = REFRESH_WINDOW_DAYS) -> int:
+    return refresh_sales_summary(session, date.today() - timedelta(days=days))
+
+
+def filter_sales_summary(
+    statement,
+    organization_ids: List[int],
+    filter_type: Optional[Filter] = None,
+    filter_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    statement = statement.where(DailySalesSummary.organization.in_(organization_ids))
+
+    if filter_type == Filter.territory and filter_id:
+        statement = statement.where(DailySalesSummary.territory == filter_id)
+    elif filter_type == Filter.route and filter_id:
+        statement = statement.where(DailySalesSummary.route == filter_id)
+
+    if start:
+        statement = statement.where(DailySalesSummary.day >= start.date())
+    if end:
+        statement = statement.where(DailySalesSummary.day <= end.date())
+
+    return statement
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "refresh":
+        print("usage: python -m utils.dashboard_util refresh [recent | YYYY-MM-DD]")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        if len(sys.argv) > 2 and sys.argv[2] == "recent":
+            written = refresh_recent_sales_summary(session)
+        else:
+            start = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+            written = refresh_sales_summary(session, start)
+
+    print(f"Wrote {written} daily sales summary rows")
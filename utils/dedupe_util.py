@@ -0,0 +1,446 @@
+"""
+Duplicate detection for penetration leads and outlets.
+
+Reps register the same shop again under a slightly different name. Rather than comparing
+a record with every other one, each record is indexed under blocking keys in `dedupe_key`
+
+    phone  last PHONE_KEY_DIGITS digits of the phone number
+    tin    TIN without separators, upper-cased
+    cell   geohash of the location at DEDUPE_CELL_PRECISION (about 150 m)
+
+and only records of the same tenant sharing a key (for locations, the record's cell or
+one of its eight neighbours) are candidates. Keys carry the organization owning the
+record (the employee's for a penetration, the point of sale's for an outlet), records
+without one are keyed but never matched. Their names are compared all at once as hashed character
+trigram vectors, the cosine similarity being one matrix product, and a pair is flagged
+in `duplicate_flag` when
+
+    score = name similarity              (location only)
+            0.5 + 0.5 * name similarity  (same phone or TIN)
+
+reaches DUPLICATE_THRESHOLD. Penetrations are checked against penetrations and outlets,
+outlets against outlets, and a pair is always flagged as duplicate of the outlet, or of
+the older record when both are penetrations.
+
+Records are keyed and checked when the session that inserts them flushes. The nightly job
+rebuilds every key (catching edits and core inserts), compares every block and groups the
+flags into clusters of the same shop:
+
+    python -m utils.dedupe_util nightly
+"""
+
+import re
+import sys
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, delete, event, insert, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from models.Account import Organization, User
+from models.Address import Geolocation
+from models.PointOfSale import Outlet, PointOfSale
+from models.SalesAndTransactions import DedupeKey, DuplicateFlag, DuplicateStatus, Penetration
+from utils.geohash_util import encode_geohash, get_neighbour_cells
+from utils.get_hierarchy import get_organization_subtree_ids, get_parent_organizations
+
+
+PHONE_KEY_DIGITS = 9
+DEDUPE_CELL_PRECISION = 7
+DUPLICATE_THRESHOLD = 0.8
+KEY_MATCH_WEIGHT = 0.5
+TRIGRAM_DIMENSIONS = 256
+# Larger blocks are placeholder values ("0000000000") or dense markets, not one shop.
+BLOCK_SIZE_MAX = 200
+PAIR_CHUNK_SIZE = 10000
+DEDUPE_BATCH_SIZE = 5000
+
+# entity -> (model, name columns, phone, tin, location)
+dedupe_entities = {
+    "penetration": (Penetration, [Penetration.outlet_name, Penetration.company_name], Penetration.phone, Penetration.tin, Penetration.location),
+    "outlet": (Outlet, [Outlet.name], Outlet.phone, Outlet.tin, Outlet.location_id),
+}
+# entity -> (organization column, join) of the organization owning a record
+record_owners = {
+    "penetration": (User.organization, User.id == Penetration.employee),
+    "outlet": (PointOfSale.organization, PointOfSale.outlet_id == Outlet.id),
+}
+candidate_entities = {
+    "penetration": ["penetration", "outlet"],
+    "outlet": ["outlet"],
+}
+NAME_VARIANTS = max(len(names) for _, names, _, _, _ in dedupe_entities.values())
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-PHONE_KEY_DIGITS:] if len(digits) >= PHONE_KEY_DIGITS else None
+
+
+def normalize_tin(tin: Optional[str]) -> Optional[str]:
+    value = re.sub(r"[\W_]", "", tin or "").upper()
+    return value if value.strip("0") else None
+
+
+def normalize_name(name: Optional[str]) -> str:
+    return " ".join(re.sub(r"[\W_]+", " ", (name or "").lower()).split())
+
+
+def select_records(entity: str):
+    model, names, phone, tin, location = dedupe_entities[entity]
+    owner, owner_join = record_owners[entity]
+    return (
+        select(model.id, owner, phone, tin, Geolocation.latitude, Geolocation.longitude, *names)
+        .outerjoin(owner.class_, owner_join)
+        .outerjoin(Geolocation, Geolocation.id == location)
+    )
+
+
+def to_record(entity: str, row) -> dict:
+    id, organization, phone, tin, latitude, longitude, *names = row
+    located = latitude is not None and longitude is not None
+    return {
+        "entity": entity,
+        "id": id,
+        "organization": organization,
+        "names": [name for name in names if name],
+        "phone": normalize_phone(phone),
+        "tin": normalize_tin(tin),
+        "cell": encode_geohash(latitude, longitude, DEDUPE_CELL_PRECISION) if located else None,
+        "cells": get_neighbour_cells(latitude, longitude, DEDUPE_CELL_PRECISION) if located else [],
+    }
+
+
+def load_records(session: Session, entity: str, ids: Optional[List[int]] = None) -> List[dict]:
+    statement = select_records(entity)
+    if ids is not None:
+        statement = statement.where(dedupe_entities[entity][0].id.in_(ids))
+    return [to_record(entity, row) for row in session.exec(statement).all()]
+
+
+def get_keys(record: dict) -> List[dict]:
+    return [
+        {"entity": record["entity"], "record_id": record["id"], "organization": record["organization"], "kind": kind, "key": record[kind]}
+        for kind in ("phone", "tin", "cell")
+        if record[kind]
+    ]
+
+
+def trigram_vectors(names: List[str]) -> np.ndarray:
+    """Unit length hashed character trigram counts, one row per name (zeros for "")."""
+    vectors = np.zeros((len(names), TRIGRAM_DIMENSIONS), dtype=np.float32)
+    for row, name in enumerate(names):
+        normalized = normalize_name(name)
+        if not normalized:
+            continue
+        padded = f"  {normalized} "
+        buckets = [zlib.crc32(padded[i:i + 3].encode()) % TRIGRAM_DIMENSIONS for i in range(len(padded) - 2)]
+        np.add.at(vectors[row], buckets, 1)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def name_vectors(records: List[dict]) -> np.ndarray:
+    """(records, NAME_VARIANTS, TRIGRAM_DIMENSIONS) vectors of each record's names."""
+    names = [
+        (record["names"] + [""] * NAME_VARIANTS)[:NAME_VARIANTS]
+        for record in records
+    ]
+    flat = trigram_vectors([name for variants in names for name in variants])
+    return flat.reshape(len(records), NAME_VARIANTS, TRIGRAM_DIMENSIONS)
+
+
+def name_similarity(vectors: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """Best cosine similarity over the name variants of each pair of rows of vectors."""
+    similarity = np.empty(len(pairs), dtype=np.float32)
+    for start in range(0, len(pairs), PAIR_CHUNK_SIZE):
+        chunk = pairs[start:start + PAIR_CHUNK_SIZE]
+        products = np.einsum("pad,pbd->pab", vectors[chunk[:, 0]], vectors[chunk[:, 1]])
+        similarity[start:start + len(chunk)] = products.reshape(len(chunk), -1).max(axis=1)
+    return similarity
+
+
+def score_pairs(similarity: np.ndarray, key_match: np.ndarray) -> np.ndarray:
+    return np.where(key_match, KEY_MATCH_WEIGHT + (1 - KEY_MATCH_WEIGHT) * similarity, similarity)
+
+
+def original_first(a: Tuple[str, int], b: Tuple[str, int]) -> Tuple[Tuple[str, int], Tuple[str, int]]:
+    """(original, duplicate) of a pair of (entity, id) nodes, outlets before penetrations, then older first."""
+    def rank(node):
+        return (node[0] != "outlet", node[1])
+    return (a, b) if rank(a) <= rank(b) else (b, a)
+
+
+def score_candidates(records: List[dict], pairs: List[Tuple[int, int]], reasons: List[set]) -> np.ndarray:
+    """Scores of the candidate pairs (indices into records), reasons being the keys each pair shares."""
+    similarity = name_similarity(name_vectors(records), np.array(pairs, dtype=np.int64))
+    key_match = np.array([bool(reason & {"phone", "tin"}) for reason in reasons])
+    return np.minimum(score_pairs(similarity, key_match), 1.0)
+
+
+def build_flags(records: List[dict], pairs: List[Tuple[int, int]], reasons: List[set]) -> List[dict]:
+    """Flag rows of the candidate pairs scoring DUPLICATE_THRESHOLD or more."""
+    if not pairs:
+        return []
+
+    scores = score_candidates(records, pairs, reasons)
+    flags = []
+    for position in np.flatnonzero(scores >= DUPLICATE_THRESHOLD):
+        first, second = records[pairs[position][0]], records[pairs[position][1]]
+        original, duplicate = original_first((first["entity"], first["id"]), (second["entity"], second["id"]))
+        flags.append({
+            "entity": duplicate[0],
+            "record_id": duplicate[1],
+            "duplicate_entity": original[0],
+            "duplicate_of": original[1],
+            "score": round(float(scores[position]), 4),
+            "reason": ",".join(sorted(reasons[position])),
+        })
+    return flags
+
+
+def save_flags(session: Session, flags: List[dict]):
+    """Inserts flags, leaving pairs already flagged (or dismissed) untouched."""
+    if flags:
+        session.execute(
+            pg_insert(DuplicateFlag)
+            .values([{**flag, "status": DuplicateStatus.open} for flag in flags])
+            .on_conflict_do_nothing(constraint="uq_duplicate_flag_pair")
+        )
+
+
+def get_tenant_organization_ids(session: Session, organization: Optional[int]) -> List[int]:
+    """Every organization of the tenant organization belongs to."""
+    if organization is None:
+        return []
+    parents = get_parent_organizations(session, organization)
+    return get_organization_subtree_ids(session, parents[-1] if parents else organization)
+
+
+def get_tenant_roots(session: Session) -> Dict[int, int]:
+    """organization -> its tenant (top-level organization), from one query."""
+    parents = dict(session.exec(select(Organization.id, Organization.parent_organization)).all())
+    roots = {}
+    for organization in parents:
+        root, seen = organization, {organization}
+        while parents.get(root) is not None and parents[root] not in seen:
+            root = parents[root]
+            seen.add(root)
+        roots[organization] = root
+    return roots
+
+
+def find_candidates(session: Session, record: dict, entities: List[str], organization_ids: List[int]) -> Dict[Tuple[str, int], set]:
+    """
+    (entity, id) -> blocking keys shared with record, of every record of entities owned
+    by organization_ids in one of its blocks.
+    """
+    conditions = [
+        and_(DedupeKey.kind == kind, DedupeKey.key == record[kind])
+        for kind in ("phone", "tin")
+        if record[kind]
+    ]
+    if record["cells"]:
+        conditions.append(and_(DedupeKey.kind == "cell", DedupeKey.key.in_(record["cells"])))
+    if not conditions or not organization_ids:
+        return {}
+
+    rows = session.exec(
+        select(DedupeKey.entity, DedupeKey.record_id, DedupeKey.kind)
+        .where(or_(*conditions), DedupeKey.entity.in_(entities), DedupeKey.organization.in_(organization_ids))
+    ).all()
+
+    candidates = defaultdict(set)
+    for entity, record_id, kind in rows:
+        if (entity, record_id) != (record["entity"], record["id"]):
+            candidates[(entity, record_id)].add(kind)
+    return candidates
+
+
+def load_candidates(session: Session, record: dict, organization_ids: List[int]) -> Tuple[List[dict], List[set]]:
+    """The records of organization_ids sharing one of record's blocks and, for each, the keys shared."""
+    candidates = find_candidates(session, record, candidate_entities[record["entity"]], organization_ids)
+    records, reasons = [], []
+    for entity in candidate_entities[record["entity"]]:
+        ids = [record_id for candidate_entity, record_id in candidates if candidate_entity == entity]
+        if ids:
+            found = load_records(session, entity, ids)
+            records.extend(found)
+            reasons.extend(candidates[(entity, candidate["id"])] for candidate in found)
+    return records, reasons
+
+
+def match_record(session: Session, record: dict, organization_ids: List[int]) -> List[dict]:
+    """Flag rows for record against its candidates in organization_ids, nothing is written."""
+    candidates, reasons = load_candidates(session, record, organization_ids)
+    pairs = [(0, position) for position in range(1, len(candidates) + 1)]
+    return build_flags([record] + candidates, pairs, reasons)
+
+
+def find_duplicates(
+    session: Session,
+    entity: str,
+    names: List[str],
+    organization_ids: List[int],
+    phone: Optional[str] = None,
+    tin: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+) -> List[dict]:
+    """
+    Likely duplicates, among the records of organization_ids, of a penetration or outlet
+    not saved yet, so the form can warn before registering it again.
+
+    Returns:
+        List[dict]: entity, id, score and reason of each match, best first.
+    """
+    record = to_record(entity, (None, None, phone, tin, latitude, longitude, *names))
+    candidates, reasons = load_candidates(session, record, organization_ids)
+    if not candidates:
+        return []
+
+    pairs = [(0, position) for position in range(1, len(candidates) + 1)]
+    scores = score_candidates([record] + candidates, pairs, reasons)
+    matches = [
+        {
+            "entity": candidates[position]["entity"],
+            "id": candidates[position]["id"],
+            "score": round(float(scores[position]), 4),
+            "reason": ",".join(sorted(reasons[position])),
+        }
+        for position in np.flatnonzero(scores >= DUPLICATE_THRESHOLD)
+    ]
+    return sorted(matches, key=lambda match: -match["score"])
+
+
+def check_new_records(session: Session, entity: str, ids: List[int]) -> int:
+    """Keys records of entity just inserted and flags their duplicates, returns the number of flags."""
+    records = load_records(session, entity, ids)
+    keys = [key for record in records for key in get_keys(record)]
+    if keys:
+        session.execute(insert(DedupeKey), keys)
+
+    tenants = {}
+    flags = []
+    for record in records:
+        if record["organization"] not in tenants:
+            tenants[record["organization"]] = get_tenant_organization_ids(session, record["organization"])
+        flags.extend(match_record(session, record, tenants[record["organization"]]))
+    save_flags(session, flags)
+    return len(flags)
+
+
+@event.listens_for(Session, "after_flush")
+def flag_inserted_records(session, flush_context):
+    inserted = defaultdict(list)
+    for instance in session.new:
+        for entity, (model, *_) in dedupe_entities.items():
+            if isinstance(instance, model) and instance.id is not None:
+                inserted[entity].append(instance.id)
+
+    for entity, ids in inserted.items():
+        check_new_records(session, entity, ids)
+
+
+def rebuild_keys(session: Session) -> List[dict]:
+    """Replaces every blocking key from the current records, returns the records."""
+    records = []
+    for entity in dedupe_entities:
+        records.extend(load_records(session, entity))
+
+    session.execute(delete(DedupeKey))
+    keys = [key for record in records for key in get_keys(record)]
+    for start in range(0, len(keys), DEDUPE_BATCH_SIZE):
+        session.execute(insert(DedupeKey), keys[start:start + DEDUPE_BATCH_SIZE])
+    return records
+
+
+def get_candidate_pairs(records: List[dict], tenants: Dict[int, int]) -> Tuple[List[Tuple[int, int]], List[set]]:
+    """Every pair of records (indices) of the same tenant sharing a block, with the keys they share."""
+    blocks = defaultdict(list)
+    for position, record in enumerate(records):
+        tenant = tenants.get(record["organization"])
+        for kind in ("phone", "tin", "cell"):
+            if record[kind] and tenant is not None:
+                blocks[(tenant, kind, record[kind])].append(position)
+
+    shared = defaultdict(set)
+    for position, record in enumerate(records):
+        tenant = tenants.get(record["organization"])
+        if tenant is None:
+            continue
+        neighbours = [("cell", cell) for cell in record["cells"]]
+        own = [(kind, record[kind]) for kind in ("phone", "tin") if record[kind]]
+        for kind, key in own + neighbours:
+            members = blocks.get((tenant, kind, key), [])
+            if len(members) > BLOCK_SIZE_MAX:
+                continue
+            for other in members:
+                if other > position:
+                    shared[(position, other)].add(kind)
+
+    pairs = list(shared)
+    return pairs, [shared[pair] for pair in pairs]
+
+
+def assign_clusters(session: Session) -> int:
+    """
+    Groups the pairs not dismissed into connected components and stores, on each flag,
+    the original record of its component. Returns the number of clusters.
+    """
+    flags = session.exec(
+        select(DuplicateFlag.id, DuplicateFlag.entity, DuplicateFlag.record_id, DuplicateFlag.duplicate_entity, DuplicateFlag.duplicate_of)
+        .where(DuplicateFlag.status != DuplicateStatus.dismissed)
+    ).all()
+
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for _, entity, record_id, duplicate_entity, duplicate_of in flags:
+        root, other = original_first(find((entity, record_id)), find((duplicate_entity, duplicate_of)))
+        parent[other] = root
+
+    updates = [
+        {"id": id, "cluster": "{}:{}".format(*find((duplicate_entity, duplicate_of)))}
+        for id, _, _, duplicate_entity, duplicate_of in flags
+    ]
+    for start in range(0, len(updates), DEDUPE_BATCH_SIZE):
+        session.execute(update(DuplicateFlag), updates[start:start + DEDUPE_BATCH_SIZE])
+    return len({row["cluster"] for row in updates})
+
+
+def run_nightly(session: Session) -> dict:
+    """Rebuilds the keys, flags every pair in a block and clusters the flags."""
+    records = rebuild_keys(session)
+    pairs, reasons = get_candidate_pairs(records, get_tenant_roots(session))
+    flags = build_flags(records, pairs, reasons)
+    for start in range(0, len(flags), DEDUPE_BATCH_SIZE):
+        save_flags(session, flags[start:start + DEDUPE_BATCH_SIZE])
+    session.flush()
+
+    clusters = assign_clusters(session)
+    session.commit()
+    return {"records": len(records), "pairs": len(pairs), "flags": len(flags), "clusters": clusters}
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "nightly":
+        print("usage: python -m utils.dedupe_util nightly")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        summary = run_nightly(session)
+
+    print("Compared {records} records, {pairs} candidate pairs, {flags} flagged in {clusters} clusters".format(**summary))
@@ -0,0 +1,153 @@
+"""
+Demand forecast and reorder suggestions per (warehouse, product).
+
+Daily stock out quantities are read from the `daily_stock_movement` rollup in one
+query and every statistic is computed on the sparse (warehouse, product, day) rows
+with grouped pandas/numpy operations, days without movement count as zero demand
+without ever materializing a dense SKU x day matrix.
+"""
+
+from datetime import date, timedelta
+from statistics import NormalDist
+from typing import List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from models.Warehouse import DailyStockMovement, LogType, Stock, StockReservation
+
+
+FORECAST_METHODS = ("sma", "ewma")
+KEY = ["warehouse_id", "product_id"]
+
+
+def fetch_stock_out_series(session: Session, warehouse_ids: List[int], start: date, end: date) -> pd.DataFrame:
+    rows = session.exec(
+        select(
+            DailyStockMovement.warehouse_id,
+            DailyStockMovement.product_id,
+            DailyStockMovement.day,
+            func.sum(DailyStockMovement.quantity),
+        )
+        .where(
+            DailyStockMovement.warehouse_id.in_(warehouse_ids),
+            DailyStockMovement.log_type == LogType.stock_out,
+            DailyStockMovement.day >= start,
+            DailyStockMovement.day <= end,
+        )
+        .group_by(DailyStockMovement.warehouse_id, DailyStockMovement.product_id, DailyStockMovement.day)
+    ).all()
+    return pd.DataFrame(rows, columns=KEY + ["day", "quantity"])
+
+
+def fetch_available_stock(session: Session, warehouse_ids: List[int]) -> pd.DataFrame:
+    on_hand = pd.DataFrame(
+        session.exec(
+            select(Stock.warehouse_id, Stock.product_id, func.sum(Stock.quantity))
+            .where(Stock.warehouse_id.in_(warehouse_ids))
+            .group_by(Stock.warehouse_id, Stock.product_id)
+        ).all(),
+        columns=KEY + ["on_hand"],
+    )
+    reserved = pd.DataFrame(
+        session.exec(
+            select(StockReservation.warehouse_id, StockReservation.product_id, func.sum(StockReservation.reserved))
+            .where(StockReservation.warehouse_id.in_(warehouse_ids))
+            .group_by(StockReservation.warehouse_id, StockReservation.product_id)
+        ).all(),
+        columns=KEY + ["reserved"],
+    )
+    stock = on_hand.merge(reserved, on=KEY, how="outer").fillna(0)
+    stock["available"] = stock["on_hand"] - stock["reserved"]
+    return stock
+
+
+def compute_reorder_suggestions(
+    series: pd.DataFrame,
+    stock: pd.DataFrame,
+    end: date,
+    lookback_days: int,
+    lead_time_days: float,
+    review_days: float,
+    service_level: float,
+    method: str = "ewma",
+    alpha: float = 0.2,
+) -> pd.DataFrame:
+    """
+    Computes demand rate, safety stock, reorder point and suggested quantity for every series.
+
+    Args:
+        series (DataFrame): warehouse_id, product_id, day, quantity rows, one per day with stock out.
+        stock (DataFrame): warehouse_id, product_id, on_hand, reserved, available rows.
+        end (date): Last day of the history window.
+        lookback_days (int): Length of the history window in days.
+        lead_time_days (float): Days between ordering and receiving stock.
+        review_days (float): Days until the next replenishment review.
+        service_level (float): Probability of not running out during the lead time (0-1).
+        method (str): "sma" for the window average, "ewma" for exponential smoothing.
+        alpha (float): EWMA smoothing factor.
+
+    Returns:
+        DataFrame: One row per (warehouse, product) with demand history.
+    """
+    if series.empty:
+        return pd.DataFrame(columns=KEY + ["daily_demand", "safety_stock", "reorder_point", "on_hand", "reserved", "available", "suggested_quantity"])
+
+    quantity = series["quantity"].to_numpy(dtype=np.float64)
+    age = (pd.Timestamp(end) - pd.to_datetime(series["day"])).dt.days.to_numpy()
+
+    frame = series[KEY].copy()
+    frame["quantity"] = quantity
+    frame["squared"] = quantity ** 2
+    # weight of each day in an EWMA over the zero padded daily series ending at `end`
+    frame["weighted"] = quantity * alpha * (1 - alpha) ** age
+
+    grouped = frame.groupby(KEY, sort=False).agg(
+        total=("quantity", "sum"),
+        squared=("squared", "sum"),
+        ewma=("weighted", "sum"),
+    ).reset_index()
+
+    n = float(lookback_days)
+    mean = grouped["total"].to_numpy() / n
+    variance = np.maximum(grouped["squared"].to_numpy() / n - mean ** 2, 0) * n / max(n - 1, 1)
+    std = np.sqrt(variance)
+
+    daily_demand = grouped["ewma"].to_numpy() if method == "ewma" else mean
+    z = NormalDist().inv_cdf(service_level)
+
+    grouped["daily_demand"] = daily_demand
+    grouped["safety_stock"] = z * std * np.sqrt(lead_time_days)
+    grouped["reorder_point"] = daily_demand * lead_time_days + grouped["safety_stock"]
+
+    result = grouped.merge(stock, on=KEY, how="left").fillna({"on_hand": 0, "reserved": 0, "available": 0})
+
+    order_up_to = result["reorder_point"] + result["daily_demand"] * review_days
+    needs_order = result["available"].to_numpy() <= result["reorder_point"].to_numpy()
+    result["suggested_quantity"] = np.where(
+        needs_order, np.ceil(np.maximum(order_up_to - result["available"], 0)), 0
+    ).astype(np.int64)
+
+    return result[KEY + ["daily_demand", "safety_stock", "reorder_point", "on_hand", "reserved", "available", "suggested_quantity"]]
+
+
+def get_reorder_suggestions(
+    session: Session,
+    warehouse_ids: List[int],
+    lookback_days: int = 90,
+    lead_time_days: float = 7,
+    review_days: float = 7,
+    service_level: float = 0.95,
+    method: str = "ewma",
+) -> pd.DataFrame:
+    end = date.today()
+    start = end - timedelta(days=lookback_days - 1)
+
+    series = fetch_stock_out_series(session, warehouse_ids, start, end)
+    stock = fetch_available_stock(session, warehouse_ids)
+
+    return compute_reorder_suggestions(
+        series, stock, end, lookback_days, lead_time_days, review_days, service_level, method
+    )
@@ -12,6 +12,7 @@ from models.PointOfSale import PointOfSale, Outlet, WalkInCustomer
 #from models.Warehouse import Stock, StockType, Warehouse, Vehicle
 from utils.get_hierarchy import get_organization_ids_by_scope_group
 from utils.auth_util import get_current_user
+from utils.lookup_cache import versioned_lookup
 from sqlmodel import Session, select
 
 SessionDep = Annotated[Session, Depends(get_session)]
@@ -27,6 +28,7 @@ def fetch_id_and_name(session: Session, current_user: User, model_class: type):
     rows = session.exec(stmt).all()
     return {row[0]: row[1] for row in rows}
 
+@versioned_lookup("users")
 def fetch_user_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
     users_row = session.exec(
@@ -37,6 +39,7 @@ def fetch_user_id_and_name(session: SessionDep, current_user: UserDep):
     print("users: ", users)
     return users
 
+@versioned_lookup("organization")
 def fetch_organization_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -48,6 +51,7 @@ def fetch_organization_id_and_name(session: SessionDep, current_user: UserDep):
     organizations = {row[0]: row[1] for row in organization_rows}
     return organizations
 
+@versioned_lookup("role")
 def fetch_role_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -59,6 +63,7 @@ def fetch_role_id_and_name(session: SessionDep, current_user: UserDep):
     roles = {row[0]: row[1] for row in role_rows}
     return roles
 
+@versioned_lookup()
 def fetch_scope_group_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -84,6 +89,7 @@ def fetch_scope_group_id_and_name(session: SessionDep, current_user: UserDep):
 #     return scope_groups
 
 
+@versioned_lookup("product")
 def fetch_product_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -94,6 +100,7 @@ def fetch_product_id_and_name(session: SessionDep, current_user: UserDep):
     products = {row[0]: row[1] for row in product_row}
     return products
 
+@versioned_lookup("category")
 def fetch_category_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -104,6 +111,7 @@ def fetch_category_id_and_name(session: SessionDep, current_user: UserDep):
     categories = {row[0]: row[1] for row in category_row}
     return categories
 
+@versioned_lookup("inheritance_group")
 def fetch_inheritance_group_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -136,6 +144,7 @@ def fetch_inheritance_group_id_and_name(session: SessionDep, current_user: UserD
 #     return {row[0]: row[1] for row in inheritance_groups}
 
 
+@versioned_lookup("bank_account")
 def fetch_bank_account_id_and_account(session:SessionDep, current_user: UserDep):
     
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
@@ -169,6 +178,7 @@ def group_bank_accounts_by_bank_name(bank_accounts):
         grouped[bank_name][acc_id] = account
     return grouped
 
+@versioned_lookup("address")
 def fetch_address_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -179,6 +189,7 @@ def fetch_address_id_and_name(session: SessionDep, current_user: UserDep):
     products = {row[0]: row[1] for row in address_row}
     return products
 
+@versioned_lookup("geolocation")
 def fetch_geolocation_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -189,6 +200,7 @@ def fetch_geolocation_id_and_name(session: SessionDep, current_user: UserDep):
     products = {row[0]: row[1] for row in address_row}
     return products
 
+@versioned_lookup("classification_group")
 def fetch_classification_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -200,6 +212,7 @@ def fetch_classification_id_and_name(session: SessionDep, current_user: UserDep)
     classifications = {row[0]: row[1] for row in classification_row if row[0] is not None}
     return classifications
 
+@versioned_lookup("point_of_sale")
 def fetch_point_of_sale_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
     pos_row = session.exec(
@@ -209,6 +222,7 @@ def fetch_point_of_sale_id_and_name(session: SessionDep, current_user: UserDep):
     pos = {row[0]: row[1] for row in pos_row}
     return pos 
 
+@versioned_lookup("outlet", "point_of_sale")
 def fetch_outlet_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
     outlet_row = session.exec(
@@ -218,6 +232,7 @@ def fetch_outlet_id_and_name(session: SessionDep, current_user: UserDep):
     outlet = {row[0]: row[1] for row in outlet_row}
     return outlet 
 
+@versioned_lookup("warehouse")
 def fetch_admin_warehouse_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -230,6 +245,7 @@ def fetch_admin_warehouse_id_and_name(session: SessionDep, current_user: UserDep
     print("warehouses: ", warehouses)
     return warehouses
 
+@versioned_lookup("warehouse", "warehouse_group", "warehouse_group_link", "warehouse_store_admin_link", per_user=True)
 def fetch_warehouse_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -244,6 +260,7 @@ def fetch_warehouse_id_and_name(session: SessionDep, current_user: UserDep):
     warehouses = {row[0]: row[1] for row in warehouse_row}
     return warehouses
 
+@versioned_lookup("stock", "warehouse", "product", "warehouse_group", "warehouse_group_link", "warehouse_store_admin_link", per_user=True)
 def fetch_stocks_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
     stock_row = session.exec(
@@ -264,6 +281,7 @@ def fetch_stocks_id_and_name(session: SessionDep, current_user: UserDep):
     }
     return stocks
 
+@versioned_lookup("vehicle")
 def fetch_vehicle_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
 
@@ -354,6 +372,7 @@ def get_user_inheritance_group(session, current_user):
         return inherited_group, inherited_group.product
     return None, []
 
+@versioned_lookup("warehouse_group")
 def fetch_warehouse_group_id_and_name(session: SessionDep, current_user: UserDep):
     organization_ids = get_organization_ids_by_scope_group(session, current_user)
     group_row = session.exec(
@@ -0,0 +1,104 @@
+"""
+Geohash encoding and distance helpers for proximity search without PostGIS.
+
+A geohash interleaves longitude and latitude bisections into a base32 string, points
+sharing a prefix lie in the same cell, so "everything near (lat, lon)" becomes a prefix
+match over the point's cell and its eight neighbours at a precision whose cells are at
+least as large as the search radius, refined with an exact haversine distance.
+"""
+
+import math
+from typing import List
+
+import numpy as np
+
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        value, interval = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            interval[0] = middle
+        else:
+            bits = bits << 1
+            interval[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+
+def get_cell_size(precision: int):
+    """Height and width of a geohash cell of the given precision, in degrees."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def get_search_precision(latitude: float, radius_km: float) -> int:
+    """Longest precision whose cells still cover radius_km in both directions, 0 when none does."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = get_cell_size(precision)
+        height_km = height * KM_PER_DEGREE
+        width_km = width * KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+        if min(height_km, width_km) >= radius_km:
+            return precision
+    return 0
+
+
+def get_search_cells(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """
+    The cell containing the point and its eight neighbours at the search precision.
+
+    Returns:
+        List[str]: Distinct geohash prefixes, empty when the radius is larger than
+            any cell and every point is a candidate.
+    """
+    precision = get_search_precision(latitude, radius_km)
+    if precision == 0:
+        return []
+
+    return get_neighbour_cells(latitude, longitude, precision)
+
+
+def get_neighbour_cells(latitude: float, longitude: float, precision: int) -> List[str]:
+    """The cell of the given precision containing the point and its eight neighbours."""
+    height, width = get_cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        for lon_step in (-1, 0, 1):
+            lat = min(max(latitude + lat_step * height, -90.0), 90.0)
+            lon = (longitude + lon_step * width + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, lon, precision))
+
+    return sorted(cells)
+
+
+def haversine_km(latitude: float, longitude: float, latitudes, longitudes) -> np.ndarray:
+    """Great circle distances in km from one point to arrays of points."""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -119,6 +119,18 @@ def get_parent_organizations(session: SessionDep, organization: int) -> List[int
     return parents  # List of parent IDs (ordered bottom-up)
 
 
+def get_organization_subtree_ids(session: Session, organization: int) -> List[int]:
+    """
+    Fetch an organization and all of its descendants with one recursive query.
+    """
+    subtree = select(Organization.id).where(Organization.id == organization).cte("organization_subtree", recursive=True)
+    subtree = subtree.union_all(
+        select(Organization.id).where(Organization.parent_organization == subtree.c.id)
+    )
+
+    return list(session.exec(select(subtree.c.id)).all())
+
+
 #Let’s say you want to return all related organizations with their hierarchy, you could do:
 def get_org_with_parents(session: Session, org_ids: List[int]) -> List[Organization]:
     all_ids = set(org_ids)
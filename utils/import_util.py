@@ -0,0 +1,452 @@
+"""
+Bulk product, category and user import from CSV / XLSX (and JSON for users).
+
+The uploaded sheet is read into a frame of strings and every rule is checked column-wise
+(blank required cells, numbers, units, duplicates within the file), duplicates against the
+database and category codes are resolved with one query per LOOKUP_CHUNK_SIZE rows, never
+one per row. Rows that pass are inserted with batched executemany in the request's single
+transaction, the rest come back in a per-row report keyed by their line in the file:
+
+    {"total": 3, "created": 2, "failed": 1, "dry_run": false,
+     "errors": [{"row": 4, "errors": ["unit must be one of PS, Carton, ..."]}]}
+
+With dry_run nothing is written, the report shows what an import would do.
+
+User passwords are generated per row and bcrypt-hashed across PASSWORD_HASH_WORKERS
+processes, hashing is what makes creating users one by one slow.
+"""
+
+import os
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi import UploadFile
+from sqlalchemy import insert, tuple_, update
+from sqlmodel import Session, select
+
+from models.Account import Gender, Organization, Scope, User
+from models.Product_Category import Category, Product, Product_units
+from utils.auth_util import add_organization_path, generate_random_password, get_password_hash
+from utils.form_db_fetch import fetch_organization_id_and_name, fetch_role_id_and_name, fetch_scope_group_id_and_name
+from utils.process_pool_util import get_process_pool
+
+
+MAX_IMPORT_ROWS = 100_000
+LOOKUP_CHUNK_SIZE = 5000
+# Line of the first data row: line 1 is the header. JSON rows are numbered from 1.
+FIRST_ROW_NUMBER = 2
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+PRODUCT_COLUMNS = ["name", "sku", "price", "unit"]
+PRODUCT_OPTIONAL_COLUMNS = ["category_code", "brand", "description"]
+CATEGORY_COLUMNS = ["name", "code"]
+CATEGORY_OPTIONAL_COLUMNS = ["description", "parent_code"]
+USER_COLUMNS = ["full_name", "username"]
+USER_OPTIONAL_COLUMNS = ["email", "phone_number", "organization", "role", "scope_group", "gender", "position"]
+
+# Same rules as validate_name, validate_email and validate_phone_number in utils.util_functions.
+NAME_PATTERN = r"[0-9A-Za-z \u1200-\u137f\-&_]*"
+EMAIL_PATTERN = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+PHONE_PATTERN = r"([\+]?251|(0[79]))\d+"
+
+# Enums are accepted by name or value, in any case.
+units = {
+    **{unit.name.lower(): unit for unit in Product_units},
+    **{unit.value.lower(): unit for unit in Product_units},
+}
+genders = {gender.value.lower(): gender for gender in Gender}
+
+
+def read_import_file(upload: UploadFile, required: List[str], optional: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Reads a .csv, .xlsx or .json (array of objects) upload into a frame of stripped
+    strings, blanks as "".
+
+    Header names are matched case-insensitively with spaces read as underscores, missing
+    optional columns are added empty. Raises ValueError for anything that is not a
+    readable sheet with the required columns.
+    """
+    filename = (upload.filename or "").lower()
+    try:
+        if filename.endswith(".csv"):
+            frame = pd.read_csv(upload.file, dtype=str, keep_default_na=False)
+        elif filename.endswith(".xlsx"):
+            frame = pd.read_excel(upload.file, dtype=str)
+        elif filename.endswith(".json"):
+            rows = orjson.loads(upload.file.read())
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError("A JSON file must hold an array of objects")
+            frame = pd.DataFrame(rows)
+        else:
+            raise ValueError("File must be a .csv, .xlsx or .json file")
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, orjson.JSONDecodeError) as e:
+        raise ValueError(f"Could not read the file: {e}")
+
+    if frame.empty:
+        raise ValueError("The file has no rows")
+    if len(frame) > MAX_IMPORT_ROWS:
+        raise ValueError(f"At most {MAX_IMPORT_ROWS} rows can be imported at once")
+
+    frame.columns = frame.columns.astype(str).str.strip().str.lower().str.replace(r"\s+", "_", regex=True)
+    missing = [column for column in required if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    for column in optional:
+        if column not in frame.columns:
+            frame[column] = ""
+    frame = frame[list(required) + [column for column in optional if column not in required]]
+    frame = frame.fillna("").astype(str).apply(lambda column: column.str.strip()).reset_index(drop=True)
+    frame.attrs["first_row"] = 1 if filename.endswith(".json") else FIRST_ROW_NUMBER
+    return frame
+
+
+def blank_to_none(column: pd.Series) -> pd.Series:
+    return column.where(column != "")
+
+
+class RowErrors:
+    """Collects error messages per frame row from boolean masks."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.index = frame.index
+        self.first_row = frame.attrs.get("first_row", FIRST_ROW_NUMBER)
+        self.messages: Dict[int, List[str]] = {}
+
+    def flag(self, mask, message: str):
+        for position in self.index[np.asarray(mask, dtype=bool)]:
+            self.messages.setdefault(position, []).append(message)
+
+    def flag_blank(self, frame: pd.DataFrame, columns: Iterable[str]):
+        for column in columns:
+            self.flag(frame[column] == "", f"{column} is required")
+
+    def row_number(self, position) -> int:
+        return int(position) + self.first_row
+
+    @property
+    def valid(self) -> pd.Series:
+        return ~pd.Series(self.index.isin(list(self.messages)), index=self.index)
+
+    def report(self, created: int, dry_run: bool) -> dict:
+        return {
+            "total": len(self.index),
+            "created": created,
+            "failed": len(self.messages),
+            "dry_run": dry_run,
+            "errors": [
+                {"row": self.row_number(position), "errors": messages}
+                for position, messages in sorted(self.messages.items())
+            ],
+        }
+
+
+def chunked(values: list, size: int = LOOKUP_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def find_existing_pairs(session: Session, first_column, second_column, pairs: list) -> set:
+    """The (first, second) pairs that already exist, queried LOOKUP_CHUNK_SIZE at a time."""
+    existing = set()
+    for chunk in chunked(pairs):
+        existing.update(
+            tuple(row) for row in session.exec(
+                select(first_column, second_column).where(tuple_(first_column, second_column).in_(chunk))
+            ).all()
+        )
+    return existing
+
+
+def flag_existing_pairs(errors: RowErrors, frame: pd.DataFrame, columns: List[str], existing: set, label: str):
+    if existing:
+        pairs = pd.MultiIndex.from_frame(frame[columns])
+        errors.flag(pairs.isin(list(existing)), f"A record with the same {label} is already registered")
+
+
+def get_category_codes(session: Session, organization_ids: List[int], organization: int) -> Dict[str, int]:
+    """Category code -> id within the scope, the target organization's own categories win."""
+    categories = session.exec(
+        select(Category.id, Category.code, Category.organization)
+        .where(Category.organization.in_(organization_ids))
+        .order_by(Category.id)
+    ).all()
+
+    codes = {}
+    for category_id, code, category_organization in categories:
+        if code and (code not in codes or category_organization == organization):
+            codes[code] = category_id
+    return codes
+
+
+def import_products(
+    session: Session,
+    frame: pd.DataFrame,
+    organization: int,
+    organization_ids: List[int],
+    dry_run: bool = False,
+) -> dict:
+    """
+    Validates and inserts a products sheet, see `read_import_file` for the frame.
+
+    Columns: name, sku, price, unit (PS, Carton, Kilogram, Liter, Packet), and optionally
+    category_code, brand and description. Same duplicate rule as create-product: a
+    name and sku pair may only be registered once. The caller commits.
+    """
+    errors = RowErrors(frame)
+    errors.flag_blank(frame, PRODUCT_COLUMNS)
+
+    prices = pd.to_numeric(frame["price"], errors="coerce")
+    errors.flag((frame["price"] != "") & (prices.isna() | (prices < 0)), "price must be a number of at least 0")
+
+    unit_values = frame["unit"].str.lower().map(units)
+    errors.flag(
+        (frame["unit"] != "") & unit_values.isna(),
+        f"unit must be one of {', '.join(unit.value for unit in Product_units)}",
+    )
+
+    category_codes = get_category_codes(session, organization_ids, organization)
+    category_ids = frame["category_code"].map(category_codes)
+    errors.flag((frame["category_code"] != "") & category_ids.isna(), "category_code does not match a category")
+
+    duplicated = frame.duplicated(["name", "sku"], keep="first") & (frame["name"] != "") & (frame["sku"] != "")
+    errors.flag(duplicated, "Duplicate name and sku in the file")
+
+    pairs = list(frame.loc[errors.valid, ["name", "sku"]].itertuples(index=False, name=None))
+    existing = find_existing_pairs(session, Product.name, Product.sku, pairs)
+    flag_existing_pairs(errors, frame, ["name", "sku"], existing, "name and sku")
+
+    valid = errors.valid
+    records = pd.DataFrame({
+        "name": frame["name"],
+        "sku": frame["sku"],
+        "price": prices,
+        "unit": unit_values,
+        "category_id": category_ids,
+        "brand": blank_to_none(frame["brand"]),
+        "description": blank_to_none(frame["description"]),
+    })[valid]
+    records["organization"] = organization
+    records = records.astype(object).where(records.notna(), None)
+    records["category_id"] = [int(value) if value is not None else None for value in records["category_id"]]
+
+    created = 0
+    if not dry_run and not records.empty:
+        rows = records.to_dict("records")
+        for chunk in chunked(rows):
+            session.execute(insert(Product), chunk)
+        created = len(rows)
+
+    return errors.report(created, dry_run)
+
+
+def flag_category_cycles(errors: RowErrors, frame: pd.DataFrame, parents: Dict[str, str]):
+    """Flags rows whose parent_code chain, through rows of the file, leads back to themselves."""
+    positions = dict(zip(frame["code"], frame.index))
+    in_cycle = set()
+    for start in parents:
+        seen = []
+        code = start
+        while code in parents and code not in seen and code not in in_cycle:
+            seen.append(code)
+            code = parents[code]
+        if code in seen:
+            in_cycle.update(seen[seen.index(code):])
+
+    errors.flag(frame.index.isin([positions[code] for code in in_cycle]), "parent_code forms a cycle")
+
+
+def import_categories(
+    session: Session,
+    frame: pd.DataFrame,
+    organization: int,
+    organization_ids: List[int],
+    dry_run: bool = False,
+) -> dict:
+    """
+    Validates and inserts a categories sheet, see `read_import_file` for the frame.
+
+    Columns: name, code, and optionally description and parent_code. A parent_code may
+    name a row of the same file (any order) or an existing category in scope. Same
+    duplicate rule as create-category: a code and name pair may only be registered once.
+    The caller commits.
+    """
+    errors = RowErrors(frame)
+    errors.flag_blank(frame, CATEGORY_COLUMNS)
+    errors.flag((frame["code"] != "") & frame.duplicated("code", keep="first"), "Duplicate code in the file")
+
+    pairs = list(frame.loc[errors.valid, ["code", "name"]].itertuples(index=False, name=None))
+    existing = find_existing_pairs(session, Category.code, Category.name, pairs)
+    flag_existing_pairs(errors, frame, ["code", "name"], existing, "code and name")
+
+    # Parents in the file take precedence over existing categories with the same code.
+    file_codes = set(frame.loc[frame["code"] != "", "code"])
+    has_parent = frame["parent_code"] != ""
+    parent_in_file = has_parent & frame["parent_code"].isin(file_codes)
+    existing_codes = get_category_codes(session, organization_ids, organization)
+    existing_parents = frame["parent_code"].where(has_parent & ~parent_in_file).map(existing_codes)
+
+    errors.flag(has_parent & ~parent_in_file & existing_parents.isna(), "parent_code does not match a category")
+    errors.flag(has_parent & (frame["parent_code"] == frame["code"]), "parent_code cannot be the category itself")
+
+    candidates = errors.valid & parent_in_file
+    flag_category_cycles(errors, frame, dict(zip(frame.loc[candidates, "code"], frame.loc[candidates, "parent_code"])))
+
+    # A child cannot be created under a parent row that failed.
+    while True:
+        valid = errors.valid
+        failed_codes = file_codes - set(frame.loc[valid, "code"])
+        orphaned = valid & parent_in_file & frame["parent_code"].isin(failed_codes)
+        if not orphaned.any():
+            break
+        errors.flag(orphaned, "parent_code row could not be imported")
+
+    valid = errors.valid
+    records = pd.DataFrame({
+        "name": frame["name"],
+        "code": frame["code"],
+        "description": blank_to_none(frame["description"]),
+        "parent_category": existing_parents,
+    })[valid]
+    records["organization"] = organization
+    records = records.astype(object).where(records.notna(), None)
+    records["parent_category"] = [int(value) if value is not None else None for value in records["parent_category"]]
+
+    created = 0
+    if not dry_run and not records.empty:
+        ids = {}
+        for chunk in chunked(records.to_dict("records")):
+            ids.update({code: category_id for category_id, code in session.execute(
+                insert(Category).returning(Category.id, Category.code), chunk
+            ).all()})
+
+        children = frame.loc[valid & parent_in_file]
+        parent_updates = [
+            {"id": ids[code], "parent_category": ids[parent_code]}
+            for code, parent_code in zip(children["code"], children["parent_code"])
+        ]
+        for chunk in chunked(parent_updates):
+            session.execute(update(Category), chunk)
+
+        created = len(ids)
+
+    return errors.report(created, dry_run)
+
+
+def invert_lookup(lookup: Dict[int, str]) -> Tuple[Dict[str, int], set]:
+    """name -> id of an id -> name lookup, case-insensitive, with the names used more than once."""
+    ids, ambiguous = {}, set()
+    for lookup_id, name in lookup.items():
+        key = str(name).strip().lower()
+        if key in ids:
+            ambiguous.add(key)
+        ids[key] = lookup_id
+    return ids, ambiguous
+
+
+def resolve_names(errors: RowErrors, column: pd.Series, lookup: Dict[int, str], label: str) -> pd.Series:
+    """Maps a column of names to ids, flagging names that are unknown or not unique in scope."""
+    ids, ambiguous = invert_lookup(lookup)
+    keys = column.str.lower()
+    resolved = keys.map(ids)
+    errors.flag((column != "") & resolved.isna(), f"{label} does not match a {label} in your scope")
+    errors.flag(keys.isin(ambiguous), f"{label} matches more than one {label}, rename one of them first")
+    return resolved.where(~keys.isin(ambiguous))
+
+
+def hash_passwords(secrets: List[str]) -> List[str]:
+    """bcrypt-hashes secrets in the shared PASSWORD_HASH_WORKERS process pool, in order."""
+    if len(secrets) < 2 or PASSWORD_HASH_WORKERS < 2:
+        return [get_password_hash(secret) for secret in secrets]
+
+    chunksize = max(1, len(secrets) // (PASSWORD_HASH_WORKERS * 4))
+    pool = get_process_pool("password_hash", PASSWORD_HASH_WORKERS)
+    return list(pool.map(get_password_hash, secrets, chunksize=chunksize))
+
+
+def import_users(
+    session: Session,
+    frame: pd.DataFrame,
+    current_user,
+    tenant_organization: Organization,
+    provider: bool,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Validates and inserts a users sheet, see `read_import_file` for the frame.
+
+    Columns: full_name, username, and optionally email, phone_number, organization, role,
+    scope_group (by name, within the user's scope), gender and position. Usernames get the
+    tenant prefix and every user a generated password, as with create-account. Under the
+    provider tenant users always join the current user's organization, elsewhere a blank
+    organization means the tenant organization. The report lists the credentials of the
+    created users under "users". The caller commits.
+    """
+    errors = RowErrors(frame)
+    errors.flag_blank(frame, USER_COLUMNS)
+    errors.flag(~frame["full_name"].str.fullmatch(NAME_PATTERN), "full_name may only contain letters, digits, spaces, - & _")
+    errors.flag(~frame["username"].str.fullmatch(NAME_PATTERN), "username may only contain letters, digits, spaces, - & _")
+    errors.flag((frame["email"] != "") & ~frame["email"].str.fullmatch(EMAIL_PATTERN), "email is not a valid address")
+
+    phone_numbers = frame["phone_number"].str.replace(" ", "", regex=False)
+    errors.flag((phone_numbers != "") & ~phone_numbers.str.fullmatch(PHONE_PATTERN), "phone_number must start with +251, 251, 07 or 09")
+
+    gender_values = frame["gender"].str.lower().map(genders)
+    errors.flag((frame["gender"] != "") & gender_values.isna(), f"gender must be one of {', '.join(gender.value for gender in Gender)}")
+
+    if provider:
+        organization_ids = pd.Series(current_user.organization, index=frame.index, dtype=object)
+    else:
+        organization_ids = resolve_names(
+            errors, frame["organization"], fetch_organization_id_and_name(session, current_user), "organization"
+        ).fillna(tenant_organization.id)
+    role_ids = resolve_names(errors, frame["role"], fetch_role_id_and_name(session, current_user), "role")
+    scope_group_ids = resolve_names(
+        errors, frame["scope_group"], fetch_scope_group_id_and_name(session, current_user), "scope_group"
+    )
+
+    usernames = add_organization_path("", tenant_organization.name) + frame["username"]
+    errors.flag((frame["username"] != "") & usernames.duplicated(keep="first"), "Duplicate username in the file")
+    candidates = list(usernames[errors.valid])
+    existing = set()
+    for chunk in chunked(candidates):
+        existing.update(session.exec(select(User.username).where(User.username.in_(chunk))).all())
+    errors.flag(usernames.isin(existing), "username is already registered")
+
+    valid = errors.valid
+    records = pd.DataFrame({
+        "full_name": frame["full_name"],
+        "username": usernames,
+        "email": blank_to_none(frame["email"]),
+        "phone_number": blank_to_none(phone_numbers),
+        "organization": organization_ids,
+        "role": role_ids,
+        "scope_group": scope_group_ids,
+        "gender": gender_values,
+        "position": blank_to_none(frame["position"]),
+    })[valid]
+    records = records.astype(object).where(records.notna(), None)
+    for column in ("organization", "role", "scope_group"):
+        records[column] = [int(value) if value is not None else None for value in records[column]]
+    records["scope"] = Scope.personal_scope
+
+    report = errors.report(0, dry_run)
+    report["users"] = []
+    if dry_run or records.empty:
+        return report
+
+    passwords = [generate_random_password() for _ in range(len(records))]
+    records["hashedPassword"] = hash_passwords(
+        [password + username for password, username in zip(passwords, records["username"])]
+    )
+    for chunk in chunked(records.to_dict("records")):
+        session.execute(insert(User), chunk)
+
+    report["created"] = len(records)
+    report["users"] = [
+        {"row": errors.row_number(position), "username": username, "password": password}
+        for position, username, password in zip(records.index, frame.loc[records.index, "username"], passwords)
+    ]
+    return report
@@ -0,0 +1,273 @@
+"""
+KPI scoring engine.
+
+For a `Period`, every target row (sales volume, call completion, productivity and
+penetration) is loaded into one frame, actuals for all employees are pulled with one
+grouped query per indicator and joined onto the targets, and attainment is scored with
+vectorized numpy:
+
+    attainment = min(actual / target, ATTAINMENT_CAP)
+    score      = sum(weight * attainment) / sum(weight)
+
+Target `actual` columns, one `Measurement` per (performance, period, indicator) and
+`Performance.progress` are written back in bulk. A performance carries targets in many
+periods, so `Performance.progress` is the progress of the period scored last and
+`period_progress` derives a given period's from its targets. Scoring is idempotent and
+target and measurement rows are only written where their values changed, so re-running
+a period after late sales or visits arrive is cheap:
+
+    python -m utils.kpi_util score <period_id>
+"""
+
+import sys
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from models.KPIs import (
+    CallCompletionTarget, IndicatorType, Measurement, PenetrationTarget, Performance,
+    Period, ProductivityTarget, SalesVolumeTarget,
+)
+from models.RoutesAndVisits import DailyCallCoverage
+from models.SalesAndTransactions import Penetration, PenetrationStatus, Sale, SalesItem, SalesStates
+from utils.coverage_util import refresh_call_coverage
+
+
+ATTAINMENT_CAP = 1.5
+
+TARGET_COLUMNS = ["target_id", "performance", "employee", "dimension", "target", "weight", "actual"]
+
+# indicator -> (target model, column the target is set on)
+indicator_targets = {
+    IndicatorType.SalesVolume: (SalesVolumeTarget, "product"),
+    IndicatorType.CallCompletion: (CallCompletionTarget, "route"),
+    IndicatorType.Productivity: (ProductivityTarget, "route"),
+    IndicatorType.Penetration: (PenetrationTarget, "territory"),
+}
+
+
+def load_period_targets(session: Session, period: Period, employee_ids: Optional[List[int]] = None) -> pd.DataFrame:
+    frames = []
+    for indicator, (model, dimension) in indicator_targets.items():
+        statement = (
+            select(
+                model.id,
+                model.performance,
+                Performance.employee,
+                getattr(model, dimension),
+                model.target,
+                model.weight,
+                model.actual,
+            )
+            .join(Performance, Performance.id == model.performance)
+            .where(model.period == period.id)
+        )
+        if employee_ids:
+            statement = statement.where(Performance.employee.in_(employee_ids))
+
+        frame = pd.DataFrame(session.exec(statement).all(), columns=TARGET_COLUMNS)
+        frame["indicator_type"] = indicator
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def fetch_actuals(session: Session, period: Period, employee_ids: List[int]) -> pd.DataFrame:
+    """
+    Actuals for every indicator in the period, one grouped query each.
+
+    Returns:
+        DataFrame: indicator_type, employee, dimension, actual. Penetration is not
+            recorded per territory, so its dimension is None and it applies to every
+            territory target of the employee. Call completion and productivity are
+            the completed and productive calls of the call coverage rollup.
+    """
+    in_period = lambda column: (column >= period.start) & (column <= period.end)
+
+    sales = session.exec(
+        select(Sale.employee, SalesItem.product, func.sum(SalesItem.quantity))
+        .join(Sale, Sale.id == SalesItem.sales_id)
+        .where(in_period(Sale.date), Sale.employee.in_(employee_ids))
+        .where(or_(Sale.status.is_(None), Sale.status != SalesStates.void))
+        .group_by(Sale.employee, SalesItem.product)
+    ).all()
+
+    visits = session.exec(
+        select(DailyCallCoverage.employee, DailyCallCoverage.route, func.sum(DailyCallCoverage.completed), func.sum(DailyCallCoverage.productive))
+        .where(
+            DailyCallCoverage.day >= period.start.date(),
+            DailyCallCoverage.day <= period.end.date(),
+            DailyCallCoverage.employee.in_(employee_ids),
+        )
+        .group_by(DailyCallCoverage.employee, DailyCallCoverage.route)
+    ).all()
+
+    penetrations = session.exec(
+        select(Penetration.employee, func.count(Penetration.id))
+        .where(in_period(Penetration.date), Penetration.employee.in_(employee_ids))
+        .where(Penetration.status == PenetrationStatus.accepted)
+        .group_by(Penetration.employee)
+    ).all()
+
+    columns = ["employee", "dimension", "actual"]
+    frames = [
+        pd.DataFrame(sales, columns=columns).assign(indicator_type=IndicatorType.SalesVolume),
+        pd.DataFrame([(row[0], row[1], row[2]) for row in visits], columns=columns).assign(indicator_type=IndicatorType.CallCompletion),
+        pd.DataFrame([(row[0], row[1], row[3]) for row in visits], columns=columns).assign(indicator_type=IndicatorType.Productivity),
+        pd.DataFrame([(row[0], None, row[1]) for row in penetrations], columns=columns).assign(indicator_type=IndicatorType.Penetration),
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def score_targets(targets: pd.DataFrame, actuals: pd.DataFrame) -> pd.DataFrame:
+    key = ["indicator_type", "employee", "dimension"]
+    targets = targets.astype({"employee": "float64", "dimension": "float64"})
+    actuals = actuals.astype({"employee": "float64", "dimension": "float64", "actual": "float64"})
+
+    penetration = actuals["indicator_type"] == IndicatorType.Penetration
+    scored = targets.drop(columns="actual").merge(actuals[~penetration], on=key, how="left")
+
+    # penetration actuals are per employee only
+    per_employee = actuals[penetration][["employee", "actual"]].rename(columns={"actual": "employee_actual"})
+    scored = scored.merge(per_employee, on="employee", how="left")
+    is_penetration = (scored["indicator_type"] == IndicatorType.Penetration).to_numpy()
+    scored["actual"] = np.where(is_penetration, scored["employee_actual"], scored["actual"])
+    scored = scored.drop(columns="employee_actual")
+
+    return attain(scored)
+
+
+def attain(scored: pd.DataFrame) -> pd.DataFrame:
+    """Adds the capped attainment and weighted attainment of each target row."""
+    actual = scored["actual"].fillna(0).to_numpy(dtype=np.float64)
+    target = scored["target"].to_numpy(dtype=np.float64)
+    weight = scored["weight"].to_numpy(dtype=np.float64)
+
+    attainment = np.divide(actual, target, out=np.zeros_like(actual), where=target > 0)
+    scored["actual"] = actual
+    scored["attainment"] = np.minimum(attainment, ATTAINMENT_CAP)
+    scored["weighted"] = weight * scored["attainment"]
+
+    return scored
+
+
+def progress_by_performance(scored: pd.DataFrame) -> pd.DataFrame:
+    """Weighted score of each performance, columns performance and progress."""
+    performances = scored.groupby("performance", sort=False).agg(
+        weighted=("weighted", "sum"),
+        weight=("weight", "sum"),
+    ).reset_index()
+    weight = performances["weight"].to_numpy(dtype=np.float64)
+    performances["progress"] = np.divide(
+        performances["weighted"].to_numpy(dtype=np.float64), weight, out=np.zeros_like(weight), where=weight > 0
+    )
+    return performances[["performance", "progress"]]
+
+
+def period_progress(session: Session, period: Period) -> dict:
+    """Progress of every performance with targets in the period, from the actuals last written to them."""
+    targets = load_period_targets(session, period)
+    if targets.empty:
+        return {}
+
+    performances = progress_by_performance(attain(targets))
+    return {int(row.performance): float(row.progress) for row in performances.itertuples(index=False)}
+
+
+def score_period(session: Session, period_id: int, employee_ids: Optional[List[int]] = None) -> dict:
+    """
+    Computes actuals and weighted scores of a period and writes them back.
+
+    Args:
+        session (Session): DB session, committed by this function.
+        period_id (int): The period to score.
+        employee_ids (Optional[List[int]]): Only score these employees, everyone when None.
+
+    Returns:
+        dict: Number of targets, measurements and performances written.
+    """
+    period = session.get(Period, period_id)
+    if not period:
+        raise ValueError("Period not found")
+
+    targets = load_period_targets(session, period, employee_ids)
+    if targets.empty:
+        return {"targets": 0, "measurements": 0, "performances": 0}
+
+    if (targets["indicator_type"].isin([IndicatorType.CallCompletion, IndicatorType.Productivity])).any():
+        refresh_call_coverage(session, period.start.date(), period.end.date())
+
+    previous_actual = targets["actual"].to_numpy(dtype=np.float64)
+    actuals = fetch_actuals(session, period, targets["employee"].unique().tolist())
+    scored = score_targets(targets, actuals)
+
+    # target actuals, only where they moved
+    changed = scored[~np.isclose(scored["actual"].to_numpy(), previous_actual)]
+    for indicator, (model, _) in indicator_targets.items():
+        rows = changed[changed["indicator_type"] == indicator]
+        if not rows.empty:
+            session.execute(
+                update(model),
+                [{"id": int(row.target_id), "actual": float(row.actual)} for row in rows.itertuples(index=False)],
+            )
+
+    measurements = scored.groupby(["performance", "indicator_type"], sort=False).agg(
+        weight=("weight", "sum"),
+        target=("target", "sum"),
+        actual=("actual", "sum"),
+    ).reset_index()
+    if not measurements.empty:
+        statement = insert(Measurement).values([
+            {
+                "performance": int(row.performance),
+                "period": period.id,
+                "indicator_type": IndicatorType(row.indicator_type),
+                "weight": float(row.weight),
+                "target": float(row.target),
+                "actual": float(row.actual),
+            }
+            for row in measurements.itertuples(index=False)
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=["performance", "period", "indicator_type"],
+            set_={
+                "weight": statement.excluded.weight,
+                "target": statement.excluded.target,
+                "actual": statement.excluded.actual,
+            },
+            where=(Measurement.weight != statement.excluded.weight)
+                | (Measurement.target != statement.excluded.target)
+                | (Measurement.actual != statement.excluded.actual),
+        )
+        session.execute(statement)
+
+    performances = progress_by_performance(scored)
+    session.execute(
+        update(Performance),
+        [{"id": int(row.performance), "progress": float(row.progress)} for row in performances.itertuples(index=False)],
+    )
+
+    session.commit()
+
+    return {
+        "targets": len(changed),
+        "measurements": len(measurements),
+        "performances": len(performances),
+    }
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 3 or sys.argv[1] != "score":
+        print("usage: python -m utils.kpi_util score <period_id>")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        written = score_period(session, int(sys.argv[2]))
+
+    print(f"Scored period {sys.argv[2]}: {written}")
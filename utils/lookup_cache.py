@@ -0,0 +1,197 @@
+"""
+Versioned cache for the id -> name lookups behind the `*-form` endpoints.
+
+Every table has a change counter in `entity_version`. Session events collect the tables
+touched by each flush and by each insert/update/delete statement run through a session
+(bulk inserts, INSERT ... ON CONFLICT, `update(Model)`), and bump their counters once the
+transaction commits, so writers version what they change without any extra code. Only
+writes on a bare connection call `bump_entity_versions` themselves.
+
+`versioned_lookup` caches a `fetch_*` helper per tenant, scope group (and user, for lookups
+limited to the warehouses a user administers) under the versions of the tables it reads,
+a bumped version is simply a cache miss. The counters are re-read from the database at most
+every VERSION_REFRESH_SECONDS, which bounds how long other worker processes can serve a
+stale lookup, commits made by this process are seen immediately.
+
+`get_lookup_etag` derives an ETag from the same versions so forms can answer 304,
+`get_version_etag` does the same for any set of tables (see `utils.conditional_util`).
+"""
+
+import hashlib
+import time
+import traceback
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from models.Utils import EntityVersion
+
+
+VERSION_REFRESH_SECONDS = 2
+LOOKUP_CACHE_SIZE = 4096
+
+# Every lookup is filtered by the organizations of the user's scope group.
+SCOPE_TABLES = ("scope_group", "scope_group_link")
+
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+_versions: Dict[str, int] = {}
+_versions_loaded_at = [0.0]
+_lookup_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_lock = Lock()
+
+
+def _merge_versions(rows):
+    with _lock:
+        for entity, version in rows:
+            if version > _versions.get(entity, 0):
+                _versions[entity] = version
+
+
+def get_entity_versions(session: Session, tables: Iterable[str]) -> Tuple[int, ...]:
+    """Current change counter of each table, in the order given."""
+    if time.monotonic() - _versions_loaded_at[0] >= VERSION_REFRESH_SECONDS:
+        _merge_versions(session.exec(select(EntityVersion.entity, EntityVersion.version)).all())
+        _versions_loaded_at[0] = time.monotonic()
+
+    with _lock:
+        return tuple(_versions.get(table, 0) for table in tables)
+
+
+def bump_entity_versions(connection, tables: Iterable[str]):
+    """
+    Increments the counters of tables in one upsert.
+
+    Args:
+        connection: Connection or session to run on, the caller commits.
+        tables (Iterable[str]): Table names that changed.
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+
+    statement = insert(EntityVersion).values([{"entity": table, "version": 1} for table in tables])
+    statement = statement.on_conflict_do_update(
+        index_elements=["entity"],
+        set_={"version": EntityVersion.version + 1},
+    ).returning(EntityVersion.entity, EntityVersion.version)
+
+    _merge_versions(connection.execute(statement).all())
+
+
+def versioned_lookup(*tables: str, per_user: bool = False):
+    """
+    Caches a `fetch_*(session, current_user)` lookup until one of tables changes.
+
+    Args:
+        *tables (str): Tables the lookup reads, the scope tables are always added.
+        per_user (bool): The result also depends on current_user.id.
+    """
+    tables = tables + SCOPE_TABLES
+
+    def decorator(fetch):
+        @wraps(fetch)
+        def wrapper(session, current_user):
+            key = (
+                fetch.__name__,
+                current_tenant.get(),
+                current_user.scope_group,
+                current_user.id if per_user else None,
+                get_entity_versions(session, tables),
+            )
+
+            with _lock:
+                cached = _lookup_cache.get(key)
+                if cached is not None:
+                    _lookup_cache.move_to_end(key)
+                    return dict(cached)
+
+            result = fetch(session, current_user)
+
+            with _lock:
+                _lookup_cache[key] = dict(result)
+                while len(_lookup_cache) > LOOKUP_CACHE_SIZE:
+                    _lookup_cache.popitem(last=False)
+
+            return result
+
+        wrapper.tables = tables
+        wrapper.per_user = per_user
+        return wrapper
+
+    return decorator
+
+
+def get_version_etag(session: Session, tables: Iterable[str], *key) -> str:
+    """Strong ETag for the current versions of tables, qualified by tenant and key."""
+    tables = sorted(set(tables))
+    token = repr((current_tenant.get(), key, tables, get_entity_versions(session, tables)))
+    return '"' + hashlib.sha1(token.encode()).hexdigest() + '"'
+
+
+def get_lookup_etag(session: Session, current_user, *lookups) -> str:
+    """
+    ETag for a response built from the given `versioned_lookup` helpers.
+
+    Changes whenever a table behind any of them changes, and differs per tenant and scope.
+    """
+    per_user = any(lookup.per_user for lookup in lookups)
+
+    return get_version_etag(
+        session,
+        {table for lookup in lookups for table in lookup.tables},
+        current_user.scope_group,
+        current_user.id if per_user else None,
+        sorted(lookup.__name__ for lookup in lookups),
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header already names etag."""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_tables(session, flush_context):
+    changed = session.info.setdefault("changed_tables", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, "__tablename__", None)
+        if table:
+            changed.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_executed_tables(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name and name != EntityVersion.__tablename__:
+        orm_execute_state.session.info.setdefault("changed_tables", set()).add(name)
+
+
+@event.listens_for(Session, "after_commit")
+def bump_committed_tables(session):
+    changed = session.info.pop("changed_tables", None)
+    if not changed:
+        return
+    try:
+        with session.get_bind().begin() as connection:
+            bump_entity_versions(connection, changed)
+    except Exception:
+        # The data is committed, a missed bump only keeps stale lookups until the next one.
+        traceback.print_exc()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_rolled_back_tables(session):
+    session.info.pop("changed_tables", None)
@@ -0,0 +1,23 @@
+"""
+Long-lived process pools for CPU bound work started from request handlers.
+
+Forking the multi-threaded server process for every request is slow and not fork safe,
+so each kind of work (thumbnails, route sequencing, password hashing) gets one named pool,
+created on first use and reused for the life of the process.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, Optional
+
+
+_pools: Dict[str, ProcessPoolExecutor] = {}
+_pools_lock = Lock()
+
+
+def get_process_pool(name: str, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """The pool called name, started with max_workers processes (os.cpu_count() when None) on first use."""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ProcessPoolExecutor(max_workers=max_workers)
+        return _pools[name]
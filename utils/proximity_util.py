@@ -0,0 +1,118 @@
+"""
+Proximity search over `Geolocation.geohash`.
+
+Candidates are the rows whose geohash starts with one of the nine cells around the
+search point (see `utils.geohash_util`), which the `ix_geolocation_geohash` pattern index
+answers with range scans, and are then refined with a vectorized haversine distance.
+Rows created before the column existed are filled in by the backfill:
+
+    python -m utils.proximity_util backfill
+"""
+
+import sys
+from typing import List
+
+import numpy as np
+from sqlalchemy import or_, update
+from sqlmodel import Session, select
+
+from models.Address import Geolocation
+from utils.geohash_util import encode_geohash, get_search_cells, haversine_km
+
+
+BACKFILL_BATCH_SIZE = 5000
+NEAREST_MAX_EXPANSIONS = 6
+
+
+def filter_by_cells(statement, latitude: float, longitude: float, radius_km: float):
+    cells = get_search_cells(latitude, longitude, radius_km)
+    if not cells:
+        return statement
+    return statement.where(or_(*[Geolocation.geohash.like(f"{cell}%") for cell in cells]))
+
+
+def find_nearby(session: Session, statement, latitude: float, longitude: float, radius_km: float, limit: int = None) -> List[dict]:
+    """
+    Rows of statement within radius_km of (latitude, longitude), nearest first.
+
+    Args:
+        session (Session): DB session.
+        statement: A select joined to `Geolocation` whose last two columns are
+            Geolocation.latitude and Geolocation.longitude.
+        latitude (float): Search point latitude.
+        longitude (float): Search point longitude.
+        radius_km (float): Search radius in kilometres.
+        limit (int): Maximum number of rows returned, all when None.
+
+    Returns:
+        List[dict]: The selected columns by name plus "distance_km".
+    """
+    result = session.exec(filter_by_cells(statement, latitude, longitude, radius_km))
+    columns = list(result.keys())
+    rows = result.all()
+    if not rows:
+        return []
+
+    coordinates = np.array([row[-2:] for row in rows], dtype=np.float64)
+    distances = haversine_km(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+
+    inside = np.flatnonzero(distances <= radius_km)
+    nearest = inside[np.argsort(distances[inside], kind="stable")]
+    if limit:
+        nearest = nearest[:limit]
+
+    return [
+        {**dict(zip(columns, rows[index])), "distance_km": round(float(distances[index]), 3)}
+        for index in nearest
+    ]
+
+
+def find_nearest(session: Session, statement, latitude: float, longitude: float, radius_km: float, limit: int) -> List[dict]:
+    """Like find_nearby, but doubles the radius until limit rows are found or the expansions run out."""
+    for _ in range(NEAREST_MAX_EXPANSIONS):
+        found = find_nearby(session, statement, latitude, longitude, radius_km, limit)
+        if len(found) >= limit:
+            break
+        radius_km *= 2
+    return found
+
+
+def backfill_geohashes(session: Session) -> int:
+    """
+    Fills in geohash for every geolocation missing one, in batches.
+
+    Returns:
+        int: Number of geolocations updated.
+    """
+    updated = 0
+    while True:
+        rows = session.exec(
+            select(Geolocation.id, Geolocation.latitude, Geolocation.longitude)
+            .where(Geolocation.geohash.is_(None))
+            .order_by(Geolocation.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        session.execute(
+            update(Geolocation),
+            [{"id": id, "geohash": encode_geohash(latitude, longitude)} for id, latitude, longitude in rows],
+        )
+        session.commit()
+        updated += len(rows)
+
+    return updated
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print("usage: python -m utils.proximity_util backfill")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        updated = backfill_geohashes(session)
+
+    print(f"Updated {updated} geolocations")
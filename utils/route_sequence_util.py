@@ -0,0 +1,191 @@
+"""
+Visiting order for the points of sale of a route.
+
+Each route is an open path over its points' coordinates: a nearest-neighbour tour
+starting from the most outlying point, improved with 2-opt segment reversals until no
+reversal shortens it. Both run on a numpy haversine distance matrix and every 2-opt
+pass evaluates all candidate reversals for a segment start at once. Routes of a
+territory are sequenced in the shared ROUTE_SEQUENCE_WORKERS process pool and
+`RoutePoint.sequence` is written in bulk:
+
+    python -m utils.route_sequence_util territory <territory_id>
+"""
+
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from models.Address import Geolocation
+from models.PointOfSale import Outlet, PointOfSale, WalkInCustomer
+from models.RoutesAndVisits import Route, RoutePoint
+from utils.geohash_util import EARTH_RADIUS_KM
+from utils.process_pool_util import get_process_pool
+
+
+MAX_TWO_OPT_PASSES = 50
+POOL_MIN_ROUTES = 4
+ROUTE_SEQUENCE_WORKERS = int(os.getenv("ROUTE_SEQUENCE_WORKERS", str(os.cpu_count() or 1)))
+
+
+def get_distance_matrix(coordinates: np.ndarray) -> np.ndarray:
+    radians = np.radians(coordinates)
+    lat = radians[:, 0][:, None]
+    lon = radians[:, 1][:, None]
+
+    a = np.sin((lat - lat.T) / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearest_neighbour_path(distances: np.ndarray, start: int) -> np.ndarray:
+    n = len(distances)
+    path = np.empty(n, dtype=np.int64)
+    visited = np.zeros(n, dtype=bool)
+
+    path[0] = start
+    visited[start] = True
+    for position in range(1, n):
+        candidates = np.where(visited, np.inf, distances[path[position - 1]])
+        path[position] = np.argmin(candidates)
+        visited[path[position]] = True
+
+    return path
+
+
+def two_opt(distances: np.ndarray, path: np.ndarray) -> np.ndarray:
+    """
+    Reverses path[i:j + 1] whenever that shortens the open path, until no reversal helps.
+    """
+    n = len(path)
+    path = path.copy()
+
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(1, n - 1):
+            j = np.arange(i + 1, n)
+            before, first, last = path[i - 1], path[i], path[j]
+            after = np.where(j + 1 < n, path[np.minimum(j + 1, n - 1)], -1)
+
+            has_after = after >= 0
+            removed = distances[before, first] + np.where(has_after, distances[last, np.maximum(after, 0)], 0)
+            added = distances[before, last] + np.where(has_after, distances[first, np.maximum(after, 0)], 0)
+            delta = added - removed
+
+            best = np.argmin(delta)
+            if delta[best] < -1e-9:
+                path[i:j[best] + 1] = path[i:j[best] + 1][::-1]
+                improved = True
+        if not improved:
+            break
+
+    return path
+
+
+def sequence_points(coordinates: np.ndarray) -> List[int]:
+    """
+    Visiting order for coordinates ([[latitude, longitude], ...]).
+
+    Returns:
+        List[int]: Indexes into coordinates in visiting order.
+    """
+    n = len(coordinates)
+    if n < 3:
+        return list(range(n))
+
+    distances = get_distance_matrix(coordinates)
+    # start from the most outlying point so the path sweeps across the route
+    start = int(np.argmax(distances.sum(axis=1)))
+
+    return two_opt(distances, nearest_neighbour_path(distances, start)).tolist()
+
+
+def load_route_points(session: Session, route_ids: List[int]) -> Dict[int, Tuple[List[int], List[int], np.ndarray]]:
+    """
+    Route points with coordinates per route, from the outlet or walk in customer location.
+
+    Returns:
+        dict: route id -> (located route point ids, unlocated route point ids, coordinates)
+    """
+    location_id = func.coalesce(Outlet.location_id, WalkInCustomer.location_id)
+    rows = session.exec(
+        select(RoutePoint.route, RoutePoint.id, Geolocation.latitude, Geolocation.longitude)
+        .join(PointOfSale, PointOfSale.id == RoutePoint.point_of_sale)
+        .outerjoin(Outlet, Outlet.id == PointOfSale.outlet_id)
+        .outerjoin(WalkInCustomer, WalkInCustomer.id == PointOfSale.walk_in_customer_id)
+        .outerjoin(Geolocation, Geolocation.id == location_id)
+        .where(RoutePoint.route.in_(route_ids))
+        .order_by(RoutePoint.route, RoutePoint.id)
+    ).all()
+
+    routes = {}
+    for route_id, route_point_id, latitude, longitude in rows:
+        located, unlocated, coordinates = routes.setdefault(route_id, ([], [], []))
+        if latitude is None or longitude is None:
+            unlocated.append(route_point_id)
+        else:
+            located.append(route_point_id)
+            coordinates.append((latitude, longitude))
+
+    return {
+        route_id: (located, unlocated, np.array(coordinates, dtype=np.float64).reshape(-1, 2))
+        for route_id, (located, unlocated, coordinates) in routes.items()
+    }
+
+
+def optimize_routes(session: Session, route_ids: List[int]) -> int:
+    """
+    Sequences the points of every route and stores the order on `RoutePoint.sequence`.
+
+    Points without a location are placed after the located ones.
+
+    Args:
+        session (Session): DB session, committed by this function.
+        route_ids (List[int]): Routes to sequence.
+
+    Returns:
+        int: Number of route points sequenced.
+    """
+    routes = load_route_points(session, route_ids)
+    if not routes:
+        return 0
+
+    route_order = list(routes.keys())
+    coordinates = [routes[route_id][2] for route_id in route_order]
+
+    if len(route_order) >= POOL_MIN_ROUTES:
+        pool = get_process_pool("route_sequence", ROUTE_SEQUENCE_WORKERS)
+        orders = list(pool.map(sequence_points, coordinates, chunksize=max(1, len(route_order) // 32)))
+    else:
+        orders = [sequence_points(route_coordinates) for route_coordinates in coordinates]
+
+    sequences = []
+    for route_id, order in zip(route_order, orders):
+        located, unlocated, _ = routes[route_id]
+        ordered_ids = [located[index] for index in order] + unlocated
+        sequences.extend({"id": route_point_id, "sequence": position} for position, route_point_id in enumerate(ordered_ids, start=1))
+
+    session.execute(update(RoutePoint), sequences)
+    session.commit()
+
+    return len(sequences)
+
+
+def optimize_territory(session: Session, territory_id: int) -> int:
+    route_ids = session.exec(select(Route.id).where(Route.territory == territory_id)).all()
+    return optimize_routes(session, list(route_ids))
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 3 or sys.argv[1] != "territory":
+        print("usage: python -m utils.route_sequence_util territory <territory_id>")
+        sys.exit(1)
+
+    with Session(engine) as session:
+        sequenced = optimize_territory(session, int(sys.argv[2]))
+
+    print(f"Sequenced {sequenced} route points")
@@ -0,0 +1,140 @@
+"""
+Typeahead search for the product, user, organization and outlet pickers.
+
+Instead of downloading a whole `fetch_*_id_and_name` map, a picker sends what was typed
+and gets the top matches within the caller's scope group, ranked prefix matches first,
+then by trigram similarity, then alphabetically.
+
+With the pg_trgm extension, queries of TRIGRAM_MIN_LENGTH characters or more match
+substrings and near misses (`%` similarity) through GIN trigram indexes. Shorter queries,
+and every query on databases without pg_trgm, are prefix matches on `lower(column)`
+pattern indexes. Both index sets are created, without locking writes, by:
+
+    python -m utils.search_util install
+"""
+
+import sys
+import traceback
+from typing import Dict, List
+
+from sqlalchemy import case, func, or_
+from sqlmodel import Session, select
+
+from models.Account import Organization, User
+from models.PointOfSale import Outlet, PointOfSale
+from models.Product_Category import Product
+
+
+SEARCH_LIMIT_DEFAULT = 10
+SEARCH_LIMIT_MAX = 50
+TRIGRAM_MIN_LENGTH = 3
+
+# entity -> (label column returned, columns searched, scope condition on organization ids)
+search_entities = {
+    "product": (Product.name, [Product.name, Product.sku], lambda organization_ids: Product.organization.in_(organization_ids)),
+    "user": (User.username, [User.username, User.full_name], lambda organization_ids: User.organization.in_(organization_ids)),
+    "organization": (Organization.name, [Organization.name], lambda organization_ids: Organization.id.in_(organization_ids)),
+    "outlet": (
+        Outlet.name,
+        [Outlet.name, Outlet.phone, Outlet.tin],
+        lambda organization_ids: Outlet.id.in_(
+            select(PointOfSale.outlet_id).where(PointOfSale.organization.in_(organization_ids))
+        ),
+    ),
+}
+
+_trigram_available: Dict[str, bool] = {}
+
+
+def has_trigram(session: Session) -> bool:
+    """Whether pg_trgm is installed, checked once per process."""
+    if "pg_trgm" not in _trigram_available:
+        _trigram_available["pg_trgm"] = bool(
+            session.connection().exec_driver_sql("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'").first()
+        )
+    return _trigram_available["pg_trgm"]
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_names(session: Session, entity: str, query: str, organization_ids: List[int], limit: int = SEARCH_LIMIT_DEFAULT) -> List[dict]:
+    """
+    Top matches of query among the entity's rows in organization_ids.
+
+    Returns:
+        List[dict]: {"id", "name"} best match first.
+    """
+    label, columns, scope = search_entities[entity]
+    model = label.class_
+    query = query.strip()
+    prefix = f"{escape_like(query.lower())}%"
+
+    if len(query) >= TRIGRAM_MIN_LENGTH and has_trigram(session):
+        contains = f"%{escape_like(query)}%"
+        matches = [column.ilike(contains, escape="\\") for column in columns]
+        matches += [column.op("%")(query) for column in columns]
+        similarity = func.greatest(*[func.similarity(column, query) for column in columns])
+        ranking = [case((func.lower(label).like(prefix, escape="\\"), 0), else_=1), similarity.desc()]
+    else:
+        matches = [func.lower(column).like(prefix, escape="\\") for column in columns]
+        ranking = [case((func.lower(label).like(prefix, escape="\\"), 0), else_=1)]
+
+    statement = (
+        select(model.id, label)
+        .where(scope(organization_ids), or_(*matches))
+        .order_by(*ranking, label, model.id)
+        .limit(limit)
+    )
+    return [{"id": row[0], "name": row[1]} for row in session.exec(statement).all()]
+
+
+def get_search_index_statements() -> List[str]:
+    statements = []
+    for _, columns, _ in search_entities.values():
+        for column in columns:
+            table, name = column.expression.table.name, column.expression.name
+            statements.append(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{name}_lower "
+                f"ON {table} (lower({name}) text_pattern_ops)"
+            )
+            statements.append(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{name}_trgm "
+                f"ON {table} USING gin ({name} gin_trgm_ops)"
+            )
+    return statements
+
+
+def install_search_indexes(engine) -> int:
+    """
+    Creates pg_trgm (where the role may) and the search indexes, returns how many statements ran.
+
+    Trigram indexes are skipped when the extension is unavailable, prefix search still works.
+    """
+    done = 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        try:
+            connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            done += 1
+        except Exception:
+            traceback.print_exc()
+
+        trigram = bool(connection.exec_driver_sql("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'").first())
+        for statement in get_search_index_statements():
+            if "gin_trgm_ops" in statement and not trigram:
+                continue
+            print(statement)
+            connection.exec_driver_sql(statement)
+            done += 1
+    return done
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "install":
+        print("usage: python -m utils.search_util install")
+        sys.exit(1)
+
+    print(f"Ran {install_search_indexes(engine)} statements")
@@ -0,0 +1,120 @@
+"""
+Daily stock movement rollup.
+
+`daily_stock_movement` holds one row per (day, warehouse, product, stock_type, log_type)
+with the summed quantity and the number of stock logs behind it. It is kept up to date
+by `record_stock_movement`, which every code path that inserts, updates or deletes a
+`StockLog` calls inside its own transaction, so movement reports never scan `stock_log`.
+
+`backfill_stock_movements` rebuilds the rollup from the raw logs, run it once after
+deploying the table or whenever the two are suspected to have drifted:
+
+    python -m utils.stock_movement_util backfill [YYYY-MM-DD]
+"""
+
+import sys
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from models.Warehouse import DailyStockMovement, LogType, StockLog, StockType
+
+
+ROLLUP_KEY = ["day", "warehouse_id", "product_id", "stock_type", "log_type"]
+
+
+def get_movement_date(stock_log: StockLog) -> Optional[datetime]:
+    return stock_log.stock_in_date or stock_log.stock_out_date
+
+
+def record_stock_movement(session: Session, stock_log: StockLog, sign: int = 1):
+    """
+    Adds (sign=1) or removes (sign=-1) a stock log from its daily rollup row.
+
+    Args:
+        session (Session): DB session, the caller commits.
+        stock_log (StockLog): The log being inserted (1) or deleted (-1). Updates
+            are recorded as a removal of the old values followed by an insert.
+        sign (int): 1 or -1.
+    """
+    moved_at = get_movement_date(stock_log)
+    if moved_at is None:
+        return
+
+    statement = insert(DailyStockMovement).values(
+        day=moved_at.date(),
+        warehouse_id=stock_log.warehouse_id,
+        product_id=stock_log.product_id,
+        stock_type=StockType(stock_log.stock_type),
+        log_type=LogType(stock_log.log_type),
+        quantity=sign * stock_log.quantity,
+        movements=sign,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "quantity": DailyStockMovement.quantity + statement.excluded.quantity,
+            "movements": DailyStockMovement.movements + statement.excluded.movements,
+        },
+    )
+    session.execute(statement)
+
+
+def backfill_stock_movements(session: Session, start: Optional[date] = None) -> int:
+    """
+    Rebuilds the rollup from `stock_log` with one grouped INSERT ... SELECT.
+
+    Args:
+        session (Session): DB session, committed by this function.
+        start (Optional[date]): Only rebuild days on or after this date, everything when None.
+
+    Returns:
+        int: Number of rollup rows written.
+    """
+    moved_at = func.coalesce(StockLog.stock_in_date, StockLog.stock_out_date)
+    day = func.date(moved_at)
+
+    rows = (
+        select(
+            day,
+            StockLog.warehouse_id,
+            StockLog.product_id,
+            StockLog.stock_type,
+            StockLog.log_type,
+            func.sum(StockLog.quantity),
+            func.count(StockLog.id),
+        )
+        .where(moved_at.is_not(None))
+        .group_by(day, StockLog.warehouse_id, StockLog.product_id, StockLog.stock_type, StockLog.log_type)
+    )
+    clear = delete(DailyStockMovement)
+
+    if start is not None:
+        rows = rows.where(day >= start)
+        clear = clear.where(DailyStockMovement.day >= start)
+
+    session.execute(clear)
+    result = session.execute(
+        insert(DailyStockMovement).from_select(ROLLUP_KEY + ["quantity", "movements"], rows)
+    )
+    session.commit()
+
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print("usage: python -m utils.stock_movement_util backfill [YYYY-MM-DD]")
+        sys.exit(1)
+
+    start = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    with Session(engine) as session:
+        written = backfill_stock_movements(session, start)
+
+    print(f"Wrote {written} daily stock movement rows")
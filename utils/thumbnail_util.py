@@ -0,0 +1,123 @@
+"""
+Thumbnails of image blobs at fixed sizes.
+
+When an image blob is stored, `schedule_thumbnails` hands it to a background process
+pool that renders every size in THUMBNAIL_SIZES as WebP. Results are cached on disk by
+content hash (<root>/thumbnails/<size>/<aa>/<digest>.webp) and published with an atomic
+rename, so the same image uploaded for several products is rendered once and never read
+half written. `ensure_thumbnail` renders a missing thumbnail inline, which covers blobs
+stored before this pipeline and requests that beat the pool.
+
+    python -m utils.thumbnail_util backfill
+"""
+
+import os
+import sys
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+from utils.process_pool_util import get_process_pool
+
+
+THUMBNAIL_SIZES = {"sm": 64, "md": 256, "lg": 512}
+DEFAULT_THUMBNAIL_SIZE = "md"
+THUMBNAIL_URL = "/blob/get-thumbnail/{digest}/{size}"
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_QUALITY = 80
+
+
+def get_thumbnail_path(root: str, digest: str, size: str) -> str:
+    return os.path.join(root, "thumbnails", size, digest[:2], f"{digest}.webp")
+
+
+def render_thumbnail(source_path: str, target_path: str, edge: int):
+    """Scales an image to fit edge x edge pixels, keeping its aspect ratio."""
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((edge, edge))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp:
+                image.save(temp, "WEBP", quality=THUMBNAIL_QUALITY)
+            os.replace(temp_path, target_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+
+def render_thumbnails(root: str, source_path: str, digest: str) -> int:
+    """Renders every missing size of one image, runs in the worker pool."""
+    rendered = 0
+    for size, edge in THUMBNAIL_SIZES.items():
+        target_path = get_thumbnail_path(root, digest, size)
+        if not os.path.exists(target_path):
+            render_thumbnail(source_path, target_path, edge)
+            rendered += 1
+    return rendered
+
+
+def get_thumbnail_pool() -> ProcessPoolExecutor:
+    return get_process_pool("thumbnails", THUMBNAIL_WORKERS)
+
+
+def log_thumbnail_failure(future):
+    if future.exception() is not None:
+        traceback.print_exception(future.exception())
+
+
+def schedule_thumbnails(root: str, source_path: str, digest: str, content_type: Optional[str]):
+    """Queues thumbnail rendering of an image blob, other content types are ignored."""
+    if not content_type or not content_type.startswith("image/"):
+        return
+    future = get_thumbnail_pool().submit(render_thumbnails, root, source_path, digest)
+    future.add_done_callback(log_thumbnail_failure)
+
+
+def ensure_thumbnail(root: str, source_path: str, digest: str, size: str) -> str:
+    """
+    Path of a thumbnail, rendering it first when the pool has not done so yet.
+
+    Raises:
+        KeyError: When size is not one of THUMBNAIL_SIZES.
+    """
+    target_path = get_thumbnail_path(root, digest, size)
+    if not os.path.exists(target_path):
+        render_thumbnail(source_path, target_path, THUMBNAIL_SIZES[size])
+    return target_path
+
+
+if __name__ == "__main__":
+    from sqlmodel import Session, select
+    from db import engine
+    from models.Utils import Blob
+    from utils.blob_util import get_blob_backend
+
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print("usage: python -m utils.thumbnail_util backfill")
+        sys.exit(1)
+
+    backend = get_blob_backend()
+    with Session(engine) as session:
+        digests = session.exec(select(Blob.hash).where(Blob.content_type.startswith("image/"))).all()
+
+    with ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS) as pool:
+        futures = [
+            pool.submit(render_thumbnails, backend.root, backend.path(digest), digest)
+            for digest in digests if backend.exists(digest)
+        ]
+        rendered = 0
+        for future in futures:
+            try:
+                rendered += future.result()
+            except Exception:
+                traceback.print_exc()
+
+    print(f"Rendered {rendered} thumbnails for {len(futures)} images")
@@ -0,0 +1,199 @@
+"""
+GPS track ingestion and downsampling.
+
+Uploads arrive as delta encoded columns (see `TrackUpload`) and are decoded with numpy
+cumulative sums. Points are streamed with COPY into a temporary staging table and moved
+into the month partitioned `track_point` table with one INSERT ... ON CONFLICT DO NOTHING,
+so a retried upload does not duplicate points.
+
+Reads downsample with Douglas-Peucker on an equirectangular projection in metres, which
+keeps the shape of a 10k point trip in a few hundred points.
+"""
+
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from models.RoutesAndVisits import TrackPoint
+from models.viewModel.VisitView import TrackUpload
+from utils.geohash_util import EARTH_RADIUS_KM
+
+
+MAX_UPLOAD_POINTS = 50_000
+
+
+def decode_track_upload(upload: TrackUpload):
+    """
+    Decodes an upload into numpy columns.
+
+    Returns:
+        tuple: (recorded_at datetime64[ms] array, latitudes, longitudes, accuracies or None)
+
+    Raises:
+        ValueError: When the columns are inconsistent or out of range.
+    """
+    n = len(upload.t)
+    if n == 0:
+        raise ValueError("Track upload has no points")
+    if n > MAX_UPLOAD_POINTS:
+        raise ValueError(f"Track upload has more than {MAX_UPLOAD_POINTS} points")
+    if len(upload.lat) != n or len(upload.lon) != n or (upload.accuracy is not None and len(upload.accuracy) != n):
+        raise ValueError("Track upload columns must have the same length")
+    if upload.scale <= 0:
+        raise ValueError("Track upload scale must be positive")
+
+    offsets = np.cumsum(np.asarray(upload.t, dtype=np.int64))
+    latitudes = np.cumsum(np.asarray(upload.lat, dtype=np.int64)) / upload.scale
+    longitudes = np.cumsum(np.asarray(upload.lon, dtype=np.int64)) / upload.scale
+
+    if np.any(np.abs(latitudes) > 90) or np.any(np.abs(longitudes) > 180):
+        raise ValueError("Track upload coordinates are out of range")
+
+    start_time = upload.start_time
+    if start_time.tzinfo is not None:
+        # stored naive in UTC, convert rather than drop the offset
+        start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+    start = np.datetime64(start_time, "ms")
+    recorded_at = start + offsets.astype("timedelta64[ms]")
+    accuracies = np.asarray(upload.accuracy, dtype=np.float64) if upload.accuracy is not None else None
+
+    return recorded_at, latitudes, longitudes, accuracies
+
+
+def ensure_track_partitions(session: Session, first: datetime, last: datetime):
+    month = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month <= last:
+        following = (month + timedelta(days=32)).replace(day=1)
+        session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS track_point_{month:%Y_%m} PARTITION OF track_point "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+        ))
+        month = following
+
+
+def ingest_track_points(session: Session, upload: TrackUpload) -> int:
+    """
+    Bulk loads an upload into `track_point`.
+
+    Args:
+        session (Session): DB session, committed by this function.
+        upload (TrackUpload): The decoded batch is validated before anything is written.
+
+    Returns:
+        int: Number of new points stored, duplicates of already stored points are skipped.
+    """
+    recorded_at, latitudes, longitudes, accuracies = decode_track_upload(upload)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    timestamps = np.datetime_as_string(recorded_at, unit="ms")
+    for index in range(len(timestamps)):
+        writer.writerow((
+            upload.travel,
+            timestamps[index],
+            repr(float(latitudes[index])),
+            repr(float(longitudes[index])),
+            "" if accuracies is None else repr(float(accuracies[index])),
+        ))
+    buffer.seek(0)
+
+    ensure_track_partitions(session, recorded_at.min().astype(datetime), recorded_at.max().astype(datetime))
+
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS track_point_staging ("
+            "travel integer, recorded_at timestamp, latitude double precision, longitude double precision, accuracy double precision"
+            ") ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            "COPY track_point_staging (travel, recorded_at, latitude, longitude, accuracy) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        cursor.execute(
+            "INSERT INTO track_point (travel, recorded_at, latitude, longitude, accuracy) "
+            "SELECT travel, recorded_at, latitude, longitude, accuracy FROM track_point_staging "
+            "ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+    finally:
+        cursor.close()
+
+    session.commit()
+
+    return inserted
+
+
+def douglas_peucker(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Indexes of the points kept by Douglas-Peucker simplification.
+
+    Uses an explicit stack instead of recursion, each segment's farthest point is
+    found with one vectorized distance computation.
+    """
+    n = len(x)
+    if n < 3:
+        return np.arange(n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / length
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = first + 1 + farthest
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return np.flatnonzero(keep)
+
+
+def get_track(session: Session, travel_id: int, tolerance_m: Optional[float] = None) -> dict:
+    """
+    Points of a travel in recorded order as columns, simplified when tolerance_m is given.
+    """
+    rows = session.exec(
+        select(TrackPoint.recorded_at, TrackPoint.latitude, TrackPoint.longitude)
+        .where(TrackPoint.travel == travel_id)
+        .order_by(TrackPoint.recorded_at)
+    ).all()
+
+    if not rows:
+        return {"travel": travel_id, "points": 0, "recorded_at": [], "latitude": [], "longitude": []}
+
+    latitudes = np.array([row[1] for row in rows], dtype=np.float64)
+    longitudes = np.array([row[2] for row in rows], dtype=np.float64)
+    indexes = np.arange(len(rows))
+
+    if tolerance_m:
+        radius_m = EARTH_RADIUS_KM * 1000
+        x = np.radians(longitudes) * np.cos(np.radians(latitudes.mean())) * radius_m
+        y = np.radians(latitudes) * radius_m
+        indexes = douglas_peucker(x, y, tolerance_m)
+
+    return {
+        "travel": travel_id,
+        "points": len(rows),
+        "recorded_at": [rows[index][0] for index in indexes],
+        "latitude": latitudes[indexes].tolist(),
+        "longitude": longitudes[indexes].tolist(),
+    }
@@ -0,0 +1,170 @@
+"""
+Inventory valuation (Stock.quantity x Product.price).
+
+Totals per warehouse, category subtree and stock_type come from one aggregate query:
+a recursive CTE maps every category to itself and all of its ancestors, so joining
+stock through it rolls each product's value up into every category above it.
+
+Results are cached per tenant and warehouse set. Session events collect the warehouses
+whose `Stock` rows were inserted, updated or deleted and drop the matching cache entries
+once the transaction commits (a rolled back change only over-invalidates), the TTL only bounds staleness from other worker processes.
+"""
+
+import time
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+
+from models.Product_Category import Category, Product
+from models.Warehouse import Stock, Warehouse
+
+
+VALUATION_CACHE_TTL = 300
+
+_valuation_cache: Dict[Tuple[str, Tuple[int, ...]], Tuple[float, dict]] = {}
+_valuation_cache_lock = Lock()
+
+
+def get_category_closure():
+    closure = select(
+        Category.id.label("category_id"),
+        Category.id.label("ancestor_id"),
+    ).cte("category_closure", recursive=True)
+
+    parent = select(
+        closure.c.category_id,
+        Category.parent_category,
+    ).join(Category, Category.id == closure.c.ancestor_id).where(Category.parent_category.is_not(None))
+
+    return closure.union_all(parent)
+
+
+def compute_inventory_valuation(session: Session, warehouse_ids: List[int]) -> dict:
+    """
+    Computes stock value per warehouse, category subtree and stock type.
+
+    Args:
+        session (Session): DB session.
+        warehouse_ids (List[int]): Warehouses to value.
+
+    Returns:
+        dict: "warehouses" with one entry per warehouse holding its totals and a
+            "categories" list where each category's figures include all of its
+            subcategories, and the overall "total".
+    """
+    closure = get_category_closure()
+    value = func.sum(Stock.quantity * func.coalesce(Product.price, 0))
+
+    rows = session.exec(
+        select(
+            Stock.warehouse_id,
+            Warehouse.warehouse_name,
+            Warehouse.organization_id,
+            closure.c.ancestor_id,
+            Category.name,
+            Category.parent_category,
+            Stock.stock_type,
+            func.sum(Stock.quantity),
+            value,
+            func.count(func.distinct(Stock.product_id)),
+        )
+        .join(Warehouse, Warehouse.id == Stock.warehouse_id)
+        .join(Product, Product.id == Stock.product_id)
+        .outerjoin(closure, closure.c.category_id == Product.category_id)
+        .outerjoin(Category, Category.id == closure.c.ancestor_id)
+        .where(Stock.warehouse_id.in_(warehouse_ids))
+        .group_by(
+            Stock.warehouse_id,
+            Warehouse.warehouse_name,
+            Warehouse.organization_id,
+            closure.c.ancestor_id,
+            Category.name,
+            Category.parent_category,
+            Stock.stock_type,
+        )
+        .order_by(Stock.warehouse_id, closure.c.ancestor_id)
+    ).all()
+
+    warehouses = {}
+    for warehouse_id, warehouse_name, organization_id, category_id, category_name, parent_category, stock_type, quantity, total_value, products in rows:
+        warehouse = warehouses.setdefault(warehouse_id, {
+            "warehouse_id": warehouse_id,
+            "warehouse": warehouse_name,
+            "organization_id": organization_id,
+            "quantity": 0,
+            "value": 0.0,
+            "stock_types": {},
+            "categories": {},
+        })
+
+        category = warehouse["categories"].setdefault(category_id, {
+            "category_id": category_id,
+            "category": category_name or "Uncategorized",
+            "parent_category": parent_category,
+            "quantity": 0,
+            "value": 0.0,
+            "stock_types": {},
+        })
+        category["quantity"] += quantity
+        category["value"] += float(total_value)
+        category["stock_types"][stock_type] = {"quantity": quantity, "value": float(total_value), "products": products}
+
+        # every product is counted once at its root category (or as uncategorized)
+        if parent_category is None:
+            warehouse["quantity"] += quantity
+            warehouse["value"] += float(total_value)
+            stock_type_total = warehouse["stock_types"].setdefault(stock_type, {"quantity": 0, "value": 0.0})
+            stock_type_total["quantity"] += quantity
+            stock_type_total["value"] += float(total_value)
+
+    for warehouse in warehouses.values():
+        warehouse["categories"] = list(warehouse["categories"].values())
+
+    return {
+        "warehouses": list(warehouses.values()),
+        "total": sum(warehouse["value"] for warehouse in warehouses.values()),
+    }
+
+
+def get_inventory_valuation(session: Session, tenant: str, warehouse_ids: List[int]) -> dict:
+    key = (tenant, tuple(sorted(set(warehouse_ids))))
+
+    with _valuation_cache_lock:
+        cached = _valuation_cache.get(key)
+    if cached and time.monotonic() - cached[0] < VALUATION_CACHE_TTL:
+        return cached[1]
+
+    valuation = compute_inventory_valuation(session, list(key[1]))
+
+    with _valuation_cache_lock:
+        _valuation_cache[key] = (time.monotonic(), valuation)
+
+    return valuation
+
+
+def invalidate_inventory_valuation(warehouse_ids=None):
+    """Drops cached valuations covering any of warehouse_ids, or everything when None."""
+    with _valuation_cache_lock:
+        if warehouse_ids is None:
+            _valuation_cache.clear()
+            return
+        for key in [key for key in _valuation_cache if not warehouse_ids.isdisjoint(key[1])]:
+            del _valuation_cache[key]
+
+
+@event.listens_for(Session, "after_flush")
+def collect_stock_changes(session, flush_context):
+    changed = session.info.setdefault("valuation_warehouse_ids", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Stock):
+            changed.add(instance.warehouse_id)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_stock_changes(session):
+    changed = session.info.pop("valuation_warehouse_ids", None)
+    if changed:
+        invalidate_inventory_valuation(changed)
+
@@ -3,8 +3,10 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jwt.exceptions import InvalidTokenError
 from sqlmodel import select
 from models.Account import User
-from models.Warehouse import Warehouse, WarehouseGroup, WarehouseGroupLink, WarehouseStoreAdminLink
+from models.Warehouse import Warehouse, WarehouseGroup, WarehouseGroupLink, WarehouseStoreAdminLink, WarehouseStop, Stock, StockLog, StockReservation, StockType, RequestType, RequestStatus, LogType
+from datetime import datetime
 from db import get_session
+from utils.stock_movement_util import record_stock_movement
 
 from typing import Annotated, Union, List
 from sqlmodel import Session, select
@@ -93,4 +95,271 @@ def check_warehouse_permission(
     except Exception as e:
         print(f"Error in check_permission: {e}")
         traceback.print_exc()
-        return False
\ No newline at end of file
+        return False
+
+
+# Request types that take stock out of the source warehouse and therefore
+# have to hold a reservation while they are pending or approved.
+OUTBOUND_REQUEST_TYPES = (RequestType.stock_out, RequestType.transfer)
+
+request_to_log_type_map = {
+    RequestType.stock_out: LogType.stock_out,
+    RequestType.transfer: LogType.transfer,
+    RequestType.return_defect: LogType.return_defect,
+    RequestType.return_normal: LogType.return_normal,
+}
+
+
+def get_stock(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    stock_type: StockType,
+) -> Stock | None:
+    """
+    Returns the on hand stock row of a product in a warehouse for the given stock type.
+    """
+    return session.exec(
+        select(Stock).where(
+            (Stock.warehouse_id == warehouse_id)
+            & (Stock.product_id == product_id)
+            & (Stock.stock_type == stock_type)
+        )
+    ).first()
+
+
+def get_stock_reservation(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    stock_type: StockType,
+) -> StockReservation:
+    """
+    Returns the reservation row of (warehouse, product, stock_type), creating it if missing.
+
+    The row is locked for the rest of the transaction so concurrent approvals
+    on the same product serialize on it instead of over committing stock.
+    """
+    reservation = session.exec(
+        select(StockReservation)
+        .where(
+            (StockReservation.warehouse_id == warehouse_id)
+            & (StockReservation.product_id == product_id)
+            & (StockReservation.stock_type == stock_type)
+        )
+        .with_for_update()
+    ).first()
+
+    if not reservation:
+        reservation = StockReservation(
+            warehouse_id=warehouse_id,
+            product_id=product_id,
+            stock_type=stock_type,
+            requested=0,
+            reserved=0,
+        )
+        session.add(reservation)
+        session.flush()
+
+    return reservation
+
+
+def get_available_quantity(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    stock_type: StockType,
+) -> int:
+    """
+    Returns on hand minus reserved (approved but not yet confirmed) quantity.
+    """
+    stock = get_stock(session, warehouse_id, product_id, stock_type)
+    reservation = get_stock_reservation(session, warehouse_id, product_id, stock_type)
+    on_hand = stock.quantity if stock else 0
+    return on_hand - reservation.reserved
+
+
+def get_warehouse_reservations(session: Session, warehouse_id: int) -> dict:
+    """
+    Returns {(product_id, stock_type): StockReservation} for every reservation row of a warehouse.
+    """
+    reservations = session.exec(
+        select(StockReservation).where(StockReservation.warehouse_id == warehouse_id)
+    ).all()
+    return {(r.product_id, r.stock_type): r for r in reservations}
+
+
+def hold_request_quantity(session: Session, warehouse_stop: WarehouseStop, sign: int = 1):
+    """
+    Adds (sign=1) or removes (sign=-1) the contribution of a warehouse stop to its reservation row.
+
+    Pending requests are counted in `requested`, approved and unconfirmed ones in
+    `reserved`. Rejected, confirmed and inbound requests hold nothing. The caller
+    is responsible for committing.
+    """
+    if warehouse_stop.request_type not in OUTBOUND_REQUEST_TYPES or warehouse_stop.confirmed:
+        return
+
+    if warehouse_stop.request_status == RequestStatus.rejected:
+        return
+
+    reservation = get_stock_reservation(
+        session, warehouse_stop.warehouse_id, warehouse_stop.product_id, warehouse_stop.stock_type
+    )
+
+    if warehouse_stop.request_status == RequestStatus.approved:
+        reservation.reserved = max(reservation.reserved + sign * warehouse_stop.quantity, 0)
+    else:
+        reservation.requested = max(reservation.requested + sign * warehouse_stop.quantity, 0)
+
+    session.add(reservation)
+
+
+def reserve_request_quantity(session: Session, warehouse_stop: WarehouseStop):
+    """
+    Marks a request as approved, moving an outbound request into the reserved bucket.
+
+    Raises:
+        HTTPException: If the requested quantity exceeds the available quantity.
+    """
+    if warehouse_stop.request_type not in OUTBOUND_REQUEST_TYPES:
+        warehouse_stop.request_status = RequestStatus.approved
+        return
+
+    available = get_available_quantity(
+        session, warehouse_stop.warehouse_id, warehouse_stop.product_id, warehouse_stop.stock_type
+    )
+    if warehouse_stop.quantity > available:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not enough stock available, requested {warehouse_stop.quantity} but only {available} available",
+        )
+
+    hold_request_quantity(session, warehouse_stop, -1)
+    warehouse_stop.request_status = RequestStatus.approved
+    hold_request_quantity(session, warehouse_stop, 1)
+
+
+def approve_warehouse_stop(session: Session, warehouse_stop: WarehouseStop, current_user):
+    if warehouse_stop.request_status != RequestStatus.pending:
+        raise HTTPException(status_code=400, detail="Only pending warehouse stops can be approved")
+
+    reserve_request_quantity(session, warehouse_stop)
+    warehouse_stop.approver_id = current_user.id
+    warehouse_stop.approve_date = datetime.now()
+    session.add(warehouse_stop)
+
+
+def reject_warehouse_stop(session: Session, warehouse_stop: WarehouseStop, current_user):
+    if warehouse_stop.confirmed:
+        raise HTTPException(status_code=400, detail="Confirmed warehouse stops can not be rejected")
+
+    hold_request_quantity(session, warehouse_stop, -1)
+    warehouse_stop.request_status = RequestStatus.rejected
+    session.add(warehouse_stop)
+
+
+def is_two_sided_transfer(warehouse_stop: WarehouseStop) -> bool:
+    return warehouse_stop.request_type == RequestType.transfer and warehouse_stop.destination_warehouse_id is not None
+
+
+def confirm_warehouse_stop(session: Session, warehouse_stop: WarehouseStop, current_user):
+    """
+    Confirms an approved stop and moves the stock of its warehouse.
+
+    A transfer with a destination warehouse is dispatched instead: the source
+    stock leaves the warehouse with its transfer stock log and the stop goes in
+    transit, the destination side is posted by `receive_warehouse_stop` once it
+    arrives.
+    """
+    if warehouse_stop.request_status != RequestStatus.approved:
+        raise HTTPException(status_code=400, detail="Warehouse stop is not approved")
+
+    if warehouse_stop.confirmed:
+        raise HTTPException(status_code=400, detail="Warehouse stop already confirmed")
+    
+    stock = get_stock(session, warehouse_stop.warehouse_id, warehouse_stop.product_id, warehouse_stop.stock_type)
+    if warehouse_stop.request_type in OUTBOUND_REQUEST_TYPES:
+        if not stock:
+            raise HTTPException(status_code=404, detail="Stock not found")
+        stock.quantity = stock.quantity - warehouse_stop.quantity
+    elif stock:
+        stock.quantity = stock.quantity + warehouse_stop.quantity
+    else:
+        stock = Stock(
+            id=None,
+            warehouse_id=warehouse_stop.warehouse_id,
+            product_id=warehouse_stop.product_id,
+            quantity=warehouse_stop.quantity,
+            stock_type=warehouse_stop.stock_type,
+            date_added=datetime.now()
+        )
+
+    # release the reservation before the stop stops counting as open
+    hold_request_quantity(session, warehouse_stop, -1)
+    warehouse_stop.confirmed = True
+    warehouse_stop.confirm_date = datetime.now()
+
+    if is_two_sided_transfer(warehouse_stop):
+        warehouse_stop.request_status = RequestStatus.in_transit
+
+    session.add(warehouse_stop)
+    session.add(stock)
+
+    stock_log = StockLog(
+        stock_id = warehouse_stop.stock_id,
+        stock_out_date = datetime.now(),
+        warehouse_id = warehouse_stop.warehouse_id,
+        product_id = warehouse_stop.product_id,
+        quantity = warehouse_stop.quantity,
+        stock_type = warehouse_stop.stock_type,
+        request_type = warehouse_stop.request_type,
+        log_type = request_to_log_type_map.get(warehouse_stop.request_type, LogType.stock_in)  # Default to stock_in
+    )
+    session.add(stock_log)
+    record_stock_movement(session, stock_log)
+
+
+def receive_warehouse_stop(session: Session, warehouse_stop: WarehouseStop, current_user):
+    """
+    Receives an in transit transfer at its destination warehouse.
+
+    The destination stock is increased and its transfer_in stock log added, the
+    source side was logged when the stop was dispatched.
+    """
+    if not is_two_sided_transfer(warehouse_stop) or warehouse_stop.request_status != RequestStatus.in_transit:
+        raise HTTPException(status_code=400, detail="Warehouse stop is not an in transit transfer")
+
+    now = datetime.now()
+    stock = get_stock(session, warehouse_stop.destination_warehouse_id, warehouse_stop.product_id, warehouse_stop.stock_type)
+    if stock:
+        stock.quantity = stock.quantity + warehouse_stop.quantity
+    else:
+        stock = Stock(
+            id=None,
+            warehouse_id=warehouse_stop.destination_warehouse_id,
+            product_id=warehouse_stop.product_id,
+            quantity=warehouse_stop.quantity,
+            stock_type=warehouse_stop.stock_type,
+            date_added=now
+        )
+
+    destination_log = StockLog(
+        stock_id = warehouse_stop.stock_id,
+        stock_in_date = now,
+        warehouse_id = warehouse_stop.destination_warehouse_id,
+        product_id = warehouse_stop.product_id,
+        quantity = warehouse_stop.quantity,
+        stock_type = warehouse_stop.stock_type,
+        request_type = RequestType.transfer,
+        log_type = LogType.transfer_in
+    )
+
+    warehouse_stop.request_status = RequestStatus.received
+    warehouse_stop.receiver_id = current_user.id
+    warehouse_stop.receive_date = now
+
+    session.add(stock)
+    session.add(destination_log)
+    record_stock_movement(session, destination_log)
+    session.add(warehouse_stop)